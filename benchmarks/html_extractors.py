@@ -0,0 +1,162 @@
+"""
+Equivalence check and micro-benchmark for the HTML-to-text engines.
+
+Usage:
+    python -m benchmarks.html_extractors [--corpus PATH] [--repeat N] [--engines bs4 stdlib lxml]
+
+Every engine's output is compared with the BeautifulSoup reference engine
+on the corpus, then each engine's throughput is reported in posts/sec. The
+corpus is a built-in set of WordPress post bodies, or PATH: a directory of
+``.html`` files, or a JSON / JSON Lines file of raw posts from the REST API.
+
+The built-in corpus also carries malformed markup, which exact engines must
+handle like the reference engine while the others only report differences.
+The exit status is non-zero when a required comparison fails.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from scraper.extractors import EXTRACTORS, BeautifulSoupExtractor, create_extractor
+
+CORPUS = [
+    # Block editor markup with its serialization comments
+    '<!-- wp:paragraph -->\n<p>Владата денеска ја усвои <strong>новата</strong> стратегија за '
+    'дигитализација&nbsp;на јавните услуги.</p>\n<!-- /wp:paragraph -->\n\n<!-- wp:paragraph -->\n'
+    '<p>„Ова е важен чекор“ &#8211; изјави министерот.</p>\n<!-- /wp:paragraph -->',
+    # Classic editor with inline formatting, links and entities
+    '<p>Според податоците на <a href="https://stat.gov.mk/?a=1&amp;b=2">Државниот завод</a>, '
+    'инфлацијата изнесува 3,2&#37; &amp; расте.<br />\nНајголем раст има кај <em>храната</em>.</p>',
+    # Figures, captions and galleries
+    '<figure class="wp-block-image size-large"><img decoding="async" src="/a.jpg" alt="Скопје" />'
+    '<figcaption class="wp-element-caption">Фото: МИА</figcaption></figure>\n'
+    '<div class="gallery"><dl><dt><img src="/b.jpg"></dt><dd>Прва слика</dd></dl></div>',
+    # Embeds with scripts, styles and iframes
+    '<blockquote class="twitter-tweet"><p lang="mk" dir="ltr">Твит со <a href="#">линк</a></p>'
+    '&mdash; Корисник (@user) <a href="#">May 1, 2024</a></blockquote>'
+    '<script async src="https://platform.twitter.com/widgets.js" charset="utf-8"></script>\n'
+    '<style>.ad{display:none}</style><iframe src="https://www.youtube.com/embed/x"></iframe>'
+    '<p>Текст по вметнувањето.</p>',
+    # Lists and tables
+    '<ul><li>Прва точка</li><li>Втора&nbsp;точка<ul><li>Подточка</li></ul></li></ul>'
+    '<table><thead><tr><th>Град</th><th>Температура</th></tr></thead>'
+    '<tbody><tr><td>Скопје</td><td>32&deg;C</td></tr><tr><td>Битола</td><td>28&deg;C</td></tr></tbody></table>',
+    # Unclosed tags, stray end tags and leftover shortcodes
+    '<p>Прв пасус<p>Втор пасус</div> [caption id="attachment_1"]<img src="x.jpg"> Опис[/caption]'
+    '<p>Крај&hellip; <b>задебелено <i>и закосено</b> продолжува</i>',
+    # Numeric references, including Windows-1252 code points
+    '<p>&#147;Цитат&#148; &#x2014; &#1050;&#1088;&#1072;&#1112; &#x41;&#X42; &#0; &#150;</p>',
+    # Bare ampersands and entities without a semicolon
+    '<p>AT&T и M&amp;M&#39;s &copy2024 Q&A &amp;nbsp; &lt;tag&gt;</p>',
+    # Ruby annotations and templates
+    '<p><ruby>漢<rp>(</rp><rt>kan</rt><rp>)</rp></ruby> текст</p><template><p>скриено</p></template>',
+    # Whitespace-only and empty containers
+    '<div>\n\t  \n</div><p> </p><span></span>\n\n',
+    # Void elements closed explicitly
+    '<p>Ред<br>еден<br/>два</br>три<hr></hr>крај</p>',
+]
+
+# Markup only exact engines are required to handle like the reference engine
+MALFORMED_CORPUS = [
+    '<p>Непознат &unknown; ентитет и &#xZZ; референца</p>',
+    '<![CDATA[податоци]]><?php echo 1; ?><!DOCTYPE html><rt><![CDATA[во rt]]></rt>',
+    '<b><p>вкрстени</b> ознаки</p></span> <br></br></br> &#12a <p',
+]
+
+
+def load_corpus(path: Optional[str]) -> List[str]:
+    """Load post HTML from ``path``, or return the built-in corpus."""
+
+    if path is None:
+        return list(CORPUS)
+
+    corpus_path = Path(path)
+
+    if corpus_path.is_dir():
+        return [file.read_text(encoding="utf-8") for file in sorted(corpus_path.glob("*.html"))]
+
+    with corpus_path.open("r", encoding="utf-8") as f:
+        if corpus_path.suffix == ".jsonl":
+            posts = [json.loads(line) for line in f if line.strip()]
+        else:
+            posts = json.load(f)
+
+    return [post.get("content", {}).get("rendered", "") for post in posts]
+
+
+def check_equivalence(engine_name: str, corpus: List[str], reference: List[str]) -> int:
+    """Compare an engine's output with the reference output and return the number of differences."""
+
+    extractor = create_extractor(engine_name)
+    mismatches = 0
+
+    for index, (html, expected) in enumerate(zip(corpus, reference)):
+        actual = extractor.extract(html)
+
+        if actual != expected:
+            mismatches += 1
+            print(f"  {engine_name}: document {index} differs")
+            print(f"    expected: {expected[:200]!r}")
+            print(f"    actual:   {actual[:200]!r}")
+
+    return mismatches
+
+
+def measure(engine_name: str, corpus: List[str], repeat: int) -> float:
+    """Return the engine's throughput in posts per second."""
+
+    extractor = create_extractor(engine_name)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for html in corpus:
+            extractor.extract(html)
+    elapsed = time.perf_counter() - start
+
+    return len(corpus) * repeat / elapsed if elapsed else float("inf")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point for the benchmark."""
+
+    parser = argparse.ArgumentParser(description="Compare and benchmark HTML-to-text engines.")
+    parser.add_argument("--corpus", help="Directory of .html files, or a JSON / JSON Lines file of raw posts")
+    parser.add_argument("--repeat", type=int, default=200, help="Passes over the corpus when timing (default: 200)")
+    parser.add_argument("--engines", nargs="*", default=list(EXTRACTORS), help="Engines to run (default: all)")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus)
+    reference = [BeautifulSoupExtractor().extract(html) for html in corpus]
+
+    malformed = MALFORMED_CORPUS if args.corpus is None else []
+    malformed_reference = [BeautifulSoupExtractor().extract(html) for html in malformed]
+
+    print(f"Corpus: {len(corpus)} posts")
+
+    failed = False
+    for engine_name in args.engines:
+        try:
+            mismatches = check_equivalence(engine_name, corpus, reference)
+            malformed_mismatches = check_equivalence(engine_name, malformed, malformed_reference)
+            posts_per_second = measure(engine_name, corpus, args.repeat)
+        except ImportError as e:
+            print(f"{engine_name:>8}: skipped ({e})")
+            continue
+
+        exact = EXTRACTORS[engine_name].exact
+        failed = failed or mismatches > 0 or (exact and malformed_mismatches > 0)
+
+        status = "matches" if not mismatches else f"{mismatches} differences"
+        if malformed_mismatches:
+            status += f", {malformed_mismatches} malformed documents differ"
+        print(f"{engine_name:>8}: {posts_per_second:10.0f} posts/sec, {status}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
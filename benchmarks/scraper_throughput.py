@@ -0,0 +1,358 @@
+"""
+End-to-end throughput benchmark against a local WordPress stand-in.
+
+Usage:
+    python -m benchmarks.scraper_throughput [--scenarios NAME ...] [--scale F]
+                                            [--output PATH] [--baseline PATH]
+
+Each scenario serves emulated sites from ``benchmarks.wp_server`` and runs
+``run_scrapers`` against them, so ``Scraper``, ``Fetcher``, ``Parser`` and
+the store are all exercised. Every run happens in a fresh process with its
+own data directory, and reports pages/sec, posts/sec, p50/p99 request
+latency and peak RSS. Results are saved as JSON. ``--baseline`` compares
+them with an earlier results file, and ``--max-regression`` makes the exit
+status non-zero when a throughput drops by more than that percentage.
+
+All sites share one local host, so the per-host rate limit is raised to
+measure the scraper rather than the politeness settings.
+
+Requests are timed with an aiohttp trace config. Site worker processes
+(``site_processes`` above 1) cannot be given one, so for them requests,
+pages and latencies are read from the metrics the workers send back to the
+parent's ``REGISTRY``, with latency quantiles interpolated within the
+histogram buckets.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from .wp_server import SiteConfig, WordPressServer
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# Settings applied to every scenario before its own overrides
+BASE_SETTINGS: Dict[str, Any] = {
+    "requests_per_second": 1000,
+    "rate_limit_burst": 50,
+}
+
+# Throughput metrics, where higher is better, compared against a baseline
+THROUGHPUT_METRICS = ("pages_per_sec", "posts_per_sec")
+
+
+@dataclass
+class Scenario:
+    """Sites to serve and settings to run the scraper with."""
+
+    name: str
+    description: str
+    sites: Dict[str, SiteConfig]
+    settings: Dict[str, Any] = field(default_factory=dict)
+
+    # Posts published per site after an unmeasured first run; 0 measures the first run
+    publish: int = 0
+
+
+SCENARIOS = [
+    Scenario(
+        "first_run",
+        "Three sites scraped from scratch",
+        {f"site{i}": SiteConfig(posts=1500) for i in range(3)},
+    ),
+    Scenario(
+        "incremental",
+        "Three sites with 150 new posts each since the last run",
+        {f"site{i}": SiteConfig(posts=1500) for i in range(3)},
+        publish=150,
+    ),
+    Scenario(
+        "slow_host",
+        "One site with 150 ms responses",
+        {"slow": SiteConfig(posts=1000, latency=0.15, jitter=0.05)},
+    ),
+    Scenario(
+        "flaky",
+        "Two sites answering 5% of requests with a 500",
+        {f"flaky{i}": SiteConfig(posts=1000, error_rate=0.05) for i in range(2)},
+        settings={"retry_delay": 0.2},
+    ),
+    Scenario(
+        "many_sites",
+        "Six sites scraped from scratch in one process",
+        {f"site{i}": SiteConfig(posts=1000) for i in range(6)},
+    ),
+    Scenario(
+        "site_processes",
+        "The sites of many_sites split between two worker processes",
+        {f"site{i}": SiteConfig(posts=1000) for i in range(6)},
+        settings={"site_processes": 2},
+    ),
+    Scenario(
+        "storm",
+        "One site answering every request with a 429 for two seconds",
+        {"storm": SiteConfig(posts=2000, storm_start=0.3, storm_duration=2.0, retry_after=1)},
+    ),
+    Scenario(
+        "large_posts",
+        "One site with 40 KB post bodies",
+        {"large": SiteConfig(posts=300, payload_bytes=40000)},
+    ),
+]
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Return the value below which ``fraction`` of the sorted values fall (nearest rank)."""
+
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+
+    return ordered[index]
+
+
+def run_once(sites: List[List[str]], settings_overrides: Dict[str, Any], data_dir: str) -> Dict[str, Any]:
+    """Scrape the given sites in this process and return its measurements."""
+
+    os.chdir(data_dir)
+    logging.basicConfig(level=logging.ERROR)
+
+    from config import settings
+    from scraper import Scraper, run_scrapers
+
+    for name, value in {**BASE_SETTINGS, **settings_overrides}.items():
+        setattr(settings, name, value)
+    settings.site_registry = [tuple(site) for site in sites]
+
+    scrapers = [Scraper(site_url=url, site_name=name) for name, url in settings.site_registry]
+
+    if settings.site_processes > 1:
+        start = time.perf_counter()
+        results = asyncio.run(run_scrapers(scrapers))
+        elapsed = time.perf_counter() - start
+
+        statuses, pages, latency_p50, latency_p99 = _worker_requests()
+    else:
+        latencies: List[float] = []
+        statuses: Dict[int, int] = {}
+        pages = 0
+
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, context, params) -> None:
+            context.started = time.perf_counter()
+
+        async def on_request_end(session, context, params) -> None:
+            nonlocal pages
+
+            latencies.append(time.perf_counter() - context.started)
+            statuses[params.response.status] = statuses.get(params.response.status, 0) + 1
+
+            if params.response.status == 200 and params.url.path.endswith("/posts"):
+                pages += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_end)
+
+        start = time.perf_counter()
+        results = asyncio.run(run_scrapers(scrapers, trace_configs=[trace_config]))
+        elapsed = time.perf_counter() - start
+
+        latency_p50 = percentile(latencies, 0.50)
+        latency_p99 = percentile(latencies, 0.99)
+
+    posts = sum(result.records for result in results)
+
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss_unit = 1 if sys.platform == "darwin" else 1024
+
+    return {
+        "wall_seconds": round(elapsed, 3),
+        "sites_failed": sum(1 for result in results if not result.success),
+        "posts": posts,
+        "pages": pages,
+        "requests": sum(statuses.values()),
+        "status_429": statuses.get(429, 0),
+        "status_5xx": sum(count for status, count in statuses.items() if status >= 500),
+        "posts_per_sec": round(posts / elapsed, 1) if elapsed else 0.0,
+        "pages_per_sec": round(pages / elapsed, 2) if elapsed else 0.0,
+        "latency_p50_ms": round(latency_p50 * 1000, 1),
+        "latency_p99_ms": round(latency_p99 * 1000, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * rss_unit / 2 ** 20, 1),
+        "peak_rss_children_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * rss_unit / 2 ** 20, 1),
+    }
+
+
+def _worker_requests() -> Tuple[Dict[int, int], int, float, float]:
+    """
+    Return the response statuses, post pages and p50/p99 request latency
+    of every site, from the metrics merged into ``REGISTRY`` from the site
+    worker processes.
+    """
+
+    from utils import REGISTRY, Histogram
+
+    statuses: Dict[int, int] = {}
+    for value in REGISTRY.counter("scraper_http_responses_total", "", ("site", "status")).snapshot():
+        status = int(value["labels"]["status"])
+        statuses[status] = statuses.get(status, 0) + int(value["value"])
+
+    pages = sum(int(value["value"]) for value in REGISTRY.counter("scraper_pages_fetched_total", "", ("site",)).snapshot())
+
+    # Every site's buckets added into one unlabelled histogram
+    by_site = REGISTRY.histogram("scraper_http_request_duration_seconds", "", ("site",))
+    durations = Histogram(by_site.name, by_site.help, (), by_site.buckets)
+    for values in by_site.export().values():
+        durations.merge({(): values})
+
+    return statuses, pages, durations.quantile(0.50) or 0.0, durations.quantile(0.99) or 0.0
+
+
+def run_scenario(scenario: Scenario) -> Dict[str, Any]:
+    """Serve the scenario's sites and measure one scraper run against them."""
+
+    server = WordPressServer(scenario.sites)
+    base_url = server.start()
+    sites = [[name, f"{base_url}/{name}"] for name in scenario.sites]
+
+    try:
+        with tempfile.TemporaryDirectory(prefix=f"bench-{scenario.name}-") as data_dir:
+            if scenario.publish:
+                _in_fresh_process(sites, scenario.settings, data_dir)
+
+                for name in scenario.sites:
+                    server.publish(name, scenario.publish)
+
+            server.reset_stats()
+            result = _in_fresh_process(sites, scenario.settings, data_dir)
+    finally:
+        server.stop()
+
+    result["server_bytes_sent"] = sum(stats.bytes_sent for stats in server.stats.values())
+    return result
+
+
+def _in_fresh_process(sites: List[List[str]], settings_overrides: Dict[str, Any], data_dir: str) -> Dict[str, Any]:
+    """Run ``run_once`` in a new process, so peak RSS covers that run alone."""
+
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+        return executor.submit(run_once, sites, settings_overrides, data_dir).result()
+
+
+def scale_scenario(scenario: Scenario, scale: float) -> Scenario:
+    """Return the scenario with post counts multiplied by ``scale``."""
+
+    if scale == 1:
+        return scenario
+
+    sites = {name: replace(config, posts=max(1, int(config.posts * scale))) for name, config in scenario.sites.items()}
+    return replace(scenario, sites=sites, publish=int(scenario.publish * scale))
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]]) -> float:
+    """Print throughput changes against the baseline and return the worst drop, in percent."""
+
+    worst = 0.0
+
+    print("\nAgainst baseline:")
+    for name, metrics in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"  {name}: not in baseline")
+            continue
+
+        changes = []
+        for metric in THROUGHPUT_METRICS:
+            if before.get(metric):
+                change = 100 * (metrics[metric] - before[metric]) / before[metric]
+                worst = min(worst, change)
+                changes.append(f"{metric} {change:+.1f}%")
+
+        print(f"  {name}: {', '.join(changes)}")
+
+    return -worst
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point for the benchmark."""
+
+    names = [scenario.name for scenario in SCENARIOS]
+
+    parser = argparse.ArgumentParser(description="Benchmark the scraper end to end against a local WordPress stand-in.")
+    parser.add_argument("--scenarios", nargs="*", default=names, choices=names, help="Scenarios to run (default: all)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every scenario's post counts (default: 1)")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="Earlier results file to compare throughput with")
+    parser.add_argument("--max-regression", type=float, help="Fail when a throughput drops by more than this percentage")
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Dict[str, Any]] = {}
+
+    for scenario in SCENARIOS:
+        if scenario.name not in args.scenarios:
+            continue
+
+        scenario = scale_scenario(scenario, args.scale)
+        print(f"{scenario.name}: {scenario.description}")
+
+        metrics = run_scenario(scenario)
+        results[scenario.name] = {**metrics, "settings": scenario.settings, "sites": {name: asdict(config) for name, config in scenario.sites.items()}}
+
+        print(
+            f"  {metrics['posts']} posts, {metrics['pages']} pages in {metrics['wall_seconds']:.2f}s: "
+            f"{metrics['posts_per_sec']:.0f} posts/sec, {metrics['pages_per_sec']:.1f} pages/sec, "
+            f"p50 {metrics['latency_p50_ms']:.0f} ms, p99 {metrics['latency_p99_ms']:.0f} ms, "
+            f"peak RSS {metrics['peak_rss_mb']:.0f} MB "
+            f"({metrics['requests']} requests, {metrics['status_429']} x 429, {metrics['status_5xx']} x 5xx)"
+        )
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    with output.open("w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "scale": args.scale,
+                "scenarios": results,
+            },
+            f,
+            indent=2,
+        )
+
+    print(f"\nResults saved to {output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["scenarios"]
+
+        worst_drop = compare(results, baseline)
+
+        if args.max_regression is not None and worst_drop > args.max_regression:
+            print(f"Throughput dropped by {worst_drop:.1f}%, more than the allowed {args.max_regression:.1f}%")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
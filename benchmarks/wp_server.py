@@ -0,0 +1,272 @@
+"""
+Local stand-in for the WordPress REST API, for offline benchmarks.
+
+Every site served is a path prefix: ``{base_url}/{site}/wp-json/wp/v2/posts``,
+``/categories`` and ``/tags``. Responses carry the headers the scraper reads
+(``X-WP-Total``, ``X-WP-TotalPages``, ``Retry-After``) and honour ``per_page``,
+``page``, ``_fields``, ``include``, ``modified_after``, ``orderby`` and
+``order``. Latency, payload size, error rate and 429 storms are configurable,
+and ``publish`` adds posts between runs to measure incremental runs.
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+from .html_extractors import CORPUS
+
+_EPOCH = datetime(2024, 1, 1)
+
+
+@dataclass
+class SiteConfig:
+    """Content and behaviour of one emulated site."""
+
+    posts: int = 1000
+    categories: int = 40
+    tags: int = 200
+    payload_bytes: int = 4000
+    latency: float = 0.02
+    jitter: float = 0.01
+    error_rate: float = 0.0
+
+    # Requests arriving in [storm_start, storm_start + storm_duration) seconds get a 429
+    storm_start: Optional[float] = None
+    storm_duration: float = 0.0
+    retry_after: int = 1
+
+
+@dataclass
+class SiteStats:
+    """What the server saw for one site."""
+
+    requests: int = 0
+    pages: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    bytes_sent: int = 0
+
+
+@dataclass
+class _Site:
+    config: SiteConfig
+    posts: List[Dict[str, Any]] = field(default_factory=list)
+    stats: SiteStats = field(default_factory=SiteStats)
+
+
+class WordPressServer:
+    """
+    aiohttp application serving emulated WordPress sites.
+
+    ``start()`` runs it on a free local port in a background thread, so the
+    client under test owns the main thread and its event loop.
+    """
+
+    def __init__(self, sites: Dict[str, SiteConfig], seed: int = 0):
+        self._random = random.Random(seed)
+        self._sites = {name: _Site(config) for name, config in sites.items()}
+
+        for site in self._sites.values():
+            self._publish(site, site.config.posts)
+
+        self._started_at = time.monotonic()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self.base_url: Optional[str] = None
+
+    @property
+    def stats(self) -> Dict[str, SiteStats]:
+        return {name: site.stats for name, site in self._sites.items()}
+
+    def start(self) -> str:
+        """Start serving in a background thread and return the base URL."""
+
+        self._thread = threading.Thread(target=self._serve, name="wp-server", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+        return self.base_url
+
+    def stop(self) -> None:
+        """Stop serving and wait for the background thread to exit."""
+
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join()
+
+    def publish(self, site_name: str, count: int) -> None:
+        """Publish ``count`` new posts on a site. Only call this between runs."""
+
+        self._publish(self._sites[site_name], count)
+
+    def reset_stats(self) -> None:
+        """Zero the request counters and restart the 429 storm clock."""
+
+        for site in self._sites.values():
+            site.stats = SiteStats()
+
+        self._started_at = time.monotonic()
+
+    def _serve(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+
+        app = web.Application()
+        app.router.add_get("/{site}/wp-json/wp/v2/posts", self._handle_posts)
+        app.router.add_get("/{site}/wp-json/wp/v2/categories", self._handle_terms)
+        app.router.add_get("/{site}/wp-json/wp/v2/tags", self._handle_terms)
+
+        runner = web.AppRunner(app, access_log=None)
+        self._loop.run_until_complete(runner.setup())
+
+        self._loop.run_until_complete(web.TCPSite(runner, "127.0.0.1", 0).start())
+
+        host, port = runner.addresses[0][:2]
+        self.base_url = f"http://{host}:{port}"
+        self._ready.set()
+
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.run_until_complete(runner.cleanup())
+            self._loop.close()
+
+    async def _handle_posts(self, request: web.Request) -> web.Response:
+        site = self._site(request)
+
+        rejection = await self._simulate(site)
+        if rejection is not None:
+            return rejection
+
+        posts = site.posts
+
+        if request.query.get("orderby") == "modified":
+            posts = sorted(posts, key=lambda post: post["modified"], reverse=request.query.get("order") != "asc")
+
+        if "modified_after" in request.query:
+            posts = [post for post in posts if post["modified"] > request.query["modified_after"]]
+
+        response = self._paginate(site, posts, request)
+        if response.status == 200:
+            site.stats.pages += 1
+
+        return response
+
+    async def _handle_terms(self, request: web.Request) -> web.Response:
+        site = self._site(request)
+
+        rejection = await self._simulate(site)
+        if rejection is not None:
+            return rejection
+
+        if request.path.endswith("/tags"):
+            terms = [{"id": 1000 + i, "name": f"Таг {i}", "slug": f"tag-{i}", "count": 1} for i in range(site.config.tags)]
+        else:
+            terms = [{"id": i + 1, "name": f"Категорија {i + 1}", "slug": f"category-{i + 1}", "count": 1} for i in range(site.config.categories)]
+
+        return self._paginate(site, terms, request)
+
+    def _site(self, request: web.Request) -> _Site:
+        site = self._sites.get(request.match_info["site"])
+        if site is None:
+            raise web.HTTPNotFound()
+
+        site.stats.requests += 1
+        return site
+
+    async def _simulate(self, site: _Site) -> Optional[web.Response]:
+        """Apply the configured latency, and return an error response when one is due."""
+
+        config = site.config
+        await asyncio.sleep(max(0.0, self._random.gauss(config.latency, config.jitter)))
+
+        if config.storm_start is not None:
+            elapsed = time.monotonic() - self._started_at
+            if config.storm_start <= elapsed < config.storm_start + config.storm_duration:
+                site.stats.rate_limited += 1
+                return web.json_response(
+                    {"code": "rest_too_many_requests", "message": "Too many requests."},
+                    status=429,
+                    headers={"Retry-After": str(config.retry_after)},
+                )
+
+        if config.error_rate and self._random.random() < config.error_rate:
+            site.stats.errors += 1
+            return web.json_response({"code": "internal_server_error"}, status=500)
+
+        return None
+
+    def _paginate(self, site: _Site, items: List[Dict[str, Any]], request: web.Request) -> web.Response:
+        query = request.query
+        per_page = min(int(query.get("per_page", 10)), 100)
+        page = int(query.get("page", 1))
+
+        if "include" in query:
+            ids = {int(item_id) for item_id in query["include"].split(",") if item_id}
+            items = [item for item in items if item["id"] in ids]
+
+        total_pages = max(1, -(-len(items) // per_page))
+        if page > total_pages:
+            return web.json_response(
+                {"code": "rest_post_invalid_page_number", "message": "The page number requested is larger than the number of pages available."},
+                status=400,
+            )
+
+        chunk = items[(page - 1) * per_page:page * per_page]
+
+        if "_fields" in query:
+            fields = set(query["_fields"].split(","))
+            chunk = [{key: value for key, value in item.items() if key in fields} for item in chunk]
+
+        body = json.dumps(chunk, ensure_ascii=False).encode("utf-8")
+        site.stats.bytes_sent += len(body)
+
+        return web.Response(
+            body=body,
+            content_type="application/json",
+            headers={"X-WP-Total": str(len(items)), "X-WP-TotalPages": str(total_pages)},
+        )
+
+    def _publish(self, site: _Site, count: int) -> None:
+        """Add ``count`` posts, newer than every existing one, to the front of the listing."""
+
+        config = site.config
+        next_id = site.posts[0]["id"] + 1 if site.posts else 1
+
+        new_posts = [self._post(config, post_id) for post_id in range(next_id, next_id + count)]
+        site.posts[:0] = reversed(new_posts)
+
+    def _post(self, config: SiteConfig, post_id: int) -> Dict[str, Any]:
+        published = (_EPOCH + timedelta(minutes=post_id)).isoformat()
+
+        content = ""
+        while len(content) < config.payload_bytes:
+            content += CORPUS[self._random.randrange(len(CORPUS))]
+
+        return {
+            "id": post_id,
+            "date": published,
+            "date_gmt": published,
+            "modified": published,
+            "modified_gmt": published,
+            "slug": f"post-{post_id}",
+            "status": "publish",
+            "type": "post",
+            "link": f"https://example.mk/{post_id}/",
+            "title": {"rendered": f"Наслов на статијата {post_id} &#8211; вести"},
+            "content": {"rendered": content, "protected": False},
+            "excerpt": {"rendered": content[:300], "protected": False},
+            "author": 1 + post_id % 5,
+            "categories": [1 + post_id % max(1, config.categories)],
+            "tags": [1000 + post_id % max(1, config.tags), 1000 + (post_id * 7) % max(1, config.tags)],
+            "_links": {"self": [{"href": f"https://example.mk/wp-json/wp/v2/posts/{post_id}"}]},
+        }
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 
 
@@ -39,19 +39,120 @@ class ScraperSettings(BaseSettings):
     posts_per_page: int = 100
     posts_url: str = "{site_url}/wp-json/wp/v2/posts"
     categories_url: str = "{site_url}/wp-json/wp/v2/categories"
+    tags_url: str = "{site_url}/wp-json/wp/v2/tags"
 
     # Scraping settings
     max_concurrent_requests: int = 10
     request_timeout: int = 20
 
-    # Rate limiting
+    # Multi-site scheduling
+    max_concurrent_sites: int = 8
+    max_inflight_requests: int = 40
+    max_requests_per_host: int = 10
+    site_timeout: Optional[float] = None
+
+    # Worker processes with an event loop each, taking sites from a shared queue (0 or 1 runs
+    # every site in this process); the limits above, except the global rate, apply per worker
+    site_processes: int = 0
+
+    # Adaptive per-host concurrency (AIMD): starts from adaptive_initial_concurrency and moves between
+    # adaptive_min_concurrency and max_requests_per_host; learned limits are saved between runs
+    adaptive_concurrency: bool = True
+    adaptive_initial_concurrency: int = 4
+    adaptive_min_concurrency: int = 1
+    adaptive_decrease_factor: float = 0.5
+    adaptive_latency_tolerance: float = 2.0
+
+    # Only request the post fields the parser reads; the probe measures the saving once per site
+    field_projection: bool = True
+    field_projection_probe: bool = False
+
+    # Incremental runs query posts modified since the last checkpoint
+    high_water_mark_sync: bool = True
+
+    # First runs save records as pages finish and record saved pages, so they can resume; only with
+    # appending backends (jsonl, sqlite), as the JSON backend rewrites its whole file on every save
+    resumable_first_run: bool = True
+
+    # Pages a sequential walk keeps in flight ahead of the one being checked; adapts up to the max
+    prefetch_window: int = 4
+    prefetch_max_window: int = 16
+
+    # Seconds after which cached category and tag names are fetched again in full (0 never refetches)
+    taxonomy_max_age: float = 7 * 24 * 3600
+
+    # Content hashes of parsed posts, so refetched posts are only parsed and rewritten when they changed
+    content_hashes: bool = True
+
+    # Streaming pipeline (pages in flight are bounded by the queue size); used for page walks, so not for
+    # changed-since runs, and it replaces resumable_first_run on new first runs, but not to finish an interrupted one
+    streaming_pipeline: bool = False
+    pipeline_queue_size: int = 20
+    store_batch_size: int = 1000
+
+    # HTML-to-text engine: "bs4", "stdlib" (same output, no tree) or "lxml" (optional dependency)
+    html_extractor: str = "bs4"
+
+    # JSON decoding: "auto" (orjson when installed), "orjson" or "stdlib"; compact_posts keeps
+    # only the post fields the scraper reads, in slotted objects, until they are parsed
+    json_decoder: str = "auto"
+    compact_posts: bool = True
+
+    # Records not in one of `languages` are dropped (not marked as seen): mostly Cyrillic texts are
+    # kept and mostly Latin ones dropped by letter ratio, only those in between go to langdetect
+    language_filter: bool = False
+    languages: List[str] = ["mk"]
+    cyrillic_keep_ratio: float = 0.7
+    cyrillic_drop_ratio: float = 0.3
+
+    # Near-duplicates of records stored from any site (SimHash within near_duplicate_distance bits):
+    # "flag" labels them, "skip" drops them and marks them as seen, "off" disables the check
+    near_duplicates: str = "off"
+    near_duplicate_distance: int = 3
+
+    # Parsing in worker processes (0 parses in the event loop)
+    parse_workers: int = 0
+    parse_chunk_size: int = 50
+
+    # Connection pooling
+    connection_limit: int = 100
+    connection_limit_per_host: int = 10
+    keepalive_timeout: float = 30.0
+    dns_cache_ttl: int = 300
+    prewarm_connections: bool = False
+
+    # On-disk HTTP cache with conditional requests. Endpoints are cached when they have a TTL
+    # above 0, or are listed in http_cache_revalidate to always be revalidated
+    http_cache: bool = False
+    http_cache_path: str = "data/http_cache.db"
+    http_cache_max_bytes: int = 256 * 1024 * 1024
+    http_cache_ttls: Dict[str, float] = {"categories": 3600, "tags": 3600}
+    http_cache_revalidate: List[str] = []
+
+    # Rate limiting: a token bucket per host allowing bursts, plus an optional global one (0 disables it)
     requests_per_second: float = 5
+    rate_limit_burst: int = 5
+    global_requests_per_second: float = 0
 
     # Retry settings
     max_retries: int = 3
     retry_delay: float = 1.0
     retry_backoff: float = 2.0
 
+    # Metrics: Prometheus text on http://metrics_host:metrics_port/metrics during a run (0 disables it),
+    # and a JSON report of the run's results and metrics (None disables it)
+    metrics_port: int = 0
+    metrics_host: str = "127.0.0.1"
+    run_report_path: Optional[str] = "data/run_report.json"
+
+    # Stage profiling: wall and CPU time per stage of each site, written to profile_dir. cProfile adds
+    # .prof files and top functions, tracemalloc top allocations; both slow the run down considerably
+    profile_stages: bool = False
+    profile_dir: str = "data/profiles"
+    profile_cprofile: bool = False
+    profile_tracemalloc: bool = False
+    profile_top_n: int = 20
+
     # HTTP headers
     headers: dict = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
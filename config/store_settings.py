@@ -8,13 +8,43 @@ class JSONStoreConfig(BaseModel):
     data_dir: str = "data"
     articles_filename_template: str = "{site_name}_dataset.json"
     seen_ids_filename_template: str = "{site_name}_seen_ids.json"
+    use_seen_ids_index: bool = True
+    seen_ids_index_filename_template: str = "{site_name}_seen_ids.idx"
+
+
+class JSONLStoreConfig(BaseModel):
+    """Configuration for append-only JSON Lines storage backend."""
+
+    data_dir: str = "data"
+    articles_filename_template: str = "{site_name}_dataset.jsonl"
+    seen_ids_filename_template: str = "{site_name}_seen_ids.txt"
+    use_seen_ids_index: bool = True
+    seen_ids_index_filename_template: str = "{site_name}_seen_ids_jsonl.idx"
+    flush_every: int = 500
+    fsync: bool = True
+
+
+class SQLiteStoreConfig(BaseModel):
+    """Configuration for SQLite storage backend (one database for all sites)."""
+
+    database_path: str = "data/scraper.db"
+    busy_timeout: float = 30.0
+    synchronous: str = "NORMAL"
 
 
 class StoreSettings(BaseSettings):
     """Storage backend configuration."""
 
     backend: str = "json"
+    checkpoint_dir: str = "data"
+    checkpoint_filename_template: str = "{site_name}_checkpoint.json"
+    host_limits_filename: str = "host_limits.json"
+    taxonomy_filename_template: str = "{site_name}_taxonomy.json"
+    content_hashes_filename_template: str = "{site_name}_content_hashes.db"
+    near_duplicate_index_filename: str = "near_duplicates.idx"
     json_store: JSONStoreConfig = JSONStoreConfig()
+    jsonl_store: JSONLStoreConfig = JSONLStoreConfig()
+    sqlite_store: SQLiteStoreConfig = SQLiteStoreConfig()
 
     model_config = {
         "env_file": ".env"
@@ -1,53 +1,75 @@
+import argparse
 import asyncio
 import logging
+from datetime import datetime
+from typing import Optional
 
 from config import setup_logging, settings
-from scraper import Scraper
+from scraper import Scraper, plan_scrapers, run_scrapers, write_run_report
+from utils import start_metrics_server
 
 logger = logging.getLogger(__name__)
 
 
-async def main():
+async def main(plan: bool = False, profile: bool = False, processes: Optional[int] = None):
     """Entry point for the scraper application."""
     setup_logging()
 
-    scrapers = [Scraper(site_url=url, site_name=name) for name, url in settings.site_registry]
+    if profile:
+        settings.profile_stages = True
+        settings.profile_cprofile = True
 
-    logger.info("=" * 80)
-    logger.info("SCRAPING STARTED")
-    logger.info("=" * 80)
+    if processes is not None:
+        settings.site_processes = processes
 
-    logger.info("Total sites to scrape: %d", len(scrapers))
+    scrapers = [Scraper(site_url=url, site_name=name) for name, url in settings.site_registry]
 
-    successful = 0
-    failed = []
+    if plan:
+        await plan_scrapers(scrapers)
+        return
 
-    for idx, scraper in enumerate(scrapers, start=1):
-        logger.info(" ")
-        logger.info("Processing site %d/%d: %s", idx, len(scrapers), scraper.site_name)
+    metrics_server = None
+    if settings.metrics_port:
+        metrics_server = await start_metrics_server(settings.metrics_host, settings.metrics_port)
+        logger.info("Serving metrics on http://%s:%d/metrics", settings.metrics_host, settings.metrics_port)
 
-        try:
-            await scraper.run()
-            successful += 1
-        except KeyboardInterrupt:
-            logger.warning("Scraping interrupted by user at site: %s", scraper.site_name)
-            raise
-        except Exception as e:
-            logger.error("Failed to scrape %s: %s", scraper.site_name, e, exc_info=True)
-            failed.append(scraper.site_name)
+    started_at = datetime.now()
 
-    logger.info("=" * 80)
-    logger.info("SCRAPING COMPLETED")
-    logger.info("=" * 80)
+    try:
+        results = await run_scrapers(scrapers)
+    finally:
+        if metrics_server is not None:
+            await metrics_server.cleanup()
 
-    logger.info("Successfully scraped: %d/%d sites", successful, len(scrapers))
+    if settings.run_report_path:
+        write_run_report(results, settings.run_report_path, started_at)
 
-    if failed:
-        logger.warning("Failed sites (%d): %s", len(failed), ", ".join(failed))
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Scrape articles from WordPress sites.")
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="list the requests each site is expected to need, without fetching any posts",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="time each stage of every site and write cProfile reports to the profile directory",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        metavar="N",
+        help="scrape sites in N worker processes with an event loop each",
+    )
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
+    args = parse_args()
+
     try:
-        asyncio.run(main())
+        asyncio.run(main(plan=args.plan, profile=args.profile, processes=args.processes))
     except KeyboardInterrupt:
         print("Scraping interrupted by user")
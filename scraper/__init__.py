@@ -1,11 +1,14 @@
 """
-Scraper package: fetcher, parser, scraper, runner, and models.
+Scraper package: fetcher, parser, scraper, scheduler, runner, and models.
 """
 
+from .connection_pool import ConnectionPool
 from .fetcher import Fetcher
-from .models import Article
+from .context import ScrapeContext
+from .models import Article, SiteResult
 from .parser import Parser
-from .runner import run_scrapers
+from .runner import plan_scrapers, run_scrapers, write_run_report
+from .scheduler import SiteScheduler
 from .scraper import Scraper
 from .scraper import HttpClient
 
@@ -13,7 +16,13 @@ __all__ = [
     "Fetcher",
     "Parser",
     "Article",
+    "SiteResult",
+    "ScrapeContext",
+    "ConnectionPool",
+    "SiteScheduler",
     "Scraper",
     "run_scrapers",
+    "plan_scrapers",
+    "write_run_report",
     "HttpClient",
 ]
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+from typing import Iterable, List, Optional
+
+import aiohttp
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    """
+    Long-lived aiohttp session and connector shared by every site in a run,
+    so TCP/TLS handshakes and DNS lookups are paid once per host rather than
+    once per site run.
+
+    Extra ``trace_configs`` are attached to the session alongside the one
+    counting connections, e.g. to time requests in benchmarks.
+    """
+
+    def __init__(
+            self,
+            limit: Optional[int] = None,
+            limit_per_host: Optional[int] = None,
+            keepalive_timeout: Optional[float] = None,
+            dns_cache_ttl: Optional[int] = None,
+            trace_configs: Optional[List[aiohttp.TraceConfig]] = None,
+    ):
+        self.limit = limit or settings.connection_limit
+        self.limit_per_host = limit_per_host or settings.connection_limit_per_host
+        self.keepalive_timeout = keepalive_timeout or settings.keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl or settings.dns_cache_ttl
+        self.trace_configs = list(trace_configs or [])
+
+        self.session: Optional[aiohttp.ClientSession] = None
+
+        self.connections_opened = 0
+        self.connections_reused = 0
+
+    async def __aenter__(self) -> "ConnectionPool":
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def open(self) -> aiohttp.ClientSession:
+        """Create the shared connector and session."""
+
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.dns_cache_ttl,
+            use_dns_cache=True,
+        )
+
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            trace_configs=[self._build_trace_config(), *self.trace_configs],
+        )
+
+        return self.session
+
+    async def close(self) -> None:
+        """Close the shared session and log connection usage."""
+
+        if self.session is None:
+            return
+
+        await self.session.close()
+        self.session = None
+
+        logger.info("Connections: %d opened, %d reused.", self.connections_opened, self.connections_reused)
+
+    async def warm_up(self, urls: Iterable[str]) -> None:
+        """Open one connection to each URL's host ahead of the first real request."""
+
+        async def warm(url: str) -> None:
+            try:
+                async with self.session.head(
+                        url,
+                        headers=settings.headers,
+                        allow_redirects=False,
+                        timeout=aiohttp.ClientTimeout(total=settings.request_timeout),
+                ):
+                    pass
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.debug("Could not pre-warm connection to %s: %s", url, e)
+
+        urls = list(urls)
+        await asyncio.gather(*(warm(url) for url in urls))
+        logger.info("Pre-warmed connections to %d hosts.", len(urls))
+
+    def _build_trace_config(self) -> aiohttp.TraceConfig:
+        """Build a trace config counting new and reused connections."""
+
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_connection_create_end(session, context, params) -> None:
+            self.connections_opened += 1
+
+        async def on_connection_reuseconn(session, context, params) -> None:
+            self.connections_reused += 1
+
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+
+        return trace_config
@@ -0,0 +1,97 @@
+import hashlib
+import logging
+from typing import Any, Dict, List, Tuple
+
+from store import ContentHashStore
+from utils import REGISTRY
+from .decode import RawPost
+
+logger = logging.getLogger(__name__)
+
+_UNCHANGED_POSTS = REGISTRY.counter("scraper_unchanged_posts_total", "Refetched posts skipped because their content had not changed.", ("site",))
+_UNCHANGED_BYTES = REGISTRY.counter("scraper_unchanged_html_bytes_total", "Post HTML not parsed again because it had not changed.", ("site",))
+
+
+def content_hash(post: Any) -> str:
+    """Return a hash of everything a post's record is built from: link, title, content and terms."""
+
+    post = RawPost.of(post)
+
+    digest = hashlib.blake2b(digest_size=8)
+    for part in (post.link or "", post.title, post.content, repr(post.categories), repr(post.tags)):
+        digest.update(part.encode())
+        digest.update(b"\0")
+
+    return digest.hexdigest()
+
+
+class ContentHashes:
+    """
+    The content hash and ``modified`` value of the version of each of a
+    site's posts last parsed, kept in a ``ContentHashStore`` between runs.
+
+    Posts fetched again, such as those returned by a changed-since query,
+    are only parsed and rewritten when their content hash differs. A post
+    whose ``modified`` value is unchanged is not even hashed. Hashes are
+    looked up only for refetched posts, and only new or changed ones are
+    written by ``save``.
+    """
+
+    def __init__(self, site_name: str, store: ContentHashStore):
+        self.site_name = site_name
+        self.store = store
+
+        # Post ID -> (hash, modified) to write on save
+        self._pending: Dict[str, Tuple[str, str]] = {}
+
+    def record(self, posts: List[Any]) -> None:
+        """Remember the content of posts about to be parsed."""
+
+        for post in posts:
+            post_id = post.get("id")
+            if post_id is not None:
+                self._pending[str(post_id)] = (content_hash(post), post.get("modified") or "")
+
+    def changed(self, posts: List[Any]) -> List[Any]:
+        """Return the posts whose content differs from the version last parsed, and remember them."""
+
+        post_ids = [str(post.get("id")) for post in posts]
+        stored = self.store.get([post_id for post_id in post_ids if post_id not in self._pending])
+
+        changed = []
+        unchanged_bytes = 0
+
+        for post_id, post in zip(post_ids, posts):
+            known = self._pending.get(post_id) or stored.get(post_id)
+            modified = post.get("modified") or ""
+
+            if known is not None and known[1] == modified:
+                unchanged_bytes += len(post.get("content", {}).get("rendered", ""))
+                continue
+
+            digest = content_hash(post)
+
+            # Either only fields the record does not hold were edited, or the content changed
+            self._pending[post_id] = (digest, modified)
+
+            if known is not None and known[0] == digest:
+                unchanged_bytes += len(post.get("content", {}).get("rendered", ""))
+                continue
+
+            changed.append(post)
+
+        unchanged = len(posts) - len(changed)
+
+        if unchanged:
+            _UNCHANGED_POSTS.inc(unchanged, site=self.site_name)
+            _UNCHANGED_BYTES.inc(unchanged_bytes, site=self.site_name)
+            logger.info("Skipped %d unchanged posts (%d KB of HTML not parsed or rewritten)", unchanged, unchanged_bytes // 1024)
+
+        return changed
+
+    def save(self) -> None:
+        """Write the hashes added or changed since the last save."""
+
+        if self._pending:
+            self.store.put((post_id, digest, modified) for post_id, (digest, modified) in self._pending.items())
+            self._pending = {}
@@ -0,0 +1,24 @@
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Optional
+
+import aiohttp
+
+from utils import AdaptiveConcurrency, RateLimits, RequestBudget
+from .http_cache import HttpCache
+from .language import LanguageFilter
+from .near_duplicates import NearDuplicates
+
+
+@dataclass
+class ScrapeContext:
+    """Resources shared by every site scraped within a single run."""
+
+    session: Optional[aiohttp.ClientSession] = None
+    budget: Optional[RequestBudget] = None
+    parse_pool: Optional[Executor] = None
+    concurrency: Optional[AdaptiveConcurrency] = None
+    rate_limits: Optional[RateLimits] = None
+    http_cache: Optional[HttpCache] = None
+    language_filter: Optional[LanguageFilter] = None
+    near_duplicates: Optional[NearDuplicates] = None
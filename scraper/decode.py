@@ -0,0 +1,103 @@
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+JSON_DECODERS = ("auto", "orjson", "stdlib")
+
+
+def create_json_loads(name: str) -> Callable[[Any], Any]:
+    """
+    Return the JSON decoder called ``name``: "orjson" (optional dependency),
+    "stdlib", or "auto" for orjson when it is installed and stdlib otherwise.
+    Both accept ``str`` and ``bytes`` and produce the same objects.
+    """
+
+    if name not in JSON_DECODERS:
+        raise ValueError(f"Unknown JSON decoder {name!r}; choose one of {', '.join(JSON_DECODERS)}")
+
+    if name == "stdlib":
+        return json.loads
+
+    try:
+        import orjson
+    except ImportError as e:
+        if name == "auto":
+            return json.loads
+        raise ImportError("The orjson JSON decoder requires orjson: pip install orjson") from e
+
+    return orjson.loads
+
+
+class RawPost:
+    """
+    The fields of a WordPress post that the scraper reads, in a slotted
+    object instead of the decoded post dict, so pages waiting to be parsed
+    do not keep excerpts, links and other unused fields alive.
+
+    ``title`` and ``content`` hold the rendered strings. ``get`` reads
+    fields the way a post dict would, for code that handles both.
+    """
+
+    __slots__ = ("id", "link", "title", "content", "categories", "tags", "date", "modified")
+
+    def __init__(
+            self,
+            id: Optional[int],
+            link: Optional[str],
+            title: str,
+            content: str,
+            categories: List[int],
+            tags: List[int],
+            date: Optional[str] = None,
+            modified: Optional[str] = None,
+    ):
+        self.id = id
+        self.link = link
+        self.title = title
+        self.content = content
+        self.categories = categories
+        self.tags = tags
+        self.date = date
+        self.modified = modified
+
+    @classmethod
+    def from_dict(cls, post: Dict[str, Any]) -> "RawPost":
+        return cls(
+            post.get("id"),
+            post.get("link"),
+            _rendered(post.get("title")),
+            _rendered(post.get("content")),
+            post.get("categories") or [],
+            post.get("tags") or [],
+            post.get("date"),
+            post.get("modified"),
+        )
+
+    @classmethod
+    def of(cls, post: Any) -> "RawPost":
+        """Return ``post`` itself if it is a ``RawPost``, else one built from the post dict."""
+
+        return post if isinstance(post, cls) else cls.from_dict(post)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in ("title", "content"):
+            return {"rendered": getattr(self, key)}
+
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if value is None else value
+
+    def __reduce__(self):
+        # Positional state keeps the pickles sent to parse workers small
+        return RawPost, tuple(getattr(self, field) for field in self.__slots__)
+
+
+def compact_posts(posts: List[Dict[str, Any]]) -> List[RawPost]:
+    """Replace decoded post dicts with ``RawPost`` objects."""
+
+    return [RawPost.from_dict(post) for post in posts]
+
+
+def _rendered(value: Any) -> str:
+    if isinstance(value, dict):
+        return value.get("rendered", "")
+
+    return value or ""
@@ -0,0 +1,255 @@
+import re
+from abc import ABC, abstractmethod
+from collections import Counter
+from html import unescape
+from html.entities import html5
+from html.parser import HTMLParser
+from typing import Dict, List, Type
+
+from bs4 import BeautifulSoup
+
+# Tags whose strings BeautifulSoup's html.parser builder keeps out of ``get_text``
+SKIPPED_TEXT_TAGS = frozenset({"rt", "rp", "style", "script", "template"})
+
+# Void elements, closed as soon as they are opened
+VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link", "menuitem", "meta",
+    "param", "source", "track", "wbr", "basefont", "bgsound", "command", "frame", "image", "isindex",
+    "nextid", "spacer",
+})
+
+
+class HtmlExtractor(ABC):
+    """
+    Converts post HTML into plain text. Every engine produces the same output
+    as ``BeautifulSoupExtractor``: the text of each string joined by single
+    spaces, with whitespace normalized and entities unescaped.
+
+    Engines that are not ``exact`` match it on well-formed markup only.
+    """
+
+    name: str
+    exact: bool = True
+
+    def extract(self, raw_html: str) -> str:
+        """Convert HTML content into plain text by removing tags and normalizing whitespace."""
+
+        if not raw_html:
+            return ""
+
+        text = self._extract_text(raw_html)
+
+        normalized_text = " ".join(text.split())
+        return unescape(normalized_text)
+
+    @abstractmethod
+    def _extract_text(self, raw_html: str) -> str:
+        """Return the document's strings separated by whitespace, before normalization."""
+
+
+class BeautifulSoupExtractor(HtmlExtractor):
+    """Reference engine: builds a BeautifulSoup tree and reads its text."""
+
+    name = "bs4"
+
+    def _extract_text(self, raw_html: str) -> str:
+        soup = BeautifulSoup(raw_html, "html.parser")
+        return soup.get_text(separator=" ", strip=True)
+
+
+class StdlibExtractor(HtmlExtractor):
+    """
+    Streams tokens from the standard library's ``HTMLParser`` without building
+    a tree. It is the tokenizer BeautifulSoup uses, and the tag stack and
+    entity handling follow BeautifulSoup's html.parser builder, so the output
+    matches the reference engine.
+    """
+
+    name = "stdlib"
+
+    def _extract_text(self, raw_html: str) -> str:
+        tokenizer = _TextTokenizer()
+        tokenizer.feed(raw_html)
+        tokenizer.close()
+
+        return "".join(tokenizer.pieces)
+
+
+class LxmlExtractor(HtmlExtractor):
+    """
+    Parses with lxml's libxml2 HTML parser and walks the tree's text and tails.
+    libxml2 repairs malformed markup differently from html.parser and drops
+    CDATA sections, and it keeps unknown entities such as ``&foo;`` intact, so
+    the output matches only on well-formed posts. Check a site's posts with
+    ``benchmarks/html_extractors.py`` before switching to it.
+    """
+
+    name = "lxml"
+    exact = False
+
+    def __init__(self):
+        try:
+            from lxml import etree
+        except ImportError as e:
+            raise ImportError("The lxml HTML extractor requires lxml: pip install lxml") from e
+
+        self._etree = etree
+        self._parser = etree.HTMLParser()
+
+    def _extract_text(self, raw_html: str) -> str:
+        root = self._etree.fromstring(raw_html, self._parser)
+        if root is None:
+            return ""
+
+        pieces: List[str] = []
+        self._collect(root, pieces)
+
+        return " ".join(pieces)
+
+    def _collect(self, element, pieces: List[str]) -> None:
+        # Comments and processing instructions have a non-string tag; only their tail is text
+        if isinstance(element.tag, str) and element.tag not in SKIPPED_TEXT_TAGS:
+            if element.text:
+                pieces.append(element.text)
+
+            for child in element:
+                self._collect(child, pieces)
+
+        if element.tail:
+            pieces.append(element.tail)
+
+
+EXTRACTORS: Dict[str, Type[HtmlExtractor]] = {
+    extractor.name: extractor
+    for extractor in (BeautifulSoupExtractor, StdlibExtractor, LxmlExtractor)
+}
+
+
+def create_extractor(name: str) -> HtmlExtractor:
+    """Create the HTML-to-text engine registered under ``name``."""
+
+    extractor = EXTRACTORS.get(name.lower())
+    if extractor is None:
+        raise ValueError(f"Unsupported HTML extractor: {name}")
+
+    return extractor()
+
+
+# Named entities as BeautifulSoup resolves them: the name without its semicolon
+_ENTITIES: Dict[str, str] = {}
+for _name, _character in sorted(html5.items()):
+    _ENTITIES.setdefault(_name.rstrip(";"), _character)
+
+_DECIMAL_REFERENCE = re.compile("^([0-9]+)(.*)")
+_HEX_REFERENCE = re.compile("^([0-9a-f]+)(.*)")
+
+
+class _TextTokenizer(HTMLParser):
+    """
+    Collects text that BeautifulSoup's ``get_text`` would return. A space is
+    emitted wherever BeautifulSoup would end a string, and text inside
+    ``SKIPPED_TEXT_TAGS`` is dropped.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.pieces: List[str] = []
+
+        self._open_tags: List[str] = []
+        self._open_counts: Counter = Counter()
+        self._skipped_depth = 0
+        self._already_closed: List[str] = []
+
+    def handle_starttag(self, tag, attrs, handle_empty_element=True):
+        self.pieces.append(" ")
+        self._push(tag)
+
+        if handle_empty_element and tag in VOID_TAGS:
+            self.handle_endtag(tag, check_already_closed=False)
+            self._already_closed.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, handle_empty_element=False)
+        self.handle_endtag(tag, check_already_closed=False)
+
+    def handle_endtag(self, tag, check_already_closed=True):
+        # The end tag of a void element that was already closed is ignored, and does not end a string
+        if check_already_closed and tag in self._already_closed:
+            self._already_closed.remove(tag)
+            return
+
+        self.pieces.append(" ")
+        self._pop_to(tag)
+
+    def handle_data(self, data):
+        if not self._skipped_depth:
+            self.pieces.append(data)
+
+    def handle_charref(self, name):
+        base, reference = (16, _HEX_REFERENCE) if name[:1] in ("x", "X") else (10, _DECIMAL_REFERENCE)
+        digits = name[1:] if base == 16 else name
+
+        try:
+            number, extra = int(digits, base), ""
+        except ValueError:
+            match = reference.search(digits)
+            if match is None:
+                self.handle_data(digits)
+                return
+            number, extra = int(match.group(1), base), match.group(2)
+
+        self.handle_data(_numeric_reference(number) + extra)
+
+    def handle_entityref(self, name):
+        self.handle_data(_ENTITIES.get(name, f"&{name}"))
+
+    def unknown_decl(self, data):
+        # CDATA sections are kept as text even inside skipped tags; other declarations are dropped
+        self.pieces.append(" ")
+        if data.upper().startswith("CDATA["):
+            self.pieces.append(data[len("CDATA["):])
+        self.pieces.append(" ")
+
+    def handle_comment(self, data):
+        self.pieces.append(" ")
+
+    def handle_decl(self, decl):
+        self.pieces.append(" ")
+
+    def handle_pi(self, data):
+        self.pieces.append(" ")
+
+    def _push(self, tag: str) -> None:
+        self._open_tags.append(tag)
+        self._open_counts[tag] += 1
+        if tag in SKIPPED_TEXT_TAGS:
+            self._skipped_depth += 1
+
+    def _pop_to(self, tag: str) -> None:
+        """Close ``tag`` and everything opened inside it; end tags of unopened tags are ignored."""
+
+        if not self._open_counts[tag]:
+            return
+
+        while self._open_tags:
+            popped = self._open_tags.pop()
+            self._open_counts[popped] -= 1
+            if popped in SKIPPED_TEXT_TAGS:
+                self._skipped_depth -= 1
+            if popped == tag:
+                return
+
+
+def _numeric_reference(number: int) -> str:
+    """Resolve a numeric character reference, mapping Windows-1252 code points like BeautifulSoup."""
+
+    if number == 0 or number > 0x10FFFF or 0xD800 <= number <= 0xDFFF:
+        return "\ufffd"
+
+    if 0x80 <= number <= 0x9F:
+        try:
+            return bytes([number]).decode("cp1252")
+        except UnicodeDecodeError:
+            pass
+
+    return chr(number)
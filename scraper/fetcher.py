@@ -1,12 +1,19 @@
-from typing import Any, Optional, Dict, List, Set
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Optional, Dict, List, Sequence, Set, Tuple
 import logging
 import asyncio
 
 from config import settings
+from utils import REGISTRY
+from .decode import compact_posts
 from .http_client import HttpClient
+from .planner import TERMS_PER_PAGE, PrefetchWindow, incremental_pages, page_count
 
 logger = logging.getLogger(__name__)
 
+_PAGES_FETCHED = REGISTRY.counter("scraper_pages_fetched_total", "Post pages fetched, including a reused bootstrap page.", ("site",))
+_POSTS_FETCHED = REGISTRY.counter("scraper_posts_fetched_total", "Posts received on fetched pages.", ("site",))
+
 
 class Fetcher:
     """
@@ -14,34 +21,81 @@ class Fetcher:
     incremental scraping, and site-specific endpoints.
 
     This class delegates all HTTP/networking concerns to HttpClient.
+
+    When ``post_fields`` is given, post requests carry a ``_fields``
+    projection so the site only sends those fields. ``prefetch_window`` is
+    the number of pages incremental walks keep in flight, as learned by an
+    earlier run.
+
+    The page count is only requested once a page walk needs it. The first
+    page downloaded to read it is kept and served to the first
+    ``fetch_page(1)`` call instead of being requested again.
     """
 
-    def __init__(self, site_url: str, site_name: str, http_client: HttpClient):
+    def __init__(
+            self,
+            site_url: str,
+            site_name: str,
+            http_client: HttpClient,
+            post_fields: Optional[Sequence[str]] = None,
+            prefetch_window: Optional[int] = None,
+    ):
         self.site_url = site_url
         self.site_name = site_name
         self.http = http_client
+        self.post_fields = list(post_fields) if post_fields else None
+
+        # Pages kept in flight by incremental walks, starting from the size learned for this site
+        self.prefetch = PrefetchWindow(prefetch_window or settings.prefetch_window, settings.prefetch_max_window)
+
+        # Share of the full payload size still transferred with the projection, when probed
+        self.projection_ratio: Optional[float] = None
+
+        # From the bootstrap request: the X-WP-Total post count, the page count and the posts of page 1
+        self.total_posts: Optional[int] = None
+        self._total_pages: Optional[int] = None
+        self._first_page: Optional[List[Dict[str, Any]]] = None
 
         # WordPress REST API endpoints
         self.posts_url = settings.posts_url.format(site_url=site_url)
         self.categories_url = settings.categories_url.format(site_url=site_url)
+        self.tags_url = settings.tags_url.format(site_url=site_url)
+
+    async def fetch_metadata(self, first_page: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Fetch metadata required for scraping, such as the total page and post counts.
 
-    async def fetch_metadata(self) -> Optional[Dict[str, Any]]:
-        """Fetch metadata required for scraping, such as total page count and categories."""
+        The bootstrap request that reads them downloads page 1 for the page
+        walk and is made at most once. Runs that may not need page 1, such as
+        resumed first runs, pass ``first_page=False`` to read the counts from
+        a single-post request instead.
+        """
 
-        total_pages = await self.fetch_total_pages()
-        categories = await self.fetch_categories()
+        if first_page or self._total_pages is not None:
+            if self._total_pages is None:
+                self._total_pages = await self.fetch_total_pages()
+            total_pages = self._total_pages
+        else:
+            total_pages = await self.fetch_total_pages(per_page=1)
 
         return {
             "total_pages": total_pages,
-            "category_map": categories,
+            "total_posts": self.total_posts,
         }
 
-    async def fetch_data(self, total_pages: int, seen_ids: Optional[Set[str]] = None, start_page: int = 1) -> List[Dict[str, Any]]:
+    async def fetch_data(
+            self,
+            total_pages: int,
+            seen_ids: Optional[Set[str]] = None,
+            start_page: int = 1,
+            total_posts: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
         """
         Fetch content using either concurrent or sequential strategy.
 
         Uses concurrent fetching when no existing IDs are provided (first run),
-        otherwise uses sequential fetching with early stopping.
+        otherwise fetches the pages planned from ``total_posts`` and stops
+        early at previously seen posts.
         """
         is_first_run = not seen_ids
 
@@ -53,20 +107,162 @@ class Fetcher:
             return await self.fetch_all_sequential(
                 total_pages=total_pages,
                 existing_ids=seen_ids,
-                start_page=start_page
+                start_page=start_page,
+                total_posts=total_posts,
             )
 
-    async def fetch_all_concurrent(self, total_pages: int, start_page: int = 1) -> List[Dict]:
+    async def stream_data(
+            self,
+            queue: asyncio.Queue,
+            total_pages: int,
+            seen_ids: Optional[Set[str]] = None,
+            start_page: int = 1,
+            total_posts: Optional[int] = None,
+    ) -> None:
+        """
+        Streaming counterpart of ``fetch_data``: puts the items of each fetched
+        page on ``queue`` instead of collecting them, so a bounded queue caps
+        how many pages are held in memory at once.
+        """
+        is_first_run = not seen_ids
+
+        if is_first_run:
+            logger.info("First run detected - using concurrent streaming.")
+            await self.stream_all_concurrent(queue, total_pages, start_page)
+        else:
+            logger.info("Incremental run detected - using sequential streaming.")
+            async for new_items in self.iter_pages_incremental(total_pages, seen_ids, start_page, total_posts):
+                await queue.put(new_items)
+
+    async def stream_all_concurrent(self, queue: asyncio.Queue, total_pages: int, start_page: int = 1) -> None:
+        """Fetch all pages with a fixed pool of workers, putting each page on the queue."""
+
+        logger.info("Streaming %d pages concurrently (max %d at a time).", total_pages, self.http.max_concurrency)
+
+        # Workers share one page iterator, so pages are only requested once there is room downstream
+        pages = iter(range(start_page, start_page + total_pages))
+        completed = 0
+
+        async def worker() -> None:
+            nonlocal completed
+
+            for page in pages:
+                articles = await self.fetch_page(page)
+                completed += 1
+
+                if articles:
+                    await queue.put(articles)
+
+                logger.info("Progress: %d/%d pages completed.", completed, total_pages)
+
+        workers = min(self.http.max_concurrency, total_pages)
+        await asyncio.gather(*(worker() for _ in range(workers)))
+
+    async def iter_pages_concurrent(self, pages: Sequence[int]) -> AsyncIterator[Tuple[int, Optional[List[Dict]]]]:
+        """
+        Yield ``(page, items)`` for the given pages in the order they complete,
+        with ``items`` None for pages that failed. At most ``max_concurrency``
+        pages are requested or waiting for the caller at any time.
+        """
+
+        logger.info("Fetching %d pages concurrently (max %d at a time).", len(pages), self.http.max_concurrency)
+
+        remaining = iter(pages)
+        in_flight: Dict[asyncio.Task, int] = {}
+        completed = 0
+
+        def prefetch() -> None:
+            while len(in_flight) < self.http.max_concurrency:
+                page = next(remaining, None)
+                if page is None:
+                    return
+
+                in_flight[asyncio.create_task(self.fetch_page(page))] = page
+
+        try:
+            prefetch()
+
+            while in_flight:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    page = in_flight.pop(task)
+                    completed += 1
+
+                    logger.info("Progress: %d/%d pages completed.", completed, len(pages))
+                    yield page, task.result()
+
+                prefetch()
+
+        finally:
+            for task in in_flight:
+                task.cancel()
+            await asyncio.gather(*in_flight, return_exceptions=True)
+
+    async def fetch_modified_since(self, modified_after: str) -> Optional[List[Dict]]:
+        """
+        Fetch every post created or modified after ``modified_after``, oldest
+        change first, using the ``modified_after`` query filter.
+
+        Returns ``None`` when the site rejects or ignores the filter, so the
+        caller can fall back to walking pages.
+
+        This is the first posts request of a changed-since run, so it also
+        checks how the site handles the ``_fields`` projection, like the
+        bootstrap request of a page walk.
+        """
+
+        query = {
+            "modified_after": modified_after,
+            "orderby": "modified",
+            "order": "asc",
+        }
+        first_page = {**query, "per_page": settings.posts_per_page, "page": 1}
+
+        try:
+            try:
+                result = await self.http.fetch_json_with_headers(self.posts_url, {**self._projection_params(), **first_page})
+            except Exception as e:
+                if not self.post_fields:
+                    raise
+
+                logger.warning("Request with _fields projection failed (%s) - retrying without it.", e)
+                self.post_fields = None
+                result = await self.http.fetch_json_with_headers(self.posts_url, first_page)
+        except Exception as e:
+            logger.warning("Querying changes since %s failed (%s) - falling back to page walk.", modified_after, e)
+            return None
+
+        if not result or result.get("data") is None:
+            return None
+
+        await self._check_projection(result["data"])
+        items: List[Dict] = self._compact(result["data"])
+
+        # Sites that drop unknown query arguments return their regular listing
+        if any(item.get("modified", "") <= modified_after for item in items):
+            logger.warning("Site ignores the modified_after filter - falling back to page walk.")
+            return None
+
+        total_pages = int(result["headers"].get("X-WP-TotalPages", 1))
+        logger.info("Found changes since %s across %d pages.", modified_after, total_pages)
+
+        if total_pages > 1:
+            items.extend(await self.fetch_all_concurrent(total_pages - 1, start_page=2, extra_params=query))
+
+        return items
+
+    async def fetch_all_concurrent(self, total_pages: int, start_page: int = 1, extra_params: Optional[Dict[str, Any]] = None) -> List[Dict]:
         """Fetch all pages concurrently with controlled concurrency."""
 
-        logger.info("Fetching %d pages concurrently (max %d at a time).",total_pages, settings.max_concurrent_requests)
+        logger.info("Fetching %d pages concurrently (max %d at a time).",total_pages, self.http.max_concurrency)
 
         all_articles: List[Dict] = []
-        semaphore = asyncio.Semaphore(settings.max_concurrent_requests)
+        semaphore = asyncio.Semaphore(self.http.max_concurrency)
 
         async def fetch_with_semaphore(page: int) -> Optional[List[Dict]]:
             async with semaphore:
-                return await self.fetch_page(page)
+                return await self.fetch_page(page, extra_params)
 
         tasks = [
             fetch_with_semaphore(page)
@@ -85,71 +281,222 @@ class Fetcher:
 
         return all_articles
 
-    async def fetch_all_sequential(self, total_pages: int, existing_ids: Set[str], start_page: int = 1) -> List[Dict]:
-        """Fetch pages sequentially with early stopping for incremental scraping."""
-
-        logger.info("Fetching sequentially from page %d, stopping on duplicates.",start_page)
+    async def fetch_all_sequential(
+            self,
+            total_pages: int,
+            existing_ids: Set[str],
+            start_page: int = 1,
+            total_posts: Optional[int] = None,
+    ) -> List[Dict]:
+        """Fetch pages with early stopping for incremental scraping."""
 
         all_new_articles: List[Dict] = []
 
-        for page in range(start_page, start_page + total_pages):
-            items = await self.fetch_page(page)
+        async for new_items in self.iter_pages_incremental(total_pages, existing_ids, start_page, total_posts):
+            all_new_articles.extend(new_items)
 
-            if not items:
-                logger.warning("No items returned for page %d - stopping.", page)
-                break
+        return all_new_articles
+
+    async def iter_pages_incremental(
+            self,
+            total_pages: int,
+            existing_ids: Set[str],
+            start_page: int = 1,
+            total_posts: Optional[int] = None,
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        Yield the new items of each page for an incremental run.
 
-            new_items = [
-                item for item in items
-                if f"{self.site_name}_{item.get('id')}" not in existing_ids
-            ]
+        With the ``X-WP-Total`` post count, the pages expected to hold new
+        posts are fetched concurrently, a window at a time. If none of them
+        reached a seen post, the walk carries on sequentially. Without the
+        count, pages are walked sequentially from ``start_page``.
+        """
 
-            duplicate_items = [
-                item for item in items
-                if f"{self.site_name}_{item.get('id')}" in existing_ids
-            ]
+        if total_posts is None or start_page != 1:
+            async for new_items in self.iter_pages_sequential(total_pages, existing_ids, start_page):
+                yield new_items
+            return
 
-            logger.info("Page %d: %d new items, %d already scraped.", page, len(new_items), len(duplicate_items))
+        planned = incremental_pages(total_posts, len(existing_ids), settings.posts_per_page, total_pages)
+        logger.info(
+            "Expecting %d new posts - fetching the first %d of %d pages.",
+            max(0, total_posts - len(existing_ids)), planned, total_pages,
+        )
 
-            all_new_articles.extend(new_items)
+        reached_seen = False
+        window = self.http.max_concurrency
+
+        for first in range(1, planned + 1, window):
+            pages = range(first, min(first + window, planned + 1))
+            results = await asyncio.gather(*(self.fetch_page(page) for page in pages))
+
+            for page, items in zip(pages, results):
+                if not items:
+                    logger.warning("No items returned for page %d - stopping.", page)
+                    return
+
+                new_items = [item for item in items if f"{self.site_name}_{item.get('id')}" not in existing_ids]
+                logger.info("Page %d: %d new items, %d already scraped.", page, len(new_items), len(items) - len(new_items))
 
-            if not new_items and duplicate_items:
-                logger.info("All items on page %d already exist - stopping scraping.", page)
-                logger.info("Total pages fetched: %d/%d, total new items: %d.",page - start_page + 1, total_pages, len(all_new_articles))
+                if new_items:
+                    yield new_items
+
+                reached_seen = reached_seen or len(new_items) < len(items)
+
+            # The plan overestimated, e.g. because seen IDs are missing from the store
+            if reached_seen:
                 break
 
-        return all_new_articles
+        if not reached_seen and planned < total_pages:
+            logger.info("No seen posts in the first %d pages - continuing sequentially.", planned)
+            async for new_items in self.iter_pages_sequential(total_pages - planned, existing_ids, planned + 1):
+                yield new_items
 
-    async def fetch_page(self, page: int) -> Optional[List[Dict[str, Any]]]:
+    async def iter_pages_sequential(self, total_pages: int, existing_ids: Set[str], start_page: int = 1) -> AsyncIterator[List[Dict]]:
+        """
+        Yield the new items of each page in order, stopping once a page holds only seen items.
+
+        The next pages, up to the prefetch window, are requested while earlier
+        ones are checked, and requests still outstanding when the walk stops
+        are cancelled. The window then adapts to the number of pages needed.
+        """
+
+        window = min(self.prefetch.size, self.http.max_concurrency)
+        last_page = start_page + total_pages - 1
+
+        logger.info("Fetching from page %d in order (%d pages ahead), stopping on duplicates.", start_page, window)
+
+        in_flight: Deque[Tuple[int, asyncio.Task]] = deque()
+        next_page = start_page
+        total_new_items = 0
+        needed = 0
+
+        def prefetch() -> None:
+            nonlocal next_page
+
+            while len(in_flight) < window and next_page <= last_page:
+                in_flight.append((next_page, asyncio.create_task(self.fetch_page(next_page))))
+                next_page += 1
+
+        try:
+            prefetch()
+
+            while in_flight:
+                page, task = in_flight.popleft()
+                items = await task
+                needed += 1
+
+                if not items:
+                    logger.warning("No items returned for page %d - stopping.", page)
+                    break
+
+                new_items = [
+                    item for item in items
+                    if f"{self.site_name}_{item.get('id')}" not in existing_ids
+                ]
+
+                logger.info("Page %d: %d new items, %d already scraped.", page, len(new_items), len(items) - len(new_items))
+
+                total_new_items += len(new_items)
+
+                if not new_items:
+                    logger.info("All items on page %d already exist - stopping scraping.", page)
+                    logger.info("Total pages fetched: %d/%d, total new items: %d.", page - start_page + 1, total_pages, total_new_items)
+                    break
+
+                # Keep the window full while the caller works on this page
+                prefetch()
+                yield new_items
+
+        finally:
+            overshoot = len(in_flight)
+
+            for _, task in in_flight:
+                task.cancel()
+            await asyncio.gather(*(task for _, task in in_flight), return_exceptions=True)
+
+            if overshoot:
+                logger.info("Cancelled %d prefetched pages past page %d.", overshoot, start_page + needed - 1)
+
+            self.prefetch.record(needed, overshoot)
+
+    async def fetch_page(self, page: int, extra_params: Optional[Dict[str, Any]] = None) -> Optional[List[Dict[str, Any]]]:
         """Fetch posts from a specific page of the WordPress REST API."""
 
+        if page == 1 and not extra_params and self._first_page is not None:
+            data, self._first_page = self._first_page, None
+            logger.info("Reused page 1 with %d posts from the bootstrap request.", len(data))
+            self._count_page(data)
+            return data
+
         params = {
+            **self._projection_params(),
+            **(extra_params or {}),
             "per_page": settings.posts_per_page,
             "page": page,
         }
 
-        data = await self.http.fetch_json(self.posts_url, params)
+        data = await self.http.fetch_json(self.posts_url, params, endpoint="posts")
 
         if data:
             logger.info("Fetched page %d with %d posts.", page, len(data))
-            return data
+            self._count_page(data)
+            return self._compact(data)
 
         logger.warning("Failed to fetch page %d.", page)
         return None
 
-    async def fetch_total_pages(self) -> int:
+    @staticmethod
+    def _compact(posts: List[Dict[str, Any]]) -> List[Any]:
+        """Keep only the fields the scraper reads, as ``RawPost`` objects, when ``compact_posts`` is on."""
+
+        return compact_posts(posts) if settings.compact_posts else posts
+
+    def _count_page(self, data: List[Dict[str, Any]]) -> None:
+        _PAGES_FETCHED.inc(site=self.site_name)
+        _POSTS_FETCHED.inc(len(data), site=self.site_name)
+
+    async def fetch_total_pages(self, per_page: Optional[int] = None) -> int:
         """
         Fetch the total number of pages available from the WordPress REST API,
         using the ``X-WP-TotalPages`` response header.
+
+        This first request also records ``X-WP-Total`` and keeps its posts as
+        page 1, and checks how the site handles the ``_fields`` projection,
+        dropping the projection if the site rejects it. With a smaller
+        ``per_page``, only the counts are read and the posts are discarded.
         """
 
+        per_page = per_page or settings.posts_per_page
+
         try:
-            params = {"per_page": settings.posts_per_page}
-            result = await self.http.fetch_json_with_headers(self.posts_url, params)
+            params = {"per_page": per_page, **self._projection_params()}
+
+            try:
+                result = await self.http.fetch_json_with_headers(self.posts_url, params, endpoint="posts")
+            except Exception as e:
+                if not self.post_fields:
+                    raise
+
+                logger.warning("Request with _fields projection failed (%s) - retrying without it.", e)
+                self.post_fields = None
+                result = await self.http.fetch_json_with_headers(self.posts_url, {"per_page": per_page}, endpoint="posts")
 
             if result and "headers" in result:
-                total_pages = int(result["headers"].get("X-WP-TotalPages", 1))
-                logger.info("Total pages available: %d.", total_pages)
+                await self._check_projection(result["data"])
+
+                if result["data"] and per_page == settings.posts_per_page:
+                    self._first_page = self._compact(result["data"])
+
+                total_posts = result["headers"].get("X-WP-Total")
+                self.total_posts = int(total_posts) if total_posts is not None else None
+
+                if per_page == settings.posts_per_page:
+                    total_pages = int(result["headers"].get("X-WP-TotalPages", 1))
+                else:
+                    total_pages = page_count(self.total_posts or 0, settings.posts_per_page)
+                logger.info("Total pages available: %d (%s posts).", total_pages, total_posts or "unknown")
                 return total_pages
 
         except Exception as e:
@@ -157,23 +504,138 @@ class Fetcher:
 
         return 1
 
-    async def fetch_categories(self) -> Dict[int, str]:
-        """Fetch categories and build a mapping of category IDs to names."""
+    async def count_posts(self, extra_params: Optional[Dict[str, Any]] = None) -> Optional[int]:
+        """Return ``X-WP-Total`` for a post query, requesting a single post ID."""
+
+        return await self._count(self.posts_url, extra_params)
+
+    async def count_terms(self, taxonomy: str) -> Optional[int]:
+        """Return ``X-WP-Total`` for a taxonomy ("categories" or "tags")."""
 
-        category_map: Dict[int, str] = {}
+        return await self._count(self._taxonomy_url(taxonomy))
 
+    async def _count(self, url: str, extra_params: Optional[Dict[str, Any]] = None) -> Optional[int]:
         try:
-            params = {"per_page": 100}
-            data = await self.http.fetch_json(self.categories_url, params)
+            result = await self.http.fetch_json_with_headers(url, {**(extra_params or {}), "_fields": "id", "per_page": 1})
+        except Exception as e:
+            logger.error("Error counting %s: %s", url, e)
+            return None
+
+        if not result or "X-WP-Total" not in result["headers"]:
+            return None
+
+        return int(result["headers"]["X-WP-Total"])
+
+    def _projection_params(self) -> Dict[str, str]:
+        """Return the ``_fields`` query argument, or nothing when projection is off."""
+
+        if not self.post_fields:
+            return {}
+
+        return {"_fields": ",".join(self.post_fields)}
+
+    async def _check_projection(self, items: Optional[List[Dict[str, Any]]]) -> None:
+        """Detect sites that ignore ``_fields`` and, if enabled, measure how much it saves."""
+
+        if not self.post_fields or not items:
+            return
+
+        extra_fields = set(items[0]) - set(self.post_fields)
+        if extra_fields:
+            logger.info("Site ignores the _fields projection (returned %d extra fields).", len(extra_fields))
+            self.post_fields = None
+            return
 
-            if data:
-                for cat in data:
-                    category_map[cat["id"]] = cat["name"]
-                logger.info("Fetched %d categories.", len(category_map))
-            else:
-                logger.warning("Failed to fetch categories.")
+        if not settings.field_projection_probe:
+            return
+
+        params = {"per_page": settings.posts_per_page}
+
+        before = self.http.bytes_received
+        await self.http.fetch_json(self.posts_url, {**params, **self._projection_params()})
+        projected = self.http.bytes_received - before
+
+        before = self.http.bytes_received
+        await self.http.fetch_json(self.posts_url, params)
+        full = self.http.bytes_received - before
+
+        if full:
+            self.projection_ratio = projected / full
+            logger.info("Projection shrinks a page from %d to %d bytes (%.0f%% saved).", full, projected, 100 * (1 - self.projection_ratio))
+
+    async def fetch_all_terms(self, taxonomy: str) -> Optional[Dict[int, str]]:
+        """
+        Fetch every term of a taxonomy ("categories" or "tags") and map term IDs
+        to names, or return None if the listing could not be fetched. The first
+        page reports the page count, and the remaining pages are fetched
+        concurrently.
+        """
+
+        url = self._taxonomy_url(taxonomy)
+        params = {**self._term_params(), "per_page": TERMS_PER_PAGE}
+        terms: Dict[int, str] = {}
+
+        try:
+            result = await self.http.fetch_json_with_headers(url, {**params, "page": 1}, endpoint=taxonomy)
+            if not result or not isinstance(result.get("data"), list):
+                logger.warning("Failed to fetch %s.", taxonomy)
+                return None
+
+            pages = [result["data"]]
+            total_pages = int(result["headers"].get("X-WP-TotalPages", 1))
+
+            if total_pages > 1:
+                pages.extend(await asyncio.gather(*(
+                    self.http.fetch_json(url, {**params, "page": page}, endpoint=taxonomy)
+                    for page in range(2, total_pages + 1)
+                )))
+
+            for page in pages:
+                for term in page or ():
+                    terms[term["id"]] = term["name"]
+
+            logger.info("Fetched %d %s from %d pages.", len(terms), taxonomy, total_pages)
 
         except Exception as e:
-            logger.error("Error building category map: %s", e)
+            logger.error("Error building %s map: %s", taxonomy, e)
+            return None
+
+        return terms
+
+    async def fetch_terms_by_id(self, taxonomy: str, term_ids: Sequence[int]) -> Dict[int, str]:
+        """Fetch the names of specific terms, in batches of ``include`` IDs."""
+
+        url = self._taxonomy_url(taxonomy)
+        terms: Dict[int, str] = {}
+
+        batches = [term_ids[start:start + TERMS_PER_PAGE] for start in range(0, len(term_ids), TERMS_PER_PAGE)]
+
+        try:
+            results = await asyncio.gather(*(
+                self.http.fetch_json(url, {
+                    **self._term_params(),
+                    "include": ",".join(str(term_id) for term_id in batch),
+                    "per_page": TERMS_PER_PAGE,
+                })
+                for batch in batches
+            ))
+
+            for data in results:
+                for term in data or ():
+                    terms[term["id"]] = term["name"]
+
+        except Exception as e:
+            logger.error("Error resolving %s: %s", taxonomy, e)
+
+        return terms
+
+    def _taxonomy_url(self, taxonomy: str) -> str:
+        return self.tags_url if taxonomy == "tags" else self.categories_url
+
+    def _term_params(self) -> Dict[str, str]:
+        """Ask only for term IDs and names, unless the site turned out not to support ``_fields``."""
+
+        if not self.post_fields:
+            return {}
 
-        return category_map
+        return {"_fields": "id,name"}
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional
+
+
+class HighWaterMark:
+    """
+    Tracks the newest ``date`` and ``modified`` values among fetched posts.
+
+    WordPress returns both as ISO 8601 strings in site-local time without an
+    offset, so they order correctly as plain strings.
+    """
+
+    FIELDS = ("date", "modified")
+
+    def __init__(self, checkpoint: Optional[Dict[str, Any]] = None):
+        checkpoint = checkpoint or {}
+        self.values: Dict[str, Optional[str]] = {field: checkpoint.get(field) for field in self.FIELDS}
+        self._initial = dict(self.values)
+
+    @property
+    def modified(self) -> Optional[str]:
+        return self.values["modified"]
+
+    @property
+    def advanced(self) -> bool:
+        """Whether any mark moved past the checkpoint it started from."""
+
+        return self.values != self._initial
+
+    def observe(self, posts: Iterable[Dict[str, Any]]) -> None:
+        """Advance the marks past any newer value in the given posts."""
+
+        for post in posts:
+            for field in self.FIELDS:
+                value = post.get(field)
+                current = self.values[field]
+
+                if value and (current is None or value > current):
+                    self.values[field] = value
+
+    def as_dict(self) -> Dict[str, str]:
+        """Return the marks that have been set, for saving in a checkpoint."""
+
+        return {field: value for field, value in self.values.items() if value}
+
+
+def query_floor(modified: str, overlap_seconds: int = 1) -> str:
+    """
+    Return the ``modified_after`` value for a query resuming from ``modified``.
+
+    The filter is exclusive and only has second resolution, so the floor is
+    moved back slightly to also catch posts modified within the same second.
+    """
+
+    floor = datetime.fromisoformat(modified) - timedelta(seconds=overlap_seconds)
+    return floor.isoformat(timespec="seconds")
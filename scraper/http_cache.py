@@ -0,0 +1,179 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional
+from urllib.parse import urlencode
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    endpoint TEXT NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_used_at ON responses (used_at);
+"""
+
+_UPSERT_RESPONSE = """
+INSERT INTO responses (key, endpoint, headers, body, size, stored_at, used_at) VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    endpoint = excluded.endpoint,
+    headers = excluded.headers,
+    body = excluded.body,
+    size = excluded.size,
+    stored_at = excluded.stored_at,
+    used_at = excluded.used_at
+"""
+
+
+@dataclass
+class CachedResponse:
+    """A stored response body with its headers."""
+
+    key: str
+    headers: Dict[str, str]
+    body: bytes
+    stored_at: float
+
+    def header(self, name: str) -> Optional[str]:
+        """Look up a header case-insensitively."""
+
+        name = name.lower()
+        return next((value for key, value in self.headers.items() if key.lower() == name), None)
+
+    def validators(self) -> Dict[str, str]:
+        """Return the conditional request headers that revalidate this response."""
+
+        validators = {}
+
+        etag = self.header("ETag")
+        if etag:
+            validators["If-None-Match"] = etag
+
+        last_modified = self.header("Last-Modified")
+        if last_modified:
+            validators["If-Modified-Since"] = last_modified
+
+        return validators
+
+    def json(self, loads: Callable[[Any], Any] = json.loads) -> Any:
+        return loads(self.body)
+
+
+class HttpCache:
+    """
+    On-disk cache of JSON responses, kept in a SQLite database.
+
+    A response younger than its endpoint's TTL is served without a request.
+    Older responses are revalidated with ``If-None-Match`` /
+    ``If-Modified-Since``, and a 304 serves the stored body. Endpoints in
+    ``revalidate`` are cached even without a TTL, so that every request is
+    conditional; other endpoints without a TTL are not cached at all. Once
+    the stored bodies exceed ``max_bytes``, the least recently used
+    responses are evicted.
+    """
+
+    def __init__(self, path: str, max_bytes: int, ttls: Mapping[str, float], revalidate: Iterable[str] = ()):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.ttls = dict(ttls)
+        self.revalidate = set(revalidate)
+
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Lookups and writes run in worker threads, so access is serialized by a lock
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(self.path), isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+
+    @staticmethod
+    def key(url: str, params: Optional[Mapping[str, Any]] = None) -> str:
+        """Build the cache key of a GET request from its URL and sorted query parameters."""
+
+        if not params:
+            return url
+
+        return f"{url}?{urlencode(sorted((name, str(value)) for name, value in params.items()))}"
+
+    def caches(self, endpoint: Optional[str]) -> bool:
+        """Return whether responses of the endpoint are cached at all."""
+
+        return endpoint is not None and (self.ttls.get(endpoint, 0) > 0 or endpoint in self.revalidate)
+
+    def is_fresh(self, response: CachedResponse, endpoint: str) -> bool:
+        """Return whether the response can be served without revalidating it."""
+
+        return time.time() - response.stored_at < self.ttls.get(endpoint, 0)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Return the stored response for the key, marking it as recently used."""
+
+        with self._lock:
+            row = self._connection.execute("SELECT headers, body, stored_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+
+            self._connection.execute("UPDATE responses SET used_at = ? WHERE key = ?", (time.time(), key))
+
+        headers, body, stored_at = row
+        return CachedResponse(key, json.loads(headers), bytes(body), stored_at)
+
+    def put(self, key: str, endpoint: str, headers: Mapping[str, str], body: bytes) -> None:
+        """Store a response, evicting the least recently used ones if the cache grows too large."""
+
+        now = time.time()
+
+        with self._lock:
+            self._connection.execute(
+                _UPSERT_RESPONSE,
+                (key, endpoint, json.dumps(dict(headers)), body, len(body), now, now),
+            )
+            self._evict()
+
+    def refresh(self, key: str) -> None:
+        """Restart the TTL of a response that the server confirmed unchanged."""
+
+        now = time.time()
+
+        with self._lock:
+            self._connection.execute("UPDATE responses SET stored_at = ?, used_at = ? WHERE key = ?", (now, now, key))
+
+    def close(self) -> None:
+        """Close the database connection."""
+
+        with self._lock:
+            self._connection.close()
+
+    def _evict(self) -> None:
+        total = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = []
+        for key, size in self._connection.execute("SELECT key, size FROM responses ORDER BY used_at"):
+            if total <= self.max_bytes:
+                break
+
+            evicted.append((key,))
+            total -= size
+
+        self._connection.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        self.evictions += len(evicted)
+
+        logger.debug("Evicted %d responses from the HTTP cache", len(evicted))
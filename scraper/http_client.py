@@ -1,81 +1,294 @@
-from typing import Any, Optional, Dict
+from contextlib import asynccontextmanager, nullcontext
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Mapping, Optional, Dict, Tuple
+from urllib.parse import urlparse
 import aiohttp
 import asyncio
 import logging
-from utils import RateLimiter, retry_on_exception
+import re
+import time
+from utils import REGISTRY, AdaptiveConcurrency, HostConcurrency, RateLimits, RequestBudget, retry_on_exception
 from config import settings
+from .decode import create_json_loads
+from .http_cache import HttpCache
 
 logger = logging.getLogger(__name__)
 
+# Media types aiohttp's ``ClientResponse.json`` accepts: application/json and application/*+json
+_JSON_CONTENT_TYPE = re.compile(r"^application/(?:[\w.+-]+?\+)?json")
+
+_REQUEST_SECONDS = REGISTRY.histogram("scraper_http_request_duration_seconds", "Time from sending a request to reading its response.", ("site",))
+_RESPONSES = REGISTRY.counter("scraper_http_responses_total", "HTTP responses received, by status code.", ("site", "status"))
+_RECEIVED_BYTES = REGISTRY.counter("scraper_http_received_bytes_total", "Response body bytes received.", ("site",))
+_RETRIES = REGISTRY.counter("scraper_http_retries_total", "Requests retried after an error, timeout or 429.", ("site",))
+_RATE_LIMITED = REGISTRY.counter("scraper_http_rate_limited_total", "429 responses received.", ("site",))
+_RATE_LIMIT_WAIT = REGISTRY.counter("scraper_rate_limit_wait_seconds_total", "Time spent waiting for rate limiter tokens.", ("site",))
+
+
+def _count_retry(client: "HttpClient", *args, **kwargs) -> None:
+    _RETRIES.inc(site=client.site_name)
+
 
 class HttpClient:
     """
     HTTP client responsible for making requests with retry,
     rate limiting, and timeout handling.
+
+    With ``concurrency``, each host's concurrent requests are capped by an
+    adaptive limit that is fed the latency and outcome of every request.
+    ``rate_limits`` is normally shared by all clients in a run, so request
+    rates hold per host and globally; a 429 pauses that host's bucket.
+
+    Requests that name an ``endpoint`` go through ``cache`` when one is
+    given: fresh responses are served from disk, and stale ones are
+    revalidated with conditional requests.
+
+    Requests are recorded in the metrics registry, labeled with ``site_name``.
+    Bodies are decoded with the ``json_decoder`` setting, straight from bytes.
     """
 
     def __init__(
             self,
             session: aiohttp.ClientSession,
             headers: Optional[Dict] = None,
-            timeout: Optional[int] = None
+            timeout: Optional[int] = None,
+            budget: Optional[RequestBudget] = None,
+            concurrency: Optional[AdaptiveConcurrency] = None,
+            rate_limits: Optional[RateLimits] = None,
+            cache: Optional[HttpCache] = None,
+            site_name: str = "",
     ):
         self.session = session
+        self.site_name = site_name
         self.headers = headers or settings.headers
         self.timeout = timeout or settings.request_timeout
-        self.rate_limiter = RateLimiter(settings.requests_per_second)
+        self.rate_limits = rate_limits or RateLimits(
+            settings.requests_per_second,
+            burst=settings.rate_limit_burst,
+            global_rate=settings.global_requests_per_second,
+        )
+        self.budget = budget
+        self.concurrency = concurrency
+        self.cache = cache
+        self._loads = create_json_loads(settings.json_decoder)
+
+        self.bytes_received = 0
+        self.responses_received = 0
+
+    async def _read_body(self, response: aiohttp.ClientResponse) -> bytes:
+        """Read the response body and count its size."""
+
+        body = await response.read()
+        self.bytes_received += len(body)
+        self.responses_received += 1
+
+        _RECEIVED_BYTES.inc(len(body), site=self.site_name)
+
+        return body
+
+    async def _read_json(self, response: aiohttp.ClientResponse) -> Any:
+        """Read the response body, count its size, and decode it as JSON."""
+
+        return self._decode_json(response, await self._read_body(response))
+
+    def _decode_json(self, response: aiohttp.ClientResponse, body: bytes) -> Any:
+        """Decode a JSON body as ``ClientResponse.json`` would, without first decoding it to ``str``."""
+
+        if not _JSON_CONTENT_TYPE.match(response.content_type):
+            raise aiohttp.ContentTypeError(
+                response.request_info,
+                response.history,
+                status=response.status,
+                message=f"Attempt to decode JSON with unexpected mimetype: {response.content_type}",
+                headers=response.headers,
+            )
+
+        body = body.strip()
+        return self._loads(body) if body else None
+
+    @property
+    def max_concurrency(self) -> int:
+        """Most requests worth issuing at once; an adaptive limit decides how many actually run."""
+
+        if self.concurrency is not None:
+            return self.concurrency.max_limit
+
+        return settings.max_concurrent_requests
+
+    def _request_slot(self, host: str):
+        """Return a context manager holding a request budget slot for the host."""
+
+        if self.budget is None:
+            return nullcontext()
+
+        return self.budget.acquire(host)
+
+    @asynccontextmanager
+    async def _get(self, url: str, params: Optional[Dict], headers: Optional[Dict]) -> AsyncIterator[aiohttp.ClientResponse]:
+        """
+        Send a GET request while holding the host's slots, and report its
+        outcome to the host's adaptive limit: 429, 5xx and timeouts count as
+        overload, and completed requests report their latency.
+
+        The rate limit is waited for before any slot is taken. A 429 pauses
+        the host's bucket for ``Retry-After`` and raises, so the retry waits
+        without holding a slot.
+        """
+
+        host = urlparse(url).netloc
+        host_concurrency: Optional[HostConcurrency] = self.concurrency.host(host) if self.concurrency is not None else None
+        merged_headers = {**self.headers, **(headers or {})}
+
+        wait_started = time.monotonic()
+        await self.rate_limits.wait(host)
+        _RATE_LIMIT_WAIT.inc(time.monotonic() - wait_started, site=self.site_name)
+
+        async with host_concurrency.slot() if host_concurrency is not None else nullcontext():
+            async with self._request_slot(host):
+                started = time.monotonic()
+                overloaded = False
+                completed = False
+
+                try:
+                    async with self.session.get(
+                            url,
+                            params=params,
+                            headers=merged_headers,
+                            timeout=aiohttp.ClientTimeout(total=self.timeout),
+                    ) as response:
+                        overloaded = response.status == 429 or response.status >= 500
+                        _RESPONSES.inc(site=self.site_name, status=response.status)
+
+                        if response.status == 429:
+                            _RATE_LIMITED.inc(site=self.site_name)
+                            wait_time = _retry_after(response.headers)
+                            logger.warning("Rate limited by %s. Pausing requests to it for %.0f seconds.", host, wait_time)
+
+                            self.rate_limits.pause(host, wait_time)
+                            raise aiohttp.ClientError("Rate limited, retrying.")
+
+                        yield response
+                        completed = True
+                except asyncio.TimeoutError:
+                    overloaded = True
+                    raise
+                finally:
+                    _REQUEST_SECONDS.observe(time.monotonic() - started, site=self.site_name)
+
+                    if host_concurrency is not None:
+                        if overloaded:
+                            host_concurrency.on_overload()
+                        elif completed:
+                            host_concurrency.on_success(time.monotonic() - started)
 
     @retry_on_exception(
         max_retries=settings.max_retries,
         delay=settings.retry_delay,
         backoff=settings.retry_backoff,
         exceptions=(aiohttp.ClientError, asyncio.TimeoutError),
+        on_retry=_count_retry,
     )
-    async def fetch_json(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None) -> Optional[Any]:
+    async def fetch_json(
+            self,
+            url: str,
+            params: Optional[Dict] = None,
+            headers: Optional[Dict] = None,
+            endpoint: Optional[str] = None,
+    ) -> Optional[Any]:
         """Perform an HTTP GET request and return the parsed JSON response."""
 
-        await self.rate_limiter.wait()
-
-        merged_headers = {**self.headers, **(headers or {})}
-
-        async with self.session.get(
-                url,
-                params=params,
-                headers=merged_headers,
-                timeout=aiohttp.ClientTimeout(total=self.timeout),
-        ) as response:
-            if response.status == 429:
-                wait_time = int(response.headers.get("Retry-After", 60))
-                logger.warning("Rate limited. Waiting %d seconds.", wait_time)
-
-                await asyncio.sleep(wait_time)
-                raise aiohttp.ClientError("Rate limited, retrying.")
-
-            response.raise_for_status()
-            return await response.json()
+        data, _ = await self._fetch(url, params, headers, endpoint)
+        return data
 
     @retry_on_exception(
         max_retries=settings.max_retries,
         delay=settings.retry_delay,
         backoff=settings.retry_backoff,
         exceptions=(aiohttp.ClientError, asyncio.TimeoutError),
+        on_retry=_count_retry,
     )
-    async def fetch_json_with_headers(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None) -> Optional[Dict]:
+    async def fetch_json_with_headers(
+            self,
+            url: str,
+            params: Optional[Dict] = None,
+            headers: Optional[Dict] = None,
+            endpoint: Optional[str] = None,
+    ) -> Optional[Dict]:
         """Perform an HTTP GET request and return both the response payload and headers."""
 
-        await self.rate_limiter.wait()
-        merged_headers = {**self.headers, **(headers or {})}
+        data, response_headers = await self._fetch(url, params, headers, endpoint)
+
+        return {
+            "data": data,
+            "headers": response_headers,
+        }
+
+    async def _fetch(
+            self,
+            url: str,
+            params: Optional[Dict],
+            headers: Optional[Dict],
+            endpoint: Optional[str],
+    ) -> Tuple[Any, Dict[str, str]]:
+        """Return the decoded JSON body and headers of a GET request, using the cache when it applies."""
+
+        if self.cache is None or not self.cache.caches(endpoint):
+            async with self._get(url, params, headers) as response:
+                response.raise_for_status()
+                return await self._read_json(response), dict(response.headers)
+
+        key = self.cache.key(url, params)
+        cached = await asyncio.to_thread(self.cache.get, key)
+
+        if cached is not None and self.cache.is_fresh(cached, endpoint):
+            self.cache.hits += 1
+            return cached.json(self._loads), cached.headers
+
+        conditional_headers = {**(headers or {}), **(cached.validators() if cached is not None else {})}
+
+        async with self._get(url, params, conditional_headers) as response:
+            if response.status == 304 and cached is not None:
+                self.cache.revalidations += 1
+                self.responses_received += 1
+
+                await asyncio.to_thread(self.cache.refresh, key)
+                return cached.json(self._loads), cached.headers
 
-        async with self.session.get(
-                url,
-                params=params,
-                headers=merged_headers,
-                timeout=aiohttp.ClientTimeout(total=self.timeout),
-        ) as response:
             response.raise_for_status()
-            data = await response.json()
+            self.cache.misses += 1
+
+            body = await self._read_body(response)
+            data = self._decode_json(response, body)
+            response_headers = dict(response.headers)
+
+            # Responses without validators are only worth keeping while they are fresh
+            storable = self.cache.ttls.get(endpoint, 0) > 0 or "ETag" in response.headers or "Last-Modified" in response.headers
+
+        if storable:
+            await asyncio.to_thread(self.cache.put, key, endpoint, response_headers, body)
+
+        return data, response_headers
+
+
+def _retry_after(headers: Mapping[str, str], default: float = 60.0) -> float:
+    """Return the delay requested by a ``Retry-After`` header, in seconds or as an HTTP date."""
+
+    value = headers.get("Retry-After")
+    if not value:
+        return default
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
 
-            return {
-                "data": data,
-                "headers": dict(response.headers),
-            }
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
@@ -0,0 +1,158 @@
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Dict, List, Optional, Sequence
+
+from langdetect import detect, DetectorFactory, LangDetectException
+from vezilka_schemas import Record
+
+from utils import REGISTRY
+
+DetectorFactory.seed = 0
+
+logger = logging.getLogger(__name__)
+
+_DECISIONS = REGISTRY.counter("scraper_language_filter_total", "Records kept or dropped by the language filter, by how it decided.", ("site", "decision"))
+
+# UTF-8 lead bytes of U+0400-U+047F, which hold every Cyrillic letter Macedonian uses
+_CYRILLIC_LEAD_BYTES = (b"\xd0", b"\xd1")
+_LATIN_LETTERS = bytes(range(ord("A"), ord("Z") + 1)) + bytes(range(ord("a"), ord("z") + 1))
+
+# Texts with fewer letters are kept: neither the ratio nor detection is reliable on them
+MIN_LETTERS = 100
+
+# Detection reads the start of a text, which is enough to tell its language
+DETECT_CHARS = 2000
+DETECT_BATCH_SIZE = 20
+
+
+def cyrillic_share(text: str) -> Optional[float]:
+    """
+    Return the share of Cyrillic letters among the Cyrillic and basic Latin
+    letters of ``text``, or ``None`` when it has fewer than ``MIN_LETTERS``.
+
+    Counts whole-buffer byte occurrences in the UTF-8 encoding instead of
+    looping over characters, so it costs microseconds per article.
+    """
+
+    data = text.encode("utf-8")
+
+    cyrillic = sum(data.count(lead) for lead in _CYRILLIC_LEAD_BYTES)
+    latin = len(data) - len(data.translate(None, _LATIN_LETTERS))
+
+    if cyrillic + latin < MIN_LETTERS:
+        return None
+
+    return cyrillic / (cyrillic + latin)
+
+
+class LanguageFilter:
+    """
+    Drops records that are not in one of ``languages``, shared by all sites.
+
+    Mostly Cyrillic texts are kept and mostly Latin ones dropped by their
+    letter ratio alone. Only texts in between are run through langdetect,
+    in batches on ``executor`` when one is given, with the detected
+    language cached by text hash. Dropped records are not marked as seen,
+    so they are checked again, and kept if the filter changes, on later runs.
+    """
+
+    def __init__(
+            self,
+            languages: Sequence[str],
+            keep_ratio: float = 0.7,
+            drop_ratio: float = 0.3,
+            cache_size: int = 100_000,
+    ):
+        self.languages = set(languages)
+        self.keep_ratio = keep_ratio
+        self.drop_ratio = drop_ratio
+        self.cache_size = cache_size
+
+        self._cache: "OrderedDict[bytes, Optional[str]]" = OrderedDict()
+
+    async def filter(self, records: List[Record], site_name: str, executor: Optional[Executor] = None) -> List[Record]:
+        """Return the records in an accepted language."""
+
+        decisions: Dict[str, int] = {}
+        keep: List[bool] = []
+        ambiguous: List[int] = []
+
+        for position, record in enumerate(records):
+            share = cyrillic_share(record.text)
+
+            if share is None or share >= self.keep_ratio:
+                keep.append(True)
+                decisions["cyrillic"] = decisions.get("cyrillic", 0) + 1
+            elif share <= self.drop_ratio:
+                keep.append(False)
+                decisions["latin"] = decisions.get("latin", 0) + 1
+            else:
+                keep.append(True)
+                ambiguous.append(position)
+
+        if ambiguous:
+            languages = await self._detect([records[position].text for position in ambiguous], executor)
+
+            for position, language in zip(ambiguous, languages):
+                # Texts langdetect cannot read are given the benefit of the doubt
+                keep[position] = language is None or language in self.languages
+
+                decision = "detected_kept" if keep[position] else "detected_dropped"
+                decisions[decision] = decisions.get(decision, 0) + 1
+
+        for decision, count in decisions.items():
+            _DECISIONS.inc(count, site=site_name, decision=decision)
+
+        kept = [record for record, keep_record in zip(records, keep) if keep_record]
+
+        if len(kept) < len(records):
+            logger.info("Dropped %d records in other languages (%d checked by langdetect)", len(records) - len(kept), len(ambiguous))
+
+        return kept
+
+    async def _detect(self, texts: List[str], executor: Optional[Executor]) -> List[Optional[str]]:
+        """Detect the language of each text, running uncached ones in batches on ``executor``."""
+
+        keys = [hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest() for text in texts]
+
+        # Taken out of the cache now: other sites' calls may evict entries while this one waits
+        known = {key: self._cache[key] for key in keys if key in self._cache}
+        missing = list({key: text[:DETECT_CHARS] for key, text in zip(keys, texts) if key not in known}.items())
+
+        loop = asyncio.get_running_loop()
+        batches = [missing[start:start + DETECT_BATCH_SIZE] for start in range(0, len(missing), DETECT_BATCH_SIZE)]
+
+        results = await asyncio.gather(*(
+            loop.run_in_executor(executor, _detect_languages, [text for _, text in batch])
+            for batch in batches
+        ))
+
+        for batch, languages in zip(batches, results):
+            for (key, _), language in zip(batch, languages):
+                known[key] = language
+
+        for key, language in known.items():
+            self._cache[key] = language
+            self._cache.move_to_end(key)
+
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+        return [known[key] for key in keys]
+
+
+def _detect_languages(texts: List[str]) -> List[Optional[str]]:
+    """Detect the language of each text, in a worker process or thread."""
+
+    languages = []
+
+    for text in texts:
+        try:
+            languages.append(detect(text))
+        except LangDetectException:
+            languages.append(None)
+
+    return languages
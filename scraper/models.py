@@ -43,3 +43,14 @@ class Article:
             categories=data.get("categories"),
             metadata=data.get("metadata"),
         )
+
+
+@dataclass
+class SiteResult:
+    """Outcome of scraping a single site."""
+
+    site_name: str
+    success: bool
+    records: int = 0
+    duration: float = 0.0
+    error: Optional[str] = None
@@ -0,0 +1,160 @@
+import hashlib
+import logging
+import re
+from typing import Dict, List, Optional, Set
+
+from vezilka_schemas import Record
+
+from store import NearDuplicateIndex
+from utils import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+_NEAR_DUPLICATES = REGISTRY.counter("scraper_near_duplicates_total", "Records found to be near-duplicates of stored ones.", ("site", "action"))
+
+NEAR_DUPLICATE_MODES = ("off", "flag", "skip")
+
+# Label added to flagged records, followed by one naming the record they repeat
+NEAR_DUPLICATE_LABEL = "near_duplicate"
+
+# Shorter texts share too many shingles by chance to be fingerprinted
+MIN_WORDS = 20
+
+_WORDS = re.compile(r"\w+")
+
+# Bit counts are summed in 16-bit lanes of one integer, one lane per fingerprint bit
+_LANE_BITS = 16
+_MAX_SHINGLES = (1 << _LANE_BITS) - 1
+
+# _SPREAD[k][value]: the bits of byte k of a hash, each moved to the low bit of its lane
+_SPREAD = [
+    [
+        sum(1 << (_LANE_BITS * (8 * k + bit)) for bit in range(8) if value >> bit & 1)
+        for value in range(256)
+    ]
+    for k in range(8)
+]
+
+
+def simhash(text: str) -> Optional[int]:
+    """
+    Return the 64-bit SimHash of the word 3-shingles of ``text``, or ``None``
+    when it has fewer than ``MIN_WORDS`` words. Texts that differ in a few
+    words get fingerprints that differ in a few bits.
+    """
+
+    words = _WORDS.findall(text.lower())
+    if len(words) < MIN_WORDS:
+        return None
+
+    shingles = min(len(words) - 2, _MAX_SHINGLES)
+    s0, s1, s2, s3, s4, s5, s6, s7 = _SPREAD
+    blake2b = hashlib.blake2b
+    lanes = 0
+
+    for i in range(shingles):
+        d = blake2b(" ".join(words[i:i + 3]).encode(), digest_size=8).digest()
+        lanes += s0[d[0]] | s1[d[1]] | s2[d[2]] | s3[d[3]] | s4[d[4]] | s5[d[5]] | s6[d[6]] | s7[d[7]]
+
+    # A bit is set when most shingle hashes have it set
+    lane_mask = (1 << _LANE_BITS) - 1
+    fingerprint = 0
+
+    for bit in range(64):
+        if 2 * (lanes >> (_LANE_BITS * bit) & lane_mask) > shingles:
+            fingerprint |= 1 << bit
+
+    return fingerprint
+
+
+class NearDuplicates:
+    """
+    Checks parsed records against the fingerprints of records stored from
+    every site, shared by all sites of a run.
+
+    In "flag" mode near-duplicates are kept and labelled with
+    ``near_duplicate`` and ``duplicate_of:{record ID}``; in "skip" mode they
+    are dropped, and their IDs are kept so the site can mark them as seen.
+    Every record kept is added to the index, so copies within one run are
+    caught too. A record never matches an earlier version of itself, and its
+    new fingerprint replaces the old one. Fingerprints only reach the index
+    file once ``saved`` reports their records as stored; ``discard`` takes
+    back those of records a site never saved.
+    """
+
+    def __init__(self, index: NearDuplicateIndex, mode: str = "flag"):
+        if mode not in NEAR_DUPLICATE_MODES[1:]:
+            raise ValueError(f"Unknown near-duplicate mode {mode!r}; choose flag or skip")
+
+        self.index = index
+        self.mode = mode
+
+        self._skipped: Dict[str, Set[str]] = {}
+        self._unsaved: Dict[str, Set[str]] = {}
+
+    def check(self, records: List[Record], site_name: str) -> List[Record]:
+        """Return the records to keep, flagging or dropping near-duplicates, and index the kept ones."""
+
+        fingerprints = [simhash(record.text) for record in records]
+        entries = [(record.id, fingerprint) for record, fingerprint in zip(records, fingerprints) if fingerprint is not None]
+
+        # Later records of this batch are compared with the kept ones before them too
+        originals = iter(self.index.find_and_add(entries, add_matches=self.mode == "flag")) if entries else iter(())
+
+        kept = []
+        duplicates = 0
+        unsaved = self._unsaved.setdefault(site_name, set())
+
+        for record, fingerprint in zip(records, fingerprints):
+            original = next(originals) if fingerprint is not None else None
+
+            if fingerprint is not None and (original is None or self.mode == "flag"):
+                unsaved.add(record.id)
+
+            if original is not None:
+                duplicates += 1
+
+                if self.mode == "skip":
+                    self._skipped.setdefault(site_name, set()).add(record.id)
+                    continue
+
+                record.meta.labels.extend([NEAR_DUPLICATE_LABEL, f"duplicate_of:{original}"])
+
+            kept.append(record)
+
+        if duplicates:
+            action = "skipped" if self.mode == "skip" else "flagged"
+            _NEAR_DUPLICATES.inc(duplicates, site=site_name, action=action)
+            logger.info("%s %d near-duplicates of stored records", action.capitalize(), duplicates)
+
+        return kept
+
+    def saved(self, records: List[Record], site_name: str) -> None:
+        """Write the fingerprints of records the store has just saved to the index file."""
+
+        unsaved = self._unsaved.get(site_name)
+        if not unsaved:
+            return
+
+        record_ids = [record.id for record in records if record.id in unsaved]
+
+        if record_ids:
+            unsaved.difference_update(record_ids)
+            self.index.commit(record_ids)
+
+    def discard(self, site_name: str) -> None:
+        """Take the fingerprints of the site's records that were checked but never saved out of the index."""
+
+        unsaved = self._unsaved.pop(site_name, None)
+
+        if unsaved:
+            self.index.discard(sorted(unsaved))
+            logger.info("Dropped the fingerprints of %d unsaved records", len(unsaved))
+
+    def pop_skipped(self, site_name: str) -> Set[str]:
+        """Return and forget the IDs of the site's records skipped as near-duplicates."""
+
+        return self._skipped.pop(site_name, set())
+
+    def close(self) -> None:
+        self.index.close()
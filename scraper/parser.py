@@ -1,65 +1,188 @@
+import asyncio
 import logging
+import time
+from concurrent.futures import Executor
 from datetime import datetime
-from typing import Any, List, Dict, Optional
-from bs4 import BeautifulSoup
-from langdetect import detect, DetectorFactory, LangDetectException
+from typing import Any, List, Dict, Optional, Tuple
 from vezilka_schemas import Record, RecordMeta, RecordType
-from html import unescape
 
-DetectorFactory.seed = 0
+from config import settings
+from utils import REGISTRY
+from .decode import RawPost
+from .extractors import create_extractor
+from .language import LanguageFilter
+from .near_duplicates import NearDuplicates
 
 logger = logging.getLogger(__name__)
 
+_PARSE_SECONDS = REGISTRY.histogram("scraper_parse_post_seconds", "Time to parse one post into a record.", ("site",))
+_POSTS_PARSED = REGISTRY.counter("scraper_posts_parsed_total", "Posts parsed into records.", ("site",))
+
 
 class Parser:
     """Class for parsing scraped data."""
 
+    # Post fields read by ``parse_post``; the fetcher only requests these
+    POST_FIELDS = ("id", "link", "title", "content", "categories", "tags")
+
     def __init__(self, site_url: str, site_name: str):
         self.site_url = site_url
         self.site_name = site_name
+        self._extractor = create_extractor(settings.html_extractor)
 
     def parse(self, raw_posts: List[Dict[str, Any]], metadata: Dict) -> List[Record]:
         """Parse a list of WordPress article dictionaries into structured Article objects."""
 
-        articles = []
         category_map = metadata.get('category_map', {})
+        tag_map = metadata.get('tag_map', {})
         batch_timestamp = datetime.now()
 
+        return self.parse_posts(raw_posts, category_map, batch_timestamp, tag_map)
+
+    async def parse_async(
+            self,
+            raw_posts: List[Dict[str, Any]],
+            metadata: Dict,
+            executor: Optional[Executor] = None,
+            chunk_size: Optional[int] = None,
+            near_duplicates: Optional[NearDuplicates] = None,
+            language_filter: Optional[LanguageFilter] = None,
+    ) -> List[Record]:
+        """
+        Parse posts in chunks on ``executor`` (typically a process pool), keeping
+        the event loop free. The result is identical to ``parse``; without an
+        executor this simply calls it. With ``language_filter``, records in other
+        languages are dropped, and with ``near_duplicates``, records that repeat
+        stored ones are flagged or dropped.
+        """
+
+        if executor is None:
+            records = self.parse(raw_posts, metadata)
+        else:
+            records = await self._parse_in_executor(raw_posts, metadata, executor, chunk_size)
+
+        # Dropped records are never fingerprinted, so they cannot shadow later copies
+        if language_filter is not None:
+            records = await language_filter.filter(records, self.site_name, executor)
+
+        if near_duplicates is not None:
+            records = near_duplicates.check(records, self.site_name)
+
+        return records
+
+    async def _parse_in_executor(
+            self,
+            raw_posts: List[Dict[str, Any]],
+            metadata: Dict,
+            executor: Executor,
+            chunk_size: Optional[int],
+    ) -> List[Record]:
+        """Parse posts in chunks of ``chunk_size`` on ``executor``."""
+
+        chunk_size = chunk_size or settings.parse_chunk_size
+        category_map = metadata.get('category_map', {})
+        tag_map = metadata.get('tag_map', {})
+        batch_timestamp = datetime.now()
+        loop = asyncio.get_running_loop()
+
+        futures = [
+            loop.run_in_executor(
+                executor,
+                _parse_chunk,
+                self.site_url,
+                self.site_name,
+                raw_posts[start:start + chunk_size],
+                category_map,
+                batch_timestamp,
+                tag_map,
+            )
+            for start in range(0, len(raw_posts), chunk_size)
+        ]
+
+        chunks = await asyncio.gather(*futures)
+
+        # Workers time their posts, but their metrics live in their own processes
+        for _, durations in chunks:
+            self._observe(durations)
+
+        return [record for records, _ in chunks for record in records]
+
+    def parse_posts(
+            self,
+            raw_posts: List[Dict[str, Any]],
+            category_map: Dict[int, str],
+            batch_timestamp: datetime,
+            tag_map: Optional[Dict[int, str]] = None,
+    ) -> List[Record]:
+        """Parse posts with explicit category and tag maps and batch timestamp, skipping ones that fail."""
+
+        articles, durations = self._parse_timed(raw_posts, category_map, batch_timestamp, tag_map)
+        self._observe(durations)
+
+        return articles
+
+    def _parse_timed(
+            self,
+            raw_posts: List[Dict[str, Any]],
+            category_map: Dict[int, str],
+            batch_timestamp: datetime,
+            tag_map: Optional[Dict[int, str]] = None,
+    ) -> Tuple[List[Record], List[float]]:
+        """Parse posts like ``parse_posts``, also returning the seconds each post took."""
+
+        articles = []
+        durations = []
+
         for post_dict in raw_posts:
+            started = time.perf_counter()
             try:
-                article = self.parse_post(post_dict, category_map, batch_timestamp)
+                article = self.parse_post(post_dict, category_map, batch_timestamp, tag_map)
                 if article is not None:
                     articles.append(article)
             except Exception as e:
                 logger.error("Error parsing post %s: %s", post_dict.get("url"), e)
                 continue
+            finally:
+                durations.append(time.perf_counter() - started)
 
-        return articles
+        return articles, durations
+
+    def _observe(self, durations: List[float]) -> None:
+        for duration in durations:
+            _PARSE_SECONDS.observe(duration, site=self.site_name)
 
-    def parse_post(self, post_dict: Dict[str, Any], category_map: Dict[int, str], timestamp: datetime) -> Optional[Record]:
-        """Parse a single WordPress post dictionary into a structured Article."""
+        _POSTS_PARSED.inc(len(durations), site=self.site_name)
 
-        id = post_dict.get("id")
-        page_url = post_dict.get("link")
-        title = post_dict.get("title", {}).get("rendered", "")
+    def parse_post(
+            self,
+            post_dict: Dict[str, Any],
+            category_map: Dict[int, str],
+            timestamp: datetime,
+            tag_map: Optional[Dict[int, str]] = None,
+    ) -> Optional[Record]:
+        """Parse a single WordPress post, as a dictionary or a ``RawPost``, into a structured Article."""
 
-        html_text = post_dict.get("content", {}).get("rendered", "")
-        clean_text = self._clean_html_text(html_text)
+        post = RawPost.of(post_dict)
 
-        # if self._is_english(f"{title}"):
-        #     return None
+        id = post.id
+        page_url = post.link
+        title = post.title
+
+        clean_text = self._clean_html_text(post.content)
 
         text = f"Наслов: {title}\n\n Текст: {clean_text}"
 
-        category_ids = post_dict.get("categories", [])
-        categories = [category_map.get(c_id, f"category_{c_id}") for c_id in category_ids]
+        categories = [category_map.get(c_id, f"category_{c_id}") for c_id in post.categories]
+
+        tag_map = tag_map or {}
+        tags = [tag_map.get(t_id, f"tag_{t_id}") for t_id in post.tags]
 
         article_id = f"{self.site_name}_{id}"
 
         meta = RecordMeta(
             source=self.site_name,
             url=page_url,
-            tags=categories,
+            tags=categories + tags,
             labels=[],
             scraped_at=timestamp,
         )
@@ -77,23 +200,17 @@ class Parser:
     def _clean_html_text(self, raw_html: str) -> str:
         """Convert HTML content into plain text by removing tags and normalizing whitespace."""
 
-        if not raw_html:
-            return ""
-
-        soup = BeautifulSoup(raw_html, "html.parser")
-        text = soup.get_text(separator=" ", strip=True)
-
-        normalized_text = " ".join(text.split())
-        return unescape(normalized_text)
+        return self._extractor.extract(raw_html)
 
-    def _is_english(self, text: str) -> bool:
-        """Check if the given text is written in English."""
 
-        if not text or text.strip() == "":
-            return False
+def _parse_chunk(
+        site_url: str,
+        site_name: str,
+        raw_posts: List[Dict[str, Any]],
+        category_map: Dict[int, str],
+        batch_timestamp: datetime,
+        tag_map: Dict[int, str],
+) -> Tuple[List[Record], List[float]]:
+    """Parse one chunk of posts inside a worker process, returning the records and per-post seconds."""
 
-        try:
-            lang = detect(text)
-            return lang == "en"
-        except LangDetectException:
-            return False
+    return Parser(site_url, site_name)._parse_timed(raw_posts, category_map, batch_timestamp, tag_map)
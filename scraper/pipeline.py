@@ -0,0 +1,165 @@
+import asyncio
+import logging
+from concurrent.futures import Executor
+from typing import Any, Dict, List, Optional, Set
+
+from vezilka_schemas import Record
+
+from config import settings
+from store import BaseStore
+from .fetcher import Fetcher
+from .content_hashes import ContentHashes
+from .high_water_mark import HighWaterMark
+from .language import LanguageFilter
+from .near_duplicates import NearDuplicates
+from .parser import Parser
+from .taxonomy import Taxonomy
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's output on its queue
+_DONE = object()
+
+
+class StreamingPipeline:
+    """
+    Fetch, parse and store stages connected by bounded queues.
+
+    Parsing starts as soon as the first page arrives and records are saved in
+    batches, so peak memory depends on the queue size and batch size rather
+    than on the size of the site.
+
+    The newest ``date`` and ``modified`` of every page that passes through
+    are recorded in ``high_water_mark``. With a ``parse_pool``, several pages
+    are parsed at once, one per pool worker. With a ``taxonomy``, terms a page
+    references but the cache lacks are fetched before it is parsed. With
+    ``language_filter``, records in other languages are dropped, and with
+    ``near_duplicates``, records repeating stored ones are flagged or dropped.
+    The content of parsed posts is recorded in ``content_hashes``.
+    """
+
+    def __init__(
+            self,
+            fetcher: Fetcher,
+            parser: Parser,
+            store: BaseStore,
+            queue_size: Optional[int] = None,
+            batch_size: Optional[int] = None,
+            high_water_mark: Optional[HighWaterMark] = None,
+            parse_pool: Optional[Executor] = None,
+            taxonomy: Optional[Taxonomy] = None,
+            language_filter: Optional[LanguageFilter] = None,
+            near_duplicates: Optional[NearDuplicates] = None,
+            content_hashes: Optional[ContentHashes] = None,
+    ):
+        self.fetcher = fetcher
+        self.parser = parser
+        self.store = store
+        self.queue_size = queue_size or settings.pipeline_queue_size
+        self.batch_size = batch_size or settings.store_batch_size
+        self.high_water_mark = high_water_mark or HighWaterMark()
+        self.parse_pool = parse_pool
+        self.taxonomy = taxonomy
+        self.language_filter = language_filter
+        self.near_duplicates = near_duplicates
+        self.content_hashes = content_hashes
+
+    async def run(
+            self,
+            metadata: Dict[str, Any],
+            seen_ids: Set[str],
+            total_pages: int,
+            start_page: int = 1,
+            total_posts: Optional[int] = None,
+    ) -> int:
+        """Run all stages to completion and return the number of records saved."""
+
+        pages: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        records: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+
+        async def fetch_stage() -> None:
+            await self.fetcher.stream_data(pages, total_pages, seen_ids, start_page, total_posts)
+            await pages.put(_DONE)
+
+        async def parse_worker() -> None:
+            while True:
+                page = await pages.get()
+
+                if page is _DONE:
+                    # Let the other parse workers see the end of input too
+                    await pages.put(_DONE)
+                    return
+
+                self.high_water_mark.observe(page)
+
+                if self.content_hashes is not None:
+                    self.content_hashes.record(page)
+
+                if self.taxonomy is not None:
+                    await self.taxonomy.resolve(page)
+
+                parsed = await self.parser.parse_async(
+                    page,
+                    metadata,
+                    executor=self.parse_pool,
+                    language_filter=self.language_filter,
+                    near_duplicates=self.near_duplicates,
+                )
+                if parsed:
+                    await records.put(parsed)
+
+        async def parse_stage() -> None:
+            workers = max(1, settings.parse_workers) if self.parse_pool is not None else 1
+            await asyncio.gather(*(parse_worker() for _ in range(workers)))
+            await records.put(_DONE)
+
+        tasks = [
+            asyncio.create_task(fetch_stage()),
+            asyncio.create_task(parse_stage()),
+            asyncio.create_task(self._store_stage(records)),
+        ]
+
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            # A failed stage would leave the others blocked on their queues
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        return results[-1]
+
+    async def _store_stage(self, records: asyncio.Queue) -> int:
+        """Save parsed records in batches of ``batch_size``."""
+
+        batch: List[Record] = []
+        saved = 0
+
+        while True:
+            parsed = await records.get()
+
+            if parsed is _DONE:
+                break
+
+            batch.extend(parsed)
+
+            if len(batch) >= self.batch_size:
+                saved += await self._flush(batch)
+                batch = []
+
+        if batch:
+            saved += await self._flush(batch)
+
+        return saved
+
+    async def _flush(self, batch: List[Record]) -> int:
+        """Write one batch to the store without blocking the event loop."""
+
+        await asyncio.to_thread(self.store.save_articles, batch)
+        logger.info("Saved batch of %d records.", len(batch))
+
+        if self.near_duplicates is not None:
+            self.near_duplicates.saved(batch, self.parser.site_name)
+
+        return len(batch)
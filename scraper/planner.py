@@ -0,0 +1,68 @@
+import math
+from dataclasses import dataclass
+
+# Largest page size the WordPress REST API allows
+TERMS_PER_PAGE = 100
+
+
+def incremental_pages(total_posts: int, known_posts: int, per_page: int, total_pages: int) -> int:
+    """
+    Return how many leading pages an incremental run needs: those holding the
+    posts published since the last run, up to the page where seen posts start.
+
+    Posts are listed newest first, so the ``total_posts - known_posts`` new
+    posts fill the first pages. Deleted posts make this an underestimate,
+    which the fetcher catches by walking on while no seen post has turned up.
+    """
+
+    new_posts = max(0, total_posts - known_posts)
+    return max(1, min(total_pages, new_posts // per_page + 1))
+
+
+def page_count(total_items: int, per_page: int) -> int:
+    """Return the number of pages the REST API splits ``total_items`` into."""
+
+    return max(1, math.ceil(total_items / per_page))
+
+
+@dataclass
+class FetchPlan:
+    """The requests a run is expected to make for one site."""
+
+    site_name: str
+    mode: str
+    total_posts: int
+    new_posts: int
+    post_requests: int
+    term_requests: int = 0
+    probe_requests: int = 0
+
+    @property
+    def requests(self) -> int:
+        """Total requests, counting the bootstrap request that reads the page count."""
+
+        return 1 + self.post_requests + self.term_requests + self.probe_requests
+
+
+class PrefetchWindow:
+    """
+    How many pages an incremental walk keeps in flight ahead of the page
+    being checked.
+
+    After each walk the size moves halfway towards the number of pages the
+    walk actually needed: walks that overshoot (requesting pages past the one
+    that stopped them) shrink it, and walks that outgrow it let it grow. Once
+    it covers a site's usual walk, new posts arrive in about one round trip.
+    """
+
+    def __init__(self, size: int, max_size: int):
+        self.max_size = max(1, max_size)
+        self.size = min(max(1, size), self.max_size)
+
+        self.overshoot = 0
+
+    def record(self, needed: int, overshoot: int) -> None:
+        """Adapt to a finished walk that needed ``needed`` pages and requested ``overshoot`` more."""
+
+        self.overshoot += overshoot
+        self.size = min(max(1, round((self.size + needed) / 2)), self.max_size)
@@ -0,0 +1,84 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from store import CheckpointStore
+from .planner import page_count
+
+
+class FirstRunProgress:
+    """
+    Saved pages of a site's first run, kept in its checkpoint until the run
+    completes, so an interrupted run resumes with the pages still missing.
+
+    Posts are listed newest first, so posts published between two attempts
+    shift every page. Progress is therefore recorded as ranges of post
+    positions counted from the oldest post, which new posts do not move,
+    and mapped back to the current pages using ``X-WP-Total``.
+    """
+
+    KEY = "first_run"
+
+    def __init__(self, store: CheckpointStore, checkpoint: Optional[Dict[str, Any]] = None):
+        self.store = store
+
+        state = (checkpoint if checkpoint is not None else store.load()).get(self.KEY)
+
+        # Whether an earlier attempt was interrupted after saving some posts
+        self.resumed = state is not None
+        self._saved: List[List[int]] = [list(span) for span in state["saved"]] if state else []
+
+    @property
+    def saved_posts(self) -> int:
+        return sum(end - start for start, end in self._saved)
+
+    def pending_pages(self, total_posts: int, per_page: int) -> List[int]:
+        """Return the current pages that hold any post not saved yet."""
+
+        return [
+            page for page in range(1, page_count(total_posts, per_page) + 1)
+            if not self._covers(*self._span(page, total_posts, per_page))
+        ]
+
+    def start(self) -> None:
+        """Record that a first run is under way, before anything is saved."""
+
+        if not self.resumed:
+            self.store.update(**{self.KEY: {"saved": []}})
+
+    def complete(self, pages: List[int], total_posts: int, per_page: int) -> None:
+        """Record pages whose posts are all saved."""
+
+        for page in pages:
+            self._add(*self._span(page, total_posts, per_page))
+
+        self.store.update(**{self.KEY: {"saved": self._saved}})
+
+    def finish(self) -> None:
+        """Drop the progress once every page has been saved."""
+
+        checkpoint = self.store.load()
+        checkpoint.pop(self.KEY, None)
+        self.store.save(checkpoint)
+
+    @staticmethod
+    def _span(page: int, total_posts: int, per_page: int) -> Tuple[int, int]:
+        """Return the positions, counted from the oldest post, of the posts on a page."""
+
+        first = (page - 1) * per_page
+        last = min(page * per_page, total_posts)
+
+        return max(0, total_posts - last), max(0, total_posts - first)
+
+    def _covers(self, start: int, end: int) -> bool:
+        return start >= end or any(saved_start <= start and end <= saved_end for saved_start, saved_end in self._saved)
+
+    def _add(self, start: int, end: int) -> None:
+        spans = sorted([*self._saved, [start, end]])
+        merged: List[List[int]] = []
+
+        for span_start, span_end in spans:
+            if merged and span_start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], span_end)
+            else:
+                merged.append([span_start, span_end])
+
+        self._saved = merged
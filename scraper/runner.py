@@ -1,46 +1,406 @@
+import asyncio
+import json
 import logging
-from typing import List
+import multiprocessing
+import queue
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime
+from multiprocessing.managers import BaseManager
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
+import aiohttp
+
+from config import ScraperSettings, StoreSettings, settings, setup_logging, store_settings
+from store import NearDuplicateIndex, StoreFactory
+from utils import REGISTRY, AdaptiveConcurrency
+from .connection_pool import ConnectionPool
+from .context import ScrapeContext
+from .http_cache import HttpCache
+from .language import LanguageFilter
+from .near_duplicates import NearDuplicates
+from .models import SiteResult
+from .planner import FetchPlan
+from .scheduler import SiteScheduler
 from .scraper import Scraper
 
 logger = logging.getLogger(__name__)
 
+# Messages site worker processes send back
+_SITE_FINISHED = "site"
+_WORKER_FINISHED = "worker"
+
+# How often the parent checks that workers are still alive while waiting for results
+_POLL_SECONDS = 1.0
+
 
-async def run_scrapers(scrapers: List[Scraper]) -> None:
-    """Run multiple scrapers sequentially and report success/failure."""
+async def run_scrapers(scrapers: List[Scraper], trace_configs: Optional[List[aiohttp.TraceConfig]] = None) -> List[SiteResult]:
+    """
+    Run multiple scrapers concurrently and report success/failure.
+
+    ``trace_configs`` are attached to the shared session. With
+    ``site_processes`` above 1, sites are spread over that many worker
+    processes instead, and their results are collected here.
+    """
 
     logger.info("=" * 80)
-    logger.info("STARTING MULTI-SITE SCRAPER")
+    logger.info("SCRAPING STARTED")
     logger.info("=" * 80)
+
     logger.info("Total sites to scrape: %d", len(scrapers))
 
-    successful = 0
-    failed = []
+    if settings.site_processes > 1:
+        if trace_configs:
+            raise ValueError("trace_configs cannot be passed to site worker processes; set site_processes to 0 or 1")
 
-    for idx, scraper in enumerate(scrapers):
-        logger.info("Processing site %d/%d: %s", idx, len(scrapers), scraper.site_name)
+        results = await _run_in_processes(scrapers, settings.site_processes)
+    else:
+        async with _open_context([scraper.site_url for scraper in scrapers], trace_configs) as context:
+            results = await SiteScheduler(max_requests_per_host=_per_host_limit(context.concurrency)).run(scrapers, context)
 
-        try:
-            await scraper.run()
-            successful += 1
-            logger.info("Successfully scraped: %s", scraper.site_name)
-        except KeyboardInterrupt:
-            logger.warning("Scraping interrupted at site: %s", scraper.site_name)
-            return
-        except Exception as e:
-            logger.error("✗ Failed to scrape %s: %s", scraper.site_name, e, exc_info=True)
-            failed.append(scraper.site_name)
-            continue
+    successful = sum(1 for result in results if result.success)
+    failed = [result.site_name for result in results if not result.success]
 
     logger.info("=" * 80)
     logger.info("SCRAPING COMPLETED")
-    logger.info("")
+    logger.info("=" * 80)
+
     logger.info("Successfully scraped: %d/%d sites", successful, len(scrapers))
 
     if failed:
         logger.warning("Failed sites (%d): %s", len(failed), ", ".join(failed))
 
-    logger.info("=" * 80)
+    return results
+
+
+async def plan_scrapers(scrapers: List[Scraper]) -> List[Optional[FetchPlan]]:
+    """Log the requests a run is expected to make per site, without fetching any posts."""
+
+    async with ConnectionPool() as pool:
+        context = ScrapeContext(session=pool.session)
+        plans = await asyncio.gather(*(scraper.plan(context) for scraper in scrapers), return_exceptions=True)
+
+    logger.info("%-30s %-14s %10s %10s %9s", "Site", "Mode", "Posts", "New", "Requests")
+
+    for scraper, plan in zip(scrapers, plans):
+        if isinstance(plan, BaseException):
+            logger.error("%-30s planning failed: %s", scraper.site_name, plan)
+        elif plan is None:
+            logger.info("%-30s %-14s %10s %10s %9s", scraper.site_name, "unknown", "-", "-", "-")
+        else:
+            logger.info("%-30s %-14s %10d %10d %9d", plan.site_name, plan.mode, plan.total_posts, plan.new_posts, plan.requests)
+
+    plans = [plan if isinstance(plan, FetchPlan) else None for plan in plans]
+    logger.info("Expected requests in total: %d", sum(plan.requests for plan in plans if plan is not None))
+
+    return plans
+
+
+def write_run_report(results: List[SiteResult], path: str, started_at: datetime) -> None:
+    """Write the outcome of each site and a snapshot of the metrics registry as JSON."""
+
+    duration = (datetime.now() - started_at).total_seconds()
+    records = sum(result.records for result in results)
+
+    report = {
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "duration": round(duration, 3),
+        "records": records,
+        "records_per_sec": round(records / duration, 1) if duration else 0.0,
+        "sites": [
+            {
+                "site_name": result.site_name,
+                "success": result.success,
+                "records": result.records,
+                "duration": round(result.duration, 3),
+                "records_per_sec": round(result.records / result.duration, 1) if result.duration else 0.0,
+                "error": result.error,
+            }
+            for result in results
+        ],
+        "metrics": REGISTRY.snapshot(),
+    }
+
+    report_path = Path(path)
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+
+    with report_path.open("w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    logger.info("Run report written to %s", report_path)
+
+
+@asynccontextmanager
+async def _open_context(
+        site_urls: List[str],
+        trace_configs: Optional[List[aiohttp.TraceConfig]] = None,
+        near_duplicate_index: Optional[NearDuplicateIndex] = None,
+        save_limits: bool = True,
+) -> AsyncIterator[ScrapeContext]:
+    """
+    Create the resources shared by the sites of this process and close them
+    on exit. A ``near_duplicate_index`` given by the caller is used instead
+    of opening one and is left open. Learned per-host limits are saved
+    unless ``save_limits`` is false.
+    """
+
+    # One worker pool serves every site, so its start-up cost is paid once per run
+    parse_pool = ProcessPoolExecutor(max_workers=settings.parse_workers) if settings.parse_workers > 0 else None
+
+    concurrency = _load_concurrency() if settings.adaptive_concurrency else None
+    http_cache = HttpCache(
+        settings.http_cache_path,
+        settings.http_cache_max_bytes,
+        settings.http_cache_ttls,
+        settings.http_cache_revalidate,
+    ) if settings.http_cache else None
+    near_duplicates = _load_near_duplicates(near_duplicate_index)
+
+    try:
+        async with ConnectionPool(limit_per_host=_per_host_limit(concurrency), trace_configs=trace_configs) as pool:
+            if settings.prewarm_connections and site_urls:
+                await pool.warm_up(site_urls)
+
+            yield ScrapeContext(
+                session=pool.session,
+                parse_pool=parse_pool,
+                concurrency=concurrency,
+                http_cache=http_cache,
+                language_filter=_create_language_filter(),
+                near_duplicates=near_duplicates,
+            )
+    finally:
+        if parse_pool is not None:
+            parse_pool.shutdown()
+
+        if concurrency is not None:
+            _log_concurrency(concurrency)
+
+            if save_limits:
+                StoreFactory.create_host_limits().update(**concurrency.snapshot())
+
+        if http_cache is not None:
+            logger.info(
+                "HTTP cache: %d hits, %d revalidated, %d misses, %d evicted",
+                http_cache.hits,
+                http_cache.revalidations,
+                http_cache.misses,
+                http_cache.evictions,
+            )
+            http_cache.close()
+
+        # An index given by the caller is shared with other processes and closed by its owner
+        if near_duplicates is not None and near_duplicate_index is None:
+            near_duplicates.close()
+
+
+def _per_host_limit(concurrency: Optional[AdaptiveConcurrency]) -> Optional[int]:
+    """Adaptive limits take the place of the fixed per-host caps and grow up to ``max_requests_per_host``."""
+
+    return settings.max_requests_per_host if concurrency is not None else None
+
+
+def _create_language_filter() -> Optional[LanguageFilter]:
+    """Create the language filter shared by every site, unless it is turned off."""
+
+    if not settings.language_filter:
+        return None
+
+    return LanguageFilter(settings.languages, settings.cyrillic_keep_ratio, settings.cyrillic_drop_ratio)
+
+
+def _load_near_duplicates(index: Optional[NearDuplicateIndex] = None) -> Optional[NearDuplicates]:
+    """
+    Check records against ``index``, or the fingerprint index shared by
+    every site when none is given, unless near-duplicate detection is off.
+    """
+
+    if settings.near_duplicates == "off":
+        return None
+
+    if index is None:
+        index = _open_near_duplicate_index()
+
+    return NearDuplicates(index, settings.near_duplicates)
+
+
+def _open_near_duplicate_index() -> NearDuplicateIndex:
+    return StoreFactory.create_near_duplicate_index(settings.near_duplicate_distance)
+
+
+def _load_concurrency() -> AdaptiveConcurrency:
+    """Create the per-host adaptive limits, starting from those learned by previous runs."""
+
+    return AdaptiveConcurrency(
+        initial_limit=settings.adaptive_initial_concurrency,
+        min_limit=settings.adaptive_min_concurrency,
+        max_limit=settings.max_requests_per_host,
+        decrease=settings.adaptive_decrease_factor,
+        latency_tolerance=settings.adaptive_latency_tolerance,
+        learned_limits=StoreFactory.create_host_limits().load(),
+    )
+
+
+def _log_concurrency(concurrency: AdaptiveConcurrency) -> None:
+    """Log how the limit of each host contacted in this process changed."""
+
+    for host, host_concurrency in concurrency.hosts.items():
+        logger.info(
+            "Concurrency limit for %s: %.1f -> %.1f (%d responses, %d overloads)",
+            host,
+            host_concurrency.initial_limit,
+            host_concurrency.limit,
+            host_concurrency.successes,
+            host_concurrency.overloads,
+        )
+
+
+class _IndexManager(BaseManager):
+    """Serves the near-duplicate index to site worker processes from a process of its own."""
+
+
+_IndexManager.register("NearDuplicateIndex", _open_near_duplicate_index)
+
+
+async def _run_in_processes(scrapers: List[Scraper], processes: int) -> List[SiteResult]:
+    """
+    Run the scrapers in ``processes`` worker processes, each with its own
+    event loop, connection pool and parse pool, and return one result per
+    site, in input order.
+
+    Sites are handed out one at a time through a shared queue: whenever a
+    site slot in any worker frees up, it takes the next site, so workers
+    that draw small sites go on to take more. The near-duplicate index is
+    served to every worker by a manager process. Metrics of each worker are
+    merged into this process's registry when it finishes, and the per-host
+    limits they learned are saved once. Sites a crashed worker did not
+    finish are reported as failed.
+    """
+
+    sites = [(scraper.site_name, scraper.site_url) for scraper in scrapers]
+    processes = min(processes, len(sites))
+
+    if not processes:
+        return []
+
+    # Fresh interpreters: forking would copy the running event loop and open connections
+    mp_context = multiprocessing.get_context("spawn")
+    state = (settings, store_settings)
+
+    tasks = mp_context.Queue()
+    for index in range(len(sites)):
+        tasks.put(index)
+    tasks.put(None)
+
+    messages = mp_context.Queue()
+
+    manager = None
+    near_duplicate_index = None
+
+    if settings.near_duplicates != "off":
+        manager = _IndexManager(ctx=mp_context)
+        manager.start(_apply_settings, state)
+        near_duplicate_index = manager.NearDuplicateIndex()
+
+    workers = [
+        mp_context.Process(
+            target=_site_worker,
+            args=(processes, state, sites, tasks, messages, near_duplicate_index),
+            name=f"site-worker-{number}",
+        )
+        for number in range(1, processes + 1)
+    ]
+
+    logger.info("Scraping in %d worker processes", processes)
+
+    results: Dict[str, SiteResult] = {}
+    learned_limits: Dict[str, float] = {}
+    finished = 0
+    loop = asyncio.get_running_loop()
+
+    try:
+        for worker in workers:
+            worker.start()
+
+        while finished < len(workers):
+            try:
+                kind, *payload = await loop.run_in_executor(None, messages.get, True, _POLL_SECONDS)
+            except queue.Empty:
+                if not any(worker.is_alive() for worker in workers):
+                    break
+                continue
+
+            if kind == _SITE_FINISHED:
+                result, = payload
+                results[result.site_name] = result
+            else:
+                exported, limits = payload
+                REGISTRY.merge(exported)
+                learned_limits.update(limits)
+                finished += 1
+    finally:
+        for worker in workers:
+            if finished < len(workers) and worker.is_alive():
+                worker.terminate()
+            if worker.pid is not None:
+                worker.join()
+
+        if manager is not None:
+            near_duplicate_index.close()
+            manager.shutdown()
+
+    if learned_limits:
+        StoreFactory.create_host_limits().update(**learned_limits)
+
+    if finished < len(workers):
+        logger.error("%d of %d worker processes exited before finishing", len(workers) - finished, len(workers))
+
+    return [results.get(site_name) or SiteResult(site_name, False, error="worker process exited") for site_name, _ in sites]
+
+
+def _site_worker(processes: int, state: Tuple[ScraperSettings, StoreSettings], sites: List[Tuple[str, str]], tasks, messages, near_duplicate_index) -> None:
+    """Entry point of a site worker process: scrape sites taken from ``tasks`` until none are left."""
+
+    # An interrupted run is stopped by the parent, which terminates its workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    _apply_settings(*state)
+
+    # Each worker has its own rate limiters, so the global rate is shared out between them
+    if settings.global_requests_per_second:
+        settings.global_requests_per_second /= processes
+
+    setup_logging()
+    asyncio.run(_run_worker(sites, tasks, messages, near_duplicate_index))
+
+
+async def _run_worker(sites: List[Tuple[str, str]], tasks, messages, near_duplicate_index) -> None:
+    loop = asyncio.get_running_loop()
+
+    async def take() -> Optional[Scraper]:
+        index = await loop.run_in_executor(None, tasks.get)
+
+        if index is None:
+            # Let the other site slots and workers see the end of input too
+            tasks.put(None)
+            return None
+
+        site_name, site_url = sites[index]
+        return Scraper(site_url=site_url, site_name=site_name)
+
+    async with _open_context([], near_duplicate_index=near_duplicate_index, save_limits=False) as context:
+        scheduler = SiteScheduler(max_requests_per_host=_per_host_limit(context.concurrency))
+        await scheduler.run_from(take, context, on_result=lambda result: messages.put((_SITE_FINISHED, result)))
+
+    limits = context.concurrency.snapshot() if context.concurrency is not None else {}
+    messages.put((_WORKER_FINISHED, REGISTRY.export(), limits))
 
 
+def _apply_settings(scraper_settings: ScraperSettings, storage_settings: StoreSettings) -> None:
+    """Copy settings from the parent process, including those changed at run time, into this one."""
 
+    for target, source in ((settings, scraper_settings), (store_settings, storage_settings)):
+        for name in type(source).model_fields:
+            setattr(target, name, getattr(source, name))
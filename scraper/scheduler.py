@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, List, Optional
+
+from config import settings
+from utils import RateLimits, RequestBudget
+from .context import ScrapeContext
+from .models import SiteResult
+from .scraper import Scraper
+
+logger = logging.getLogger(__name__)
+
+
+class SiteScheduler:
+    """
+    Runs several site scrapers at once while keeping the total number of
+    in-flight requests, and the number of requests per host, under control.
+    """
+
+    def __init__(
+            self,
+            max_concurrent_sites: Optional[int] = None,
+            max_inflight_requests: Optional[int] = None,
+            max_requests_per_host: Optional[int] = None,
+            site_timeout: Optional[float] = None,
+    ):
+        self.max_concurrent_sites = max_concurrent_sites or settings.max_concurrent_sites
+        self.max_inflight_requests = max_inflight_requests or settings.max_inflight_requests
+        self.max_requests_per_host = max_requests_per_host or settings.max_requests_per_host
+        self.site_timeout = site_timeout or settings.site_timeout
+
+    async def run(self, scrapers: List[Scraper], context: Optional[ScrapeContext] = None) -> List[SiteResult]:
+        """
+        Run all scrapers and return one result per site, in input order.
+        Shared resources come from ``context``; a request budget and rate
+        limits are added if it has none.
+        """
+
+        context = self._prepare(context)
+        site_slots = asyncio.Semaphore(self.max_concurrent_sites)
+
+        async def run_with_slot(idx: int, scraper: Scraper) -> SiteResult:
+            async with site_slots:
+                logger.info(" ")
+                logger.info("Processing site %d/%d: %s", idx, len(scrapers), scraper.site_name)
+                return await self._run_site(scraper, context)
+
+        tasks = [run_with_slot(idx, scraper) for idx, scraper in enumerate(scrapers, start=1)]
+        return list(await asyncio.gather(*tasks))
+
+    async def run_from(
+            self,
+            take: Callable[[], Awaitable[Optional[Scraper]]],
+            context: Optional[ScrapeContext] = None,
+            on_result: Optional[Callable[[SiteResult], None]] = None,
+    ) -> List[SiteResult]:
+        """
+        Run scrapers as ``take`` hands them out, until it returns ``None``, and
+        return their results in the order they finished. Each free site slot
+        takes the next scraper, so sites can come from a queue shared with
+        other processes. Every result is also passed to ``on_result`` as soon
+        as the site finishes.
+        """
+
+        context = self._prepare(context)
+        results = []
+
+        async def run_slot() -> None:
+            while True:
+                scraper = await take()
+                if scraper is None:
+                    return
+
+                logger.info(" ")
+                logger.info("Processing site: %s", scraper.site_name)
+                result = await self._run_site(scraper, context)
+
+                results.append(result)
+                if on_result is not None:
+                    on_result(result)
+
+        await asyncio.gather(*(run_slot() for _ in range(self.max_concurrent_sites)))
+        return results
+
+    def _prepare(self, context: Optional[ScrapeContext]) -> ScrapeContext:
+        """Return ``context``, or a new one, with a request budget and rate limits added if it has none."""
+
+        context = context or ScrapeContext()
+        if context.budget is None:
+            context.budget = RequestBudget(self.max_inflight_requests, self.max_requests_per_host)
+        if context.rate_limits is None:
+            context.rate_limits = RateLimits(
+                settings.requests_per_second,
+                burst=settings.rate_limit_burst,
+                global_rate=settings.global_requests_per_second,
+            )
+
+        return context
+
+    async def _run_site(self, scraper: Scraper, context: ScrapeContext) -> SiteResult:
+        """Run a single scraper, enforcing the per-site deadline if one is configured."""
+
+        started = time.monotonic()
+
+        try:
+            if self.site_timeout:
+                records = await asyncio.wait_for(scraper.run(context), timeout=self.site_timeout)
+            else:
+                records = await scraper.run(context)
+
+            return SiteResult(scraper.site_name, True, records=records, duration=time.monotonic() - started)
+
+        except asyncio.TimeoutError as e:
+            duration = time.monotonic() - started
+
+            # Request timeouts that exhausted their retries surface as the same exception type
+            if self.site_timeout and duration >= self.site_timeout:
+                logger.error("Scraping %s exceeded the %.0fs deadline.", scraper.site_name, self.site_timeout)
+                return SiteResult(scraper.site_name, False, duration=duration, error="deadline exceeded")
+
+            logger.error("Failed to scrape %s: %s", scraper.site_name, e, exc_info=True)
+            return SiteResult(scraper.site_name, False, duration=duration, error=repr(e))
+
+        except Exception as e:
+            logger.error("Failed to scrape %s: %s", scraper.site_name, e, exc_info=True)
+            return SiteResult(scraper.site_name, False, duration=time.monotonic() - started, error=repr(e))
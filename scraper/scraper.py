@@ -1,13 +1,30 @@
+import asyncio
 import logging
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional, Set
 import aiohttp
+from vezilka_schemas import Record
 
+from config import settings
+from .content_hashes import ContentHashes
+from .context import ScrapeContext
 from .fetcher import Fetcher
+from .high_water_mark import HighWaterMark, query_floor
+from .near_duplicates import NearDuplicates
 from .parser import Parser
+from .pipeline import StreamingPipeline
+from .progress import FirstRunProgress
+from .planner import TERMS_PER_PAGE, FetchPlan, incremental_pages, page_count
+from .taxonomy import Taxonomy
 from .http_client import HttpClient
 from store import StoreFactory
+from utils import StageProfiler
 
 logger = logging.getLogger(__name__)
 
+# Stands in for a stage when profiling is off
+_UNPROFILED = nullcontext()
+
 
 class Scraper:
     """Class for orchestrating the scraping workflow for a single website"""
@@ -18,47 +35,517 @@ class Scraper:
 
         self._parser = Parser(self.site_url, self.site_name)
         self._store = StoreFactory.create(self.site_name)
+        self._checkpoint = StoreFactory.create_checkpoint(self.site_name)
+        self._taxonomy_store = StoreFactory.create_taxonomy(self.site_name)
+        self._content_hash_store = StoreFactory.create_content_hashes(self.site_name)
+        self._profiler: Optional[StageProfiler] = None
 
-    async def run(self):
+    async def run(self, context: Optional[ScrapeContext] = None) -> int:
         """
         Execute the full scraping pipeline by loading previously seen IDs,
         fetching site metadata and raw post data, parsing them into structured
         Article objects, and saving any new records. The process ensures duplicates
         are skipped and all results are persisted to the data store.
+
+        Resources shared between sites (such as the request budget) are taken
+        from ``context`` when given. Returns the number of records saved.
         """
 
+        context = context or ScrapeContext()
+
+        if settings.profile_stages:
+            self._profiler = StageProfiler(
+                self.site_name,
+                settings.profile_dir,
+                cprofile=settings.profile_cprofile,
+                trace_allocations=settings.profile_tracemalloc,
+                top_n=settings.profile_top_n,
+            )
+
         logger.info("=" * 80)
         logger.info("Starting scraper for %s", self.site_url)
         logger.info("=" * 80)
 
-        async with aiohttp.ClientSession() as session:
-            http_client = HttpClient(session=session)
-            fetcher = Fetcher(self.site_url, self.site_name, http_client)
+        try:
+            saved = await self._run(context)
+        finally:
+            # Fingerprints of records that were checked but not saved must not match later copies
+            if context.near_duplicates is not None:
+                context.near_duplicates.discard(self.site_name)
+
+            if self._profiler is not None:
+                logger.info("Stages of %s: %s", self.site_name, self._profiler.summary())
+                logger.info("Stage profile written to %s", self._profiler.write())
+
+        logger.info("=" * 80)
+        logger.info("Scraping completed for %s", self.site_url)
+        logger.info("=" * 80)
+
+        return saved
+
+    async def _run(self, context: ScrapeContext) -> int:
+        """Scrape the site with the shared resources of ``context``; see ``run``."""
+
+        async with self._session(context) as session:
+            http_client = HttpClient(
+                session=session,
+                budget=context.budget,
+                concurrency=context.concurrency,
+                rate_limits=context.rate_limits,
+                cache=context.http_cache,
+                site_name=self.site_name,
+            )
+            checkpoint = self._checkpoint.load()
+            fetcher = Fetcher(
+                self.site_url,
+                self.site_name,
+                http_client,
+                post_fields=self._post_fields(),
+                prefetch_window=checkpoint.get("prefetch_window"),
+            )
 
             logger.info("Loading previously seen IDs...")
-            seen_ids = self._store.load_seen_ids()
+            with self._stage("load_seen_ids"):
+                seen_ids = self._store.load_seen_ids()
             logger.info("Loaded %d previously seen IDs", len(seen_ids))
 
+            high_water_mark = HighWaterMark(checkpoint)
+            content_hashes = ContentHashes(self.site_name, self._content_hash_store) if settings.content_hashes else None
+            progress = FirstRunProgress(self._checkpoint, checkpoint)
+            saved = None
+
+            # An interrupted first run is finished before anything else. New first runs are only resumable on
+            # appending stores, and leave the first run to the streaming pipeline when that is on.
+            resumable = progress.resumed or (
+                settings.resumable_first_run
+                and not settings.streaming_pipeline
+                and self._store.appends
+                and not seen_ids
+            )
+            changed_since = not resumable and settings.high_water_mark_sync and seen_ids and high_water_mark.modified
+
+            # Changed-since runs need no page count, so the bootstrap page is only fetched if the site rejects their query.
+            # Otherwise the page count and any uncached taxonomies do not depend on each other.
+            # Resumed first runs read the counts from a single post, as page 1 may be saved already.
             logger.info("Fetching metadata...")
-            metadata = await fetcher.fetch_metadata()
+            taxonomy = Taxonomy(fetcher, self._taxonomy_store)
+            with self._stage("metadata"):
+                if changed_since:
+                    metadata: Dict[str, Any] = {}
+                    await taxonomy.load()
+                else:
+                    metadata, _ = await asyncio.gather(fetcher.fetch_metadata(first_page=not progress.resumed), taxonomy.load())
+
+            metadata["category_map"] = taxonomy.category_map
+            metadata["tag_map"] = taxonomy.tag_map
+
+            if resumable and metadata["total_posts"] is not None:
+                saved = await self._run_resumable(fetcher, context, seen_ids, metadata, high_water_mark, taxonomy, content_hashes, progress)
+            elif changed_since:
+                saved = await self._run_changed_since(fetcher, context, seen_ids, metadata, high_water_mark, taxonomy, content_hashes)
+
+            if saved is None:
+                # Page walks start at page 1, which comes with the page count unless that was requested already
+                with self._stage("metadata"):
+                    metadata.update(await fetcher.fetch_metadata())
+
+            if saved is None and settings.streaming_pipeline:
+                saved = await self._run_streaming(fetcher, context, seen_ids, metadata, high_water_mark, taxonomy, content_hashes)
+            elif saved is None:
+                saved = await self._run_batch(fetcher, context, seen_ids, metadata, high_water_mark, taxonomy, content_hashes)
+
+            taxonomy.save()
+
+            if content_hashes is not None:
+                content_hashes.save()
+                self._content_hash_store.close()
+
+            if context.near_duplicates is not None:
+                self._mark_skipped_seen(context.near_duplicates)
+
+            # Only reached once everything fetched has been saved
+            if high_water_mark.advanced:
+                self._checkpoint.update(**high_water_mark.as_dict())
+                logger.info("Advanced sync checkpoint to modified=%s", high_water_mark.modified)
+
+            if fetcher.prefetch.size != checkpoint.get("prefetch_window", settings.prefetch_window):
+                self._checkpoint.update(prefetch_window=fetcher.prefetch.size)
+                logger.info("Prefetch window for %s is now %d pages", self.site_name, fetcher.prefetch.size)
+
+            self._log_transfer(http_client, fetcher)
+
+        return saved
+
+    async def _run_changed_since(
+            self,
+            fetcher: Fetcher,
+            context: ScrapeContext,
+            seen_ids: Set[str],
+            metadata: Dict[str, Any],
+            high_water_mark: HighWaterMark,
+            taxonomy: Taxonomy,
+            content_hashes: Optional[ContentHashes],
+    ) -> Optional[int]:
+        """
+        Fetch only the posts created or modified since the last checkpoint,
+        saving new posts and replacing updated ones whose content changed. Returns ``None`` when the
+        site does not support the query, so the caller falls back to paging.
+        """
+
+        last_modified = high_water_mark.modified
+
+        logger.info("Fetching posts changed since %s...", last_modified)
+        with self._stage("fetch"):
+            raw_data = await fetcher.fetch_modified_since(query_floor(last_modified))
+
+        if raw_data is None:
+            return None
+
+        high_water_mark.observe(raw_data)
+
+        new_posts = [post for post in raw_data if f"{self.site_name}_{post.get('id')}" not in seen_ids]
+
+        # Seen posts no newer than the checkpoint only came back because of the query overlap
+        updated_posts = [
+            post for post in raw_data
+            if f"{self.site_name}_{post.get('id')}" in seen_ids and post.get("modified", "") > last_modified
+        ]
+
+        if content_hashes is not None:
+            content_hashes.record(new_posts)
+            updated_posts = content_hashes.changed(updated_posts)
+
+        logger.info("Parsing data...")
+        with self._stage("parse"):
+            await taxonomy.resolve(raw_data)
+            new_records = await self._parse(new_posts, metadata, context)
+            updated_records = await self._parse(updated_posts, metadata, context)
+        logger.info("Parsed %d new and %d updated records", len(new_records), len(updated_records))
+
+        if new_records:
+            logger.info("Saving %d new records...", len(new_records))
+            with self._stage("save"):
+                self._store.save_articles(new_records)
+            self._index_saved(new_records, context)
+
+        if updated_records:
+            logger.info("Updating %d modified records...", len(updated_records))
+            with self._stage("save"):
+                self._store.update_articles(updated_records)
+            self._index_saved(updated_records, context)
+
+        if not new_records and not updated_records:
+            logger.info("No new records to save")
+
+        return len(new_records) + len(updated_records)
+
+    async def _run_resumable(
+            self,
+            fetcher: Fetcher,
+            context: ScrapeContext,
+            seen_ids: Set[str],
+            metadata: Dict[str, Any],
+            high_water_mark: HighWaterMark,
+            taxonomy: Taxonomy,
+            content_hashes: Optional[ContentHashes],
+            progress: FirstRunProgress,
+    ) -> int:
+        """
+        Fetch the pages of a first run concurrently and save their records in
+        batches as pages finish, recording the saved pages in the checkpoint.
+        An interrupted run is resumed with the missing pages only.
+        """
+
+        total_posts = metadata["total_posts"]
+        per_page = settings.posts_per_page
+        pages = progress.pending_pages(total_posts, per_page)
+
+        if progress.resumed:
+            logger.info("Resuming first run: %d posts saved before, %d pages missing", progress.saved_posts, len(pages))
+
+        progress.start()
+
+        # A crash between writing records and seen IDs leaves saved posts unmarked, so resumed runs upsert
+        write = self._store.update_articles if progress.resumed else self._store.save_articles
+
+        batch: List[Record] = []
+        batch_pages: List[int] = []
+        failed_pages: List[int] = []
+        fetched_ids: Set[str] = set()
+        saved = 0
+
+        async def flush() -> None:
+            nonlocal batch, batch_pages, saved
+
+            if batch:
+                with self._stage("save"):
+                    await asyncio.to_thread(write, batch)
+                self._index_saved(batch, context)
+                saved += len(batch)
+
+            progress.complete(batch_pages, total_posts, per_page)
+            logger.info("Saved %d records from %d pages", len(batch), len(batch_pages))
+
+            batch, batch_pages = [], []
 
-            logger.info("Fetching raw data...")
+        fetched_pages = fetcher.iter_pages_concurrent(pages)
+
+        try:
+            while True:
+                # Time spent waiting for the next page to finish
+                with self._stage("fetch"):
+                    fetched = await anext(fetched_pages, None)
+
+                if fetched is None:
+                    break
+
+                page, items = fetched
+                if items is None:
+                    failed_pages.append(page)
+                    continue
+
+                high_water_mark.observe(items)
+
+                # Posts shifted onto this page since an earlier attempt may be saved already
+                new_posts = []
+                for post in items:
+                    post_id = f"{self.site_name}_{post.get('id')}"
+                    if post_id not in seen_ids and post_id not in fetched_ids:
+                        fetched_ids.add(post_id)
+                        new_posts.append(post)
+
+                if content_hashes is not None:
+                    content_hashes.record(new_posts)
+
+                with self._stage("parse"):
+                    await taxonomy.resolve(new_posts)
+                    batch.extend(await self._parse(new_posts, metadata, context))
+                batch_pages.append(page)
+
+                if len(batch) >= settings.store_batch_size:
+                    await flush()
+        finally:
+            await fetched_pages.aclose()
+
+        if batch_pages:
+            await flush()
+
+        if failed_pages:
+            logger.warning("Failed to fetch %d pages - the next run resumes with them", len(failed_pages))
+        else:
+            progress.finish()
+
+        if saved:
+            logger.info("Successfully saved %d records", saved)
+        else:
+            logger.info("No new records to save")
+
+        return saved
+
+    async def _run_batch(
+            self,
+            fetcher: Fetcher,
+            context: ScrapeContext,
+            seen_ids: Set[str],
+            metadata: Dict[str, Any],
+            high_water_mark: HighWaterMark,
+            taxonomy: Taxonomy,
+            content_hashes: Optional[ContentHashes],
+    ) -> int:
+        """Fetch all new posts, then parse them, then save them in one write."""
+
+        logger.info("Fetching raw data...")
+        with self._stage("fetch"):
             raw_data = await fetcher.fetch_data(
                 seen_ids=seen_ids,
                 total_pages=metadata["total_pages"],
+                total_posts=metadata["total_posts"],
             )
+        high_water_mark.observe(raw_data)
+
+        if content_hashes is not None:
+            content_hashes.record(raw_data)
 
-            logger.info("Parsing data...")
-            parsed_records = self._parser.parse(raw_data, metadata=metadata)
-            logger.info("Parsed %d records", len(parsed_records))
+        logger.info("Parsing data...")
+        with self._stage("parse"):
+            await taxonomy.resolve(raw_data)
+            parsed_records = await self._parse(raw_data, metadata, context)
+        logger.info("Parsed %d records", len(parsed_records))
 
-            if parsed_records:
-                logger.info("Saving %d new records...", len(parsed_records))
+        if parsed_records:
+            logger.info("Saving %d new records...", len(parsed_records))
+            with self._stage("save"):
                 self._store.save_articles(parsed_records)
-                logger.info("Successfully saved %d records", len(parsed_records))
+            self._index_saved(parsed_records, context)
+            logger.info("Successfully saved %d records", len(parsed_records))
+        else:
+            logger.info("No new records to save")
+
+        return len(parsed_records)
+
+    async def _run_streaming(
+            self,
+            fetcher: Fetcher,
+            context: ScrapeContext,
+            seen_ids: Set[str],
+            metadata: Dict[str, Any],
+            high_water_mark: HighWaterMark,
+            taxonomy: Taxonomy,
+            content_hashes: Optional[ContentHashes],
+    ) -> int:
+        """Fetch, parse and save posts concurrently through bounded queues."""
+
+        logger.info("Streaming raw data through parse and store stages...")
+        pipeline = StreamingPipeline(
+            fetcher,
+            self._parser,
+            self._store,
+            high_water_mark=high_water_mark,
+            parse_pool=context.parse_pool,
+            taxonomy=taxonomy,
+            language_filter=context.language_filter,
+            near_duplicates=context.near_duplicates,
+            content_hashes=content_hashes,
+        )
+
+        # Fetching, parsing and saving overlap here, so they are profiled as one stage
+        with self._stage("pipeline"):
+            saved = await pipeline.run(metadata, seen_ids, total_pages=metadata["total_pages"], total_posts=metadata["total_posts"])
+
+        if saved:
+            logger.info("Successfully saved %d records", saved)
+        else:
+            logger.info("No new records to save")
+
+        return saved
+
+    async def plan(self, context: Optional[ScrapeContext] = None) -> Optional[FetchPlan]:
+        """
+        Estimate the requests a run would make for this site without fetching
+        any posts. Reads ``X-WP-Total`` with single-item requests for the
+        posts, the changes since the checkpoint and any uncached taxonomy.
+        Returns ``None`` when the site does not report its post count.
+        """
+
+        context = context or ScrapeContext()
+
+        async with self._session(context) as session:
+            http_client = HttpClient(session=session, budget=context.budget, rate_limits=context.rate_limits, site_name=self.site_name)
+            fetcher = Fetcher(self.site_url, self.site_name, http_client)
+
+            seen_ids = self._store.load_seen_ids()
+            checkpoint = HighWaterMark(self._checkpoint.load())
+            taxonomy = Taxonomy(fetcher, self._taxonomy_store)
+            uncached = taxonomy.stale()
+
+            total_posts, *term_counts = await asyncio.gather(
+                fetcher.count_posts(),
+                *(fetcher.count_terms(name) for name in uncached),
+            )
+
+            if total_posts is None:
+                logger.warning("%s does not report X-WP-Total - cannot plan requests.", self.site_name)
+                return None
+
+            per_page = settings.posts_per_page
+            total_pages = page_count(total_posts, per_page)
+
+            progress = FirstRunProgress(self._checkpoint)
+
+            if progress.resumed:
+                pending = progress.pending_pages(total_posts, per_page)
+                mode, new_posts = "resume", max(0, total_posts - progress.saved_posts)
+                # The counts come from a single-post request, so a pending page 1 is requested on its own
+                post_requests = len(pending)
+            elif settings.high_water_mark_sync and seen_ids and checkpoint.modified:
+                changed = await fetcher.count_posts({"modified_after": query_floor(checkpoint.modified)})
+                mode, new_posts = "changed since", changed or 0
+                # The first page of changes is requested instead of the bootstrap page
+                post_requests = page_count(new_posts, per_page) - 1
+            elif seen_ids:
+                mode, new_posts = "incremental", max(0, total_posts - len(seen_ids))
+                # Page 1 comes with the bootstrap request
+                post_requests = incremental_pages(total_posts, len(seen_ids), per_page, total_pages) - 1
             else:
-                logger.info("No new records to save")
+                mode, new_posts = "first run", total_posts
+                post_requests = total_pages - 1
 
-        logger.info("=" * 80)
-        logger.info("Scraping completed for %s", self.site_url)
-        logger.info("=" * 80)
\ No newline at end of file
+            probes = 2 if settings.field_projection and settings.field_projection_probe else 0
+
+            return FetchPlan(
+                site_name=self.site_name,
+                mode=mode,
+                total_posts=total_posts,
+                new_posts=new_posts,
+                post_requests=post_requests,
+                term_requests=sum(page_count(count or 0, TERMS_PER_PAGE) for count in term_counts),
+                probe_requests=probes,
+            )
+
+    @staticmethod
+    def _post_fields() -> Optional[List[str]]:
+        """Return the post fields to request, or None to fetch full post objects."""
+
+        if not settings.field_projection:
+            return None
+
+        return [*Parser.POST_FIELDS, *HighWaterMark.FIELDS]
+
+    async def _parse(self, posts: List[Any], metadata: Dict[str, Any], context: ScrapeContext) -> List[Record]:
+        """Parse posts on the context's parse pool, through its language filter and near-duplicate check."""
+
+        return await self._parser.parse_async(
+            posts,
+            metadata,
+            executor=context.parse_pool,
+            language_filter=context.language_filter,
+            near_duplicates=context.near_duplicates,
+        )
+
+    def _index_saved(self, records: List[Record], context: ScrapeContext) -> None:
+        """Make the near-duplicate fingerprints of records that were just saved durable."""
+
+        if context.near_duplicates is not None:
+            context.near_duplicates.saved(records, self.site_name)
+
+    def _mark_skipped_seen(self, near_duplicates: NearDuplicates) -> None:
+        """Mark records skipped as near-duplicates as seen, so later runs do not parse them again."""
+
+        skipped = near_duplicates.pop_skipped(self.site_name)
+
+        if skipped:
+            self._store.save_seen_ids(skipped)
+            logger.info("Marked %d skipped near-duplicates as seen", len(skipped))
+
+    def _stage(self, name: str):
+        """Return a context that profiles its block as stage ``name`` when stage profiling is on."""
+
+        return self._profiler.stage(name) if self._profiler is not None else _UNPROFILED
+
+    def _log_transfer(self, http_client: HttpClient, fetcher: Fetcher) -> None:
+        """Log how many bytes were received, with an estimate for full payloads when measured."""
+
+        if fetcher.projection_ratio:
+            logger.info(
+                "Received %d bytes in %d responses for %s (about %d without field projection)",
+                http_client.bytes_received,
+                http_client.responses_received,
+                self.site_name,
+                http_client.bytes_received / fetcher.projection_ratio,
+            )
+        else:
+            logger.info(
+                "Received %d bytes in %d responses for %s",
+                http_client.bytes_received,
+                http_client.responses_received,
+                self.site_name,
+            )
+
+    @staticmethod
+    def _session(context: ScrapeContext):
+        """Return the shared session from the context, or a dedicated one for this run."""
+
+        if context.session is not None:
+            return nullcontext(context.session)
+
+        return aiohttp.ClientSession()
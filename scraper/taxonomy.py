@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from config import settings
+from store import CheckpointStore
+from .fetcher import Fetcher
+
+logger = logging.getLogger(__name__)
+
+
+class Taxonomy:
+    """
+    A site's category and tag names, kept on disk between runs.
+
+    Taxonomies that are not cached yet, or were fetched in full more than
+    ``max_age`` seconds ago, are fetched in full, which picks up renamed and
+    deleted terms. In between, only the terms referenced by posts and
+    missing from the cache are requested, in batches, right before those
+    posts are parsed. A taxonomy with no terms is cached like any other.
+    """
+
+    # Taxonomy name -> the post field that references its terms
+    FIELDS = {"categories": "categories", "tags": "tags"}
+
+    def __init__(self, fetcher: Fetcher, store: CheckpointStore, max_age: Optional[float] = None):
+        self.fetcher = fetcher
+        self.store = store
+        self.max_age = settings.taxonomy_max_age if max_age is None else max_age
+
+        self.terms: Dict[str, Dict[int, str]] = {taxonomy: {} for taxonomy in self.FIELDS}
+        self._unresolved: Dict[str, Set[int]] = {taxonomy: set() for taxonomy in self.FIELDS}
+        self._changed = False
+
+        cached = self.store.load()
+
+        for taxonomy in self.FIELDS:
+            names = cached.get(taxonomy) or {}
+            self.terms[taxonomy] = {int(term_id): name for term_id, name in names.items()}
+
+        # When each taxonomy was last fetched in full; caches written before this was kept have none
+        self.fetched_at: Dict[str, float] = {
+            taxonomy: fetched_at
+            for taxonomy, fetched_at in (cached.get("fetched_at") or {}).items()
+            if taxonomy in self.FIELDS
+        }
+
+    @property
+    def category_map(self) -> Dict[int, str]:
+        return self.terms["categories"]
+
+    @property
+    def tag_map(self) -> Dict[int, str]:
+        return self.terms["tags"]
+
+    def stale(self) -> List[str]:
+        """Return the taxonomies to fetch in full: never fetched, or fetched more than ``max_age`` ago."""
+
+        now = time.time()
+
+        return [
+            taxonomy for taxonomy in self.FIELDS
+            if taxonomy not in self.fetched_at or (self.max_age and now - self.fetched_at[taxonomy] >= self.max_age)
+        ]
+
+    async def load(self) -> None:
+        """Fetch every taxonomy that is not cached or is out of date, all at once."""
+
+        stale = self.stale()
+
+        if not stale:
+            logger.info("Using %d cached categories and %d cached tags.", len(self.category_map), len(self.tag_map))
+            return
+
+        fetched = await asyncio.gather(*(self.fetcher.fetch_all_terms(taxonomy) for taxonomy in stale))
+
+        for taxonomy, names in zip(stale, fetched):
+            # A failed listing keeps the cached terms and is retried on the next run
+            if names is None:
+                continue
+
+            # A full listing replaces the cache, dropping renamed names and deleted terms
+            self.terms[taxonomy] = names
+            self.fetched_at[taxonomy] = time.time()
+            self._changed = True
+
+    async def resolve(self, posts: List[Dict[str, Any]]) -> None:
+        """Fetch the names of terms referenced by the posts that are not cached yet."""
+
+        requests = []
+        for taxonomy, field in self.FIELDS.items():
+            missing = self._missing_ids(taxonomy, (term_id for post in posts for term_id in post.get(field) or ()))
+            if missing:
+                requests.append((taxonomy, missing))
+
+        if not requests:
+            return
+
+        fetched = await asyncio.gather(*(self.fetcher.fetch_terms_by_id(taxonomy, ids) for taxonomy, ids in requests))
+
+        for (taxonomy, ids), names in zip(requests, fetched):
+            self._add(taxonomy, names)
+
+            # Deleted terms stay unnamed; do not ask for them again during this run
+            self._unresolved[taxonomy].update(set(ids) - set(names))
+
+            logger.info("Resolved %d of %d missing %s.", len(names), len(ids), taxonomy)
+
+    def save(self) -> None:
+        """Write the terms to disk if any were added during this run."""
+
+        if not self._changed:
+            return
+
+        self.store.save({
+            **{
+                taxonomy: {str(term_id): name for term_id, name in names.items()}
+                for taxonomy, names in self.terms.items()
+            },
+            "fetched_at": self.fetched_at,
+        })
+        self._changed = False
+
+    def _missing_ids(self, taxonomy: str, term_ids: Iterable[Any]) -> List[int]:
+        known = self.terms[taxonomy]
+        unresolved = self._unresolved[taxonomy]
+
+        return sorted({
+            term_id for term_id in term_ids
+            if isinstance(term_id, int) and term_id not in known and term_id not in unresolved
+        })
+
+    def _add(self, taxonomy: str, names: Dict[int, str]) -> None:
+        if names:
+            self.terms[taxonomy].update(names)
+            self._changed = True
@@ -1,9 +1,19 @@
 from .base_store import BaseStore
+from .checkpoint import CheckpointStore
+from .content_hash_store import ContentHashStore
+from .near_duplicate_index import NearDuplicateIndex
 from .json_store import JSONFileStore
+from .jsonl_store import JSONLinesStore
+from .sqlite_store import SQLiteStore
 from .factory import StoreFactory
 
 __all__ = [
     "BaseStore",
+    "CheckpointStore",
+    "ContentHashStore",
     "JSONFileStore",
+    "JSONLinesStore",
+    "NearDuplicateIndex",
+    "SQLiteStore",
     "StoreFactory"
 ]
@@ -1,15 +1,44 @@
 import logging
-from typing import Iterable, List, Set, Dict, Any
+import time
+from functools import wraps
+from typing import AbstractSet, Callable, Iterable, List, Set, Dict, Any
 from abc import ABC, abstractmethod
 
 from vezilka_schemas import Record
 
+from utils import REGISTRY
+
 logger = logging.getLogger(__name__)
 
+_WRITE_SECONDS = REGISTRY.histogram("scraper_store_write_seconds", "Time to write one batch of records.", ("site", "operation"))
+_RECORDS_WRITTEN = REGISTRY.counter("scraper_records_written_total", "Records written to the store.", ("site",))
+
+
+def timed_write(method: Callable) -> Callable:
+    """Record a store write's duration and record count in the metrics registry."""
+
+    @wraps(method)
+    def wrapper(self, articles: List[Record], *args, **kwargs):
+        if not articles:
+            return method(self, articles, *args, **kwargs)
+
+        started = time.perf_counter()
+        result = method(self, articles, *args, **kwargs)
+
+        _WRITE_SECONDS.observe(time.perf_counter() - started, site=self.site_name, operation=method.__name__)
+        _RECORDS_WRITTEN.inc(len(articles), site=self.site_name)
+
+        return result
+
+    return wrapper
+
 
 class BaseStore(ABC):
     """Abstract base class for persisting scraped records."""
 
+    # Whether a save costs the same however much is stored, so records can be written in many small batches
+    appends: bool = False
+
     @abstractmethod
     def load_all_articles(self) -> List[Dict[str, Any]]:
         """Load all existing articles from the store."""
@@ -21,7 +50,12 @@ class BaseStore(ABC):
         pass
 
     @abstractmethod
-    def load_seen_ids(self) -> Set[str]:
+    def update_articles(self, articles: List[Record]) -> None:
+        """Replace the stored versions of previously saved articles."""
+        pass
+
+    @abstractmethod
+    def load_seen_ids(self) -> AbstractSet[str]:
         """Load the set of article IDs that have already been processed."""
         pass
 
@@ -0,0 +1,55 @@
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointStore:
+    """Small per-site JSON file holding sync progress between runs."""
+
+    def __init__(self, file_path: str):
+        self.file_path = Path(file_path)
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+
+    def load(self) -> Dict[str, Any]:
+        """Load the checkpoint, or an empty one if none was saved yet."""
+
+        if not self.file_path.exists():
+            return {}
+
+        try:
+            with self.file_path.open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            logger.warning("Checkpoint %s is corrupted. Starting without it.", self.file_path)
+            return {}
+
+    def save(self, checkpoint: Dict[str, Any]) -> None:
+        """Atomically replace the checkpoint file."""
+
+        tmp_path = self.file_path.with_name(self.file_path.name + ".tmp")
+
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(checkpoint, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp_path, self.file_path)
+
+    def update(self, **values: Any) -> Dict[str, Any]:
+        """Merge values into the saved checkpoint and return the result."""
+
+        checkpoint = self.load()
+        checkpoint.update(values)
+        self.save(checkpoint)
+
+        return checkpoint
+
+    def clear(self) -> None:
+        """Delete the checkpoint file."""
+
+        if self.file_path.exists():
+            self.file_path.unlink()
@@ -0,0 +1,83 @@
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS content_hashes (
+    post_id TEXT PRIMARY KEY,
+    hash TEXT NOT NULL,
+    modified TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+_UPSERT = """
+INSERT INTO content_hashes (post_id, hash, modified) VALUES (?, ?, ?)
+ON CONFLICT (post_id) DO UPDATE SET hash = excluded.hash, modified = excluded.modified
+"""
+
+# Bound parameters per lookup query, below SQLite's limit
+_LOOKUP_BATCH = 500
+
+
+class ContentHashStore:
+    """
+    A site's post IDs mapped to the content hash and ``modified`` value of
+    the version last parsed, in a SQLite table.
+
+    Only the posts asked about are read and only changed rows are written,
+    so opening and saving cost the same however many posts the site has.
+    The database is opened on first use.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def get(self, post_ids: Sequence[str]) -> Dict[str, Tuple[str, str]]:
+        """Return the stored hash and ``modified`` value of each of the posts that has one."""
+
+        known = {}
+
+        with self._lock:
+            connection = self._connect()
+
+            for start in range(0, len(post_ids), _LOOKUP_BATCH):
+                batch = post_ids[start:start + _LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = connection.execute(
+                    f"SELECT post_id, hash, modified FROM content_hashes WHERE post_id IN ({placeholders})",
+                    batch,
+                )
+                known.update((post_id, (digest, modified)) for post_id, digest, modified in rows)
+
+        return known
+
+    def put(self, rows: Iterable[Tuple[str, str, str]]) -> None:
+        """Insert or replace ``(post ID, hash, modified)`` rows in one transaction."""
+
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.executemany(_UPSERT, rows)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is not None:
+            return self._connection
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+
+        return self._connection
@@ -0,0 +1,119 @@
+"""
+One-off conversion of JSON datasets into the JSON Lines backend format.
+
+Usage:
+    python -m store.convert [site_name ...] [--force]
+
+Without site names, every site in the scraper's site registry is converted.
+"""
+
+import argparse
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from config import settings, store_settings, setup_logging
+from .factory import StoreFactory
+from .id_index import SeenIdIndex
+
+logger = logging.getLogger(__name__)
+
+
+def convert_json_to_jsonl(
+        json_articles_path: Path,
+        seen_ids: Iterable[str],
+        jsonl_articles_path: Path,
+        jsonl_seen_ids_path: Path,
+        force: bool = False,
+) -> bool:
+    """
+    Convert one site's JSON dataset and seen IDs into JSON Lines files.
+
+    The JSON files are left untouched. Without any ``seen_ids``, the IDs of
+    the converted articles are used. Returns ``False`` when there is nothing
+    to convert or the target already exists and ``force`` is not set.
+    """
+
+    if not json_articles_path.exists():
+        logger.info("Nothing to convert: %s does not exist", json_articles_path)
+        return False
+
+    if jsonl_articles_path.exists() and not force:
+        logger.warning("Skipping %s: %s already exists (use --force to overwrite)", json_articles_path, jsonl_articles_path)
+        return False
+
+    with json_articles_path.open("r", encoding="utf-8") as f:
+        articles = json.load(f)
+
+    _write_lines_atomic(jsonl_articles_path, (json.dumps(article, ensure_ascii=False) + "\n" for article in articles))
+
+    seen_ids = sorted(seen_ids) or [article["id"] for article in articles if article.get("id")]
+
+    _write_lines_atomic(jsonl_seen_ids_path, (f"{seen_id}\n" for seen_id in seen_ids))
+
+    logger.info("Converted %d articles and %d seen IDs into %s", len(articles), len(seen_ids), jsonl_articles_path)
+    return True
+
+
+def convert_site(site_name: str, force: bool = False) -> bool:
+    """
+    Convert a site's JSON store files into the configured JSON Lines store files.
+
+    Seen IDs are read through the JSON store, from its seen ID index when it
+    has one. A JSON Lines seen ID index left from before is deleted, so it is
+    rebuilt from the converted IDs on first use.
+    """
+
+    json_store = StoreFactory._create_json_store(site_name)
+    jsonl_config = store_settings.jsonl_store
+
+    jsonl_dir = Path(jsonl_config.data_dir)
+    jsonl_dir.mkdir(parents=True, exist_ok=True)
+
+    converted = convert_json_to_jsonl(
+        json_articles_path=json_store.records_file_path,
+        seen_ids=json_store.load_seen_ids(),
+        jsonl_articles_path=jsonl_dir / jsonl_config.articles_filename_template.format(site_name=site_name),
+        jsonl_seen_ids_path=jsonl_dir / jsonl_config.seen_ids_filename_template.format(site_name=site_name),
+        force=force,
+    )
+
+    if converted and jsonl_config.use_seen_ids_index:
+        SeenIdIndex.delete(str(jsonl_dir / jsonl_config.seen_ids_index_filename_template.format(site_name=site_name)))
+
+    return converted
+
+
+def _write_lines_atomic(path: Path, lines) -> None:
+    """Write lines to a temporary file and move it into place once complete."""
+
+    tmp_path = path.with_name(path.name + ".tmp")
+
+    with tmp_path.open("w", encoding="utf-8") as f:
+        f.writelines(lines)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_path, path)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command-line entry point for the converter."""
+
+    parser = argparse.ArgumentParser(description="Convert JSON datasets to JSON Lines.")
+    parser.add_argument("sites", nargs="*", help="Site names to convert (default: all registered sites)")
+    parser.add_argument("--force", action="store_true", help="Overwrite existing JSON Lines files")
+    args = parser.parse_args(argv)
+
+    setup_logging()
+
+    site_names = args.sites or [name for name, _ in settings.site_registry]
+    converted = sum(convert_site(site_name, force=args.force) for site_name in site_names)
+
+    logger.info("Converted %d/%d sites", converted, len(site_names))
+
+
+if __name__ == "__main__":
+    main()
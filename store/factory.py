@@ -1,7 +1,14 @@
 from pathlib import Path
+from typing import Optional
+
 from config import store_settings
 from . import BaseStore
+from .checkpoint import CheckpointStore
+from .content_hash_store import ContentHashStore
+from .near_duplicate_index import NearDuplicateIndex
 from .json_store import JSONFileStore
+from .jsonl_store import JSONLinesStore
+from .sqlite_store import SQLiteStore
 
 
 class StoreFactory:
@@ -15,9 +22,56 @@ class StoreFactory:
 
         if backend == "json":
             return StoreFactory._create_json_store(site_name)
+        elif backend == "jsonl":
+            return StoreFactory._create_jsonl_store(site_name)
+        elif backend == "sqlite":
+            return StoreFactory._create_sqlite_store(site_name)
         else:
             raise ValueError(f"Unsupported store backend: {backend}")
 
+    @staticmethod
+    def create_checkpoint(site_name: str) -> CheckpointStore:
+        """Create the sync checkpoint store for a site, independent of the storage backend."""
+
+        checkpoint_dir = Path(store_settings.checkpoint_dir)
+        filename = store_settings.checkpoint_filename_template.format(site_name=site_name)
+
+        return CheckpointStore(str(checkpoint_dir / filename))
+
+    @staticmethod
+    def create_taxonomy(site_name: str) -> CheckpointStore:
+        """Create the store caching a site's category and tag names."""
+
+        checkpoint_dir = Path(store_settings.checkpoint_dir)
+        filename = store_settings.taxonomy_filename_template.format(site_name=site_name)
+
+        return CheckpointStore(str(checkpoint_dir / filename))
+
+    @staticmethod
+    def create_content_hashes(site_name: str) -> ContentHashStore:
+        """Create the store holding the content hash of each of a site's parsed posts."""
+
+        checkpoint_dir = Path(store_settings.checkpoint_dir)
+        filename = store_settings.content_hashes_filename_template.format(site_name=site_name)
+
+        return ContentHashStore(str(checkpoint_dir / filename))
+
+    @staticmethod
+    def create_host_limits() -> CheckpointStore:
+        """Create the store holding the per-host concurrency limits learned by previous runs."""
+
+        checkpoint_dir = Path(store_settings.checkpoint_dir)
+
+        return CheckpointStore(str(checkpoint_dir / store_settings.host_limits_filename))
+
+    @staticmethod
+    def create_near_duplicate_index(max_distance: int) -> NearDuplicateIndex:
+        """Create the fingerprint index shared by every site, for near-duplicate detection."""
+
+        checkpoint_dir = Path(store_settings.checkpoint_dir)
+
+        return NearDuplicateIndex(str(checkpoint_dir / store_settings.near_duplicate_index_filename), max_distance)
+
     @staticmethod
     def _create_json_store(site_name: str) -> JSONFileStore:
         """Create a JSON file store with site-specific paths."""
@@ -29,8 +83,55 @@ class StoreFactory:
 
         articles_filename = config.articles_filename_template.format(site_name=site_name)
         seen_ids_filename = config.seen_ids_filename_template.format(site_name=site_name)
+        seen_ids_index_path = StoreFactory._seen_ids_index_path(config, data_dir, site_name)
 
         return JSONFileStore(
             articles_file_path=str(data_dir / articles_filename),
             seen_ids_file_path=str(data_dir / seen_ids_filename),
-        )
\ No newline at end of file
+            seen_ids_index_path=seen_ids_index_path,
+            site_name=site_name,
+        )
+
+    @staticmethod
+    def _create_jsonl_store(site_name: str) -> JSONLinesStore:
+        """Create an append-only JSON Lines store with site-specific paths."""
+
+        config = store_settings.jsonl_store
+
+        data_dir = Path(config.data_dir)
+        data_dir.mkdir(parents=True, exist_ok=True)
+
+        articles_filename = config.articles_filename_template.format(site_name=site_name)
+        seen_ids_filename = config.seen_ids_filename_template.format(site_name=site_name)
+        seen_ids_index_path = StoreFactory._seen_ids_index_path(config, data_dir, site_name)
+
+        return JSONLinesStore(
+            articles_file_path=str(data_dir / articles_filename),
+            seen_ids_file_path=str(data_dir / seen_ids_filename),
+            flush_every=config.flush_every,
+            fsync=config.fsync,
+            seen_ids_index_path=seen_ids_index_path,
+            site_name=site_name,
+        )
+
+    @staticmethod
+    def _seen_ids_index_path(config, data_dir: Path, site_name: str) -> Optional[str]:
+        """Return the seen ID index path for a file-based store, or None when the index is disabled."""
+
+        if not config.use_seen_ids_index:
+            return None
+
+        return str(data_dir / config.seen_ids_index_filename_template.format(site_name=site_name))
+
+    @staticmethod
+    def _create_sqlite_store(site_name: str) -> SQLiteStore:
+        """Create a SQLite store for the site in the shared database."""
+
+        config = store_settings.sqlite_store
+
+        return SQLiteStore(
+            database_path=config.database_path,
+            site_name=site_name,
+            busy_timeout=config.busy_timeout,
+            synchronous=config.synchronous,
+        )
@@ -0,0 +1,266 @@
+import logging
+import mmap
+import os
+import threading
+from array import array
+from bisect import bisect_left
+from collections.abc import Set as AbstractSet
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"SEENIDX1"
+
+# Added IDs are merged into the sorted file once they outnumber an eighth of it, and at least this many
+_MIN_MERGE_IDS = 65536
+_MERGE_FRACTION = 8
+
+
+class SeenIdIndex:
+    """
+    Sorted array of integer post IDs, stored as unsigned 64-bit integers after
+    a short header and memory-mapped from disk.
+
+    Membership is a binary search over the mapped file, so opening the index
+    costs the same regardless of its size. New IDs are appended unsorted to
+    a tail file next to it and kept in memory. Once the tail outnumbers an
+    eighth of the sorted IDs, it is merged in by copying the sorted runs
+    around the new IDs into a new file, which then replaces the old one, so
+    adding an ID costs amortized constant time however large the index is.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.tail_path = self.tail_path_of(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Lookups may run on the event loop while a worker thread merges new IDs
+        self._lock = threading.Lock()
+        self._file = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._ids: memoryview = memoryview(array("Q"))
+        self._tail: Set[int] = set()
+
+        self._open()
+        self._load_tail()
+
+    @staticmethod
+    def tail_path_of(path: str) -> Path:
+        """Return the path of the file holding the IDs not merged into the index at ``path`` yet."""
+
+        return Path(path).with_name(Path(path).name + ".tail")
+
+    @classmethod
+    def delete(cls, path: str) -> None:
+        """Delete the index at ``path`` and its tail file."""
+
+        Path(path).unlink(missing_ok=True)
+        cls.tail_path_of(path).unlink(missing_ok=True)
+
+    def __contains__(self, post_id: int) -> bool:
+        with self._lock:
+            return post_id in self._tail or self._contains_unlocked(post_id)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._ids) + len(self._tail)
+
+    def __iter__(self) -> Iterator[int]:
+        with self._lock:
+            return iter(self._ids.tolist() + list(self._tail))
+
+    def add(self, post_ids: Iterable[int]) -> int:
+        """Add new IDs to the index and return how many were not already present."""
+
+        with self._lock:
+            new_ids = {
+                post_id for post_id in post_ids
+                if post_id not in self._tail and not self._contains_unlocked(post_id)
+            }
+
+            if not new_ids:
+                return 0
+
+            self._tail.update(new_ids)
+
+            if len(self._tail) > max(_MIN_MERGE_IDS, len(self._ids) // _MERGE_FRACTION):
+                self._merge()
+            else:
+                with self.tail_path.open("ab") as f:
+                    f.write(array("Q", sorted(new_ids)).tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            return len(new_ids)
+
+    def close(self) -> None:
+        """Release the memory mapping."""
+
+        with self._lock:
+            self._close()
+
+    def _merge(self) -> None:
+        """Write the sorted IDs and the tail into a new sorted file and drop the tail."""
+
+        new_ids = sorted(self._tail)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+
+        with tmp_path.open("wb") as f:
+            f.write(_MAGIC)
+
+            previous = 0
+            for post_id in new_ids:
+                position = bisect_left(self._ids, post_id, previous)
+                f.write(self._ids[previous:position])
+                f.write(array("Q", [post_id]).tobytes())
+                previous = position
+
+            f.write(self._ids[previous:])
+            f.flush()
+            os.fsync(f.fileno())
+
+        # The mapping must be released before the file can be replaced on every platform
+        self._close()
+        os.replace(tmp_path, self.path)
+        self._open()
+
+        # A crash before this leaves tail IDs that are in the sorted file too, which loading skips
+        self.tail_path.unlink(missing_ok=True)
+        self._tail = set()
+
+    def _contains_unlocked(self, post_id: int) -> bool:
+        position = bisect_left(self._ids, post_id)
+        return position < len(self._ids) and self._ids[position] == post_id
+
+    def _open(self) -> None:
+        """Map the index file, creating an empty one if it does not exist."""
+
+        if not self.path.exists():
+            self.path.write_bytes(_MAGIC)
+
+        self._file = self.path.open("rb")
+        size = os.fstat(self._file.fileno()).st_size
+
+        if size < len(_MAGIC) or (size - len(_MAGIC)) % 8:
+            self._file.close()
+            raise ValueError(f"Seen ID index {self.path} is corrupted")
+
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(_MAGIC)] != _MAGIC:
+            self._close()
+            raise ValueError(f"Seen ID index {self.path} has an unknown format")
+
+        self._ids = memoryview(self._mmap)[len(_MAGIC):].cast("Q")
+
+    def _load_tail(self) -> None:
+        """Read the IDs added since the last merge, dropping a partial ID left by a crash."""
+
+        if not self.tail_path.exists():
+            return
+
+        data = self.tail_path.read_bytes()
+        complete = len(data) - len(data) % 8
+
+        if complete < len(data):
+            with self.tail_path.open("r+b") as f:
+                f.truncate(complete)
+
+        tail = array("Q")
+        tail.frombytes(data[:complete])
+
+        self._tail = {post_id for post_id in tail if not self._contains_unlocked(post_id)}
+
+    def _close(self) -> None:
+        self._ids.release()
+        self._ids = memoryview(array("Q"))
+
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SeenIdSet(AbstractSet):
+    """
+    Set view translating record IDs such as ``"kurir.mk_123456"`` to the
+    integer post IDs held in a ``SeenIdIndex``.
+    """
+
+    def __init__(self, index: SeenIdIndex, site_name: str):
+        self.index = index
+        self.prefix = f"{site_name}_"
+
+    def __contains__(self, record_id: object) -> bool:
+        post_id = self._post_id(record_id)
+        return post_id is not None and post_id in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __iter__(self) -> Iterator[str]:
+        return (f"{self.prefix}{post_id}" for post_id in self.index)
+
+    def add(self, record_ids: Iterable[str]) -> int:
+        """Merge record IDs into the index and return how many were new."""
+
+        post_ids = []
+        for record_id in record_ids:
+            post_id = self._post_id(record_id)
+
+            if post_id is None:
+                logger.warning("Ignoring seen ID %r: not a numeric post ID of this site", record_id)
+                continue
+
+            post_ids.append(post_id)
+
+        return self.index.add(post_ids)
+
+    def _post_id(self, record_id: object) -> Optional[int]:
+        if not isinstance(record_id, str) or not record_id.startswith(self.prefix):
+            return None
+
+        suffix = record_id[len(self.prefix):]
+        if not suffix.isdigit():
+            return None
+
+        return int(suffix)
+
+
+def open_seen_id_set(
+        index_path: str,
+        site_name: str,
+        load_legacy_ids: Callable[[], Iterable[str]],
+        legacy_path: Optional[str] = None,
+) -> SeenIdSet:
+    """
+    Open a site's seen ID index. When the index does not exist yet, it is
+    built from the IDs returned by ``load_legacy_ids``, and the file at
+    ``legacy_path`` they were read from is deleted, so the index is the only
+    copy and no stale list is left behind.
+    """
+
+    migrate = not Path(index_path).exists()
+    seen_ids = SeenIdSet(SeenIdIndex(index_path), site_name)
+
+    if migrate:
+        try:
+            added = seen_ids.add(load_legacy_ids())
+        except BaseException:
+            # Leave no half-built index behind, so the migration reruns next time
+            seen_ids.index.close()
+            SeenIdIndex.delete(index_path)
+            raise
+
+        if added:
+            logger.info("Migrated %d seen IDs into index %s", added, index_path)
+
+        if legacy_path is not None and Path(legacy_path).exists():
+            Path(legacy_path).unlink()
+            logger.info("Removed %s, now replaced by index %s", legacy_path, index_path)
+
+    return seen_ids
@@ -1,24 +1,41 @@
 import json
 import logging
 from pathlib import Path
-from typing import Iterable, List, Dict, Any, Set
+from typing import AbstractSet, Iterable, List, Dict, Any, Optional, Set
 
-from .base_store import BaseStore
+from .base_store import BaseStore, timed_write
+from .id_index import SeenIdIndex, SeenIdSet, open_seen_id_set
 from vezilka_schemas import Record
 
 logger = logging.getLogger(__name__)
 
 
 class JSONFileStore(BaseStore):
-    """JSON file storage with separate files for records and IDs."""
-
-    def __init__(self, articles_file_path: str, seen_ids_file_path: str):
+    """
+    JSON file storage with separate files for records and IDs.
+
+    When ``seen_ids_index_path`` is given, seen IDs are kept in a compact
+    memory-mapped index instead, built from the seen IDs file on first use,
+    which is then deleted.
+    """
+
+    def __init__(
+            self,
+            articles_file_path: str,
+            seen_ids_file_path: str,
+            seen_ids_index_path: Optional[str] = None,
+            site_name: Optional[str] = None,
+    ):
         self.records_file_path = Path(articles_file_path)
         self.seen_ids_file_path = Path(seen_ids_file_path)
+        self.seen_ids_index_path = Path(seen_ids_index_path) if seen_ids_index_path else None
+        self.site_name = site_name
 
         self.records_file_path.parent.mkdir(parents=True, exist_ok=True)
         self.seen_ids_file_path.parent.mkdir(parents=True, exist_ok=True)
 
+        self._seen_id_set: Optional[SeenIdSet] = None
+
     def load_all_articles(self) -> List[Dict[str, Any]]:
         """Load all articles from the JSON file."""
 
@@ -32,6 +49,7 @@ class JSONFileStore(BaseStore):
             logger.warning("File %s is empty or corrupted. Returning empty list.", self.records_file_path)
             return []
 
+    @timed_write
     def save_articles(self, articles: List[Record]) -> None:
         """Append new articles to the JSON file and update seen IDs."""
 
@@ -52,10 +70,43 @@ class JSONFileStore(BaseStore):
         new_ids = {article.id for article in articles}
         self.save_seen_ids(new_ids)
 
+    @timed_write
+    def update_articles(self, articles: List[Record]) -> None:
+        """Replace stored articles with the same IDs, appending any that are missing."""
+
+        if not articles:
+            return
+
+        existing_articles = self.load_all_articles()
+        positions = {article.get("id"): idx for idx, article in enumerate(existing_articles)}
+
+        for record in articles:
+            article_dict = record.to_dict()
+            idx = positions.get(record.id)
+
+            if idx is None:
+                positions[record.id] = len(existing_articles)
+                existing_articles.append(article_dict)
+            else:
+                existing_articles[idx] = article_dict
+
+        with self.records_file_path.open("w", encoding="utf-8") as f:
+            json.dump(existing_articles, f, indent=2, ensure_ascii=False)
+
+        logger.info("Updated %d articles (total: %d)", len(articles), len(existing_articles))
+
+        self.save_seen_ids({article.id for article in articles})
+
     def save_seen_ids(self, ids: Set[str]) -> None:
         """Append new IDs to the existing seen IDs file."""
 
-        existing_ids = self.load_seen_ids()
+        seen_id_set = self._open_seen_id_index()
+        if seen_id_set is not None:
+            added = seen_id_set.add(ids)
+            logger.info("Added %d new seen IDs (total: %d)", added, len(seen_id_set))
+            return
+
+        existing_ids = self._load_seen_ids_file()
         existing_ids.update(ids)
 
         with self.seen_ids_file_path.open("w", encoding="utf-8") as f:
@@ -63,7 +114,33 @@ class JSONFileStore(BaseStore):
 
         logger.info("Added %d new seen IDs (total: %d)", len(ids), len(existing_ids))
 
-    def load_seen_ids(self) -> Set[str]:
+    def load_seen_ids(self) -> AbstractSet[str]:
+        """Load the set of seen article IDs from the seen IDs index or file."""
+
+        seen_id_set = self._open_seen_id_index()
+        if seen_id_set is not None:
+            logger.info("Loaded %d previously seen IDs", len(seen_id_set))
+            return seen_id_set
+
+        return self._load_seen_ids_file()
+
+    def _open_seen_id_index(self) -> Optional[SeenIdSet]:
+        """Open the seen ID index if one is configured, migrating the seen IDs file on first use."""
+
+        if self.seen_ids_index_path is None:
+            return None
+
+        if self._seen_id_set is None:
+            self._seen_id_set = open_seen_id_set(
+                str(self.seen_ids_index_path),
+                self.site_name,
+                self._load_seen_ids_file,
+                legacy_path=str(self.seen_ids_file_path),
+            )
+
+        return self._seen_id_set
+
+    def _load_seen_ids_file(self) -> Set[str]:
         """Load the set of seen article IDs from the seen IDs file."""
 
         if not self.seen_ids_file_path.exists():
@@ -89,3 +166,11 @@ class JSONFileStore(BaseStore):
         if self.seen_ids_file_path.exists():
             self.seen_ids_file_path.unlink()
             logger.info("Cleared seen IDs file: %s", self.seen_ids_file_path)
+
+        if self._seen_id_set is not None:
+            self._seen_id_set.index.close()
+            self._seen_id_set = None
+
+        if self.seen_ids_index_path is not None and self.seen_ids_index_path.exists():
+            SeenIdIndex.delete(str(self.seen_ids_index_path))
+            logger.info("Cleared seen IDs index: %s", self.seen_ids_index_path)
@@ -0,0 +1,241 @@
+import json
+import logging
+import os
+from pathlib import Path
+from typing import AbstractSet, List, Dict, Any, Iterable, Optional, Set
+
+from .base_store import BaseStore, timed_write
+from .id_index import SeenIdIndex, SeenIdSet, open_seen_id_set
+from vezilka_schemas import Record
+
+logger = logging.getLogger(__name__)
+
+# Block size used when scanning backwards for the last complete line
+_TAIL_SCAN_BLOCK = 64 * 1024
+
+
+class JSONLinesStore(BaseStore):
+    """
+    Append-only JSON Lines storage: one record per line, and one seen ID per
+    line in a separate file. Saving only writes the new lines, so its cost
+    does not depend on how much is already stored.
+
+    When ``seen_ids_index_path`` is given, seen IDs are kept in a compact
+    memory-mapped index instead, built from the seen IDs file on first use,
+    which is then deleted.
+    """
+
+    appends = True
+
+    def __init__(
+            self,
+            articles_file_path: str,
+            seen_ids_file_path: str,
+            flush_every: int = 500,
+            fsync: bool = True,
+            seen_ids_index_path: Optional[str] = None,
+            site_name: Optional[str] = None,
+    ):
+        self.records_file_path = Path(articles_file_path)
+        self.seen_ids_file_path = Path(seen_ids_file_path)
+        self.seen_ids_index_path = Path(seen_ids_index_path) if seen_ids_index_path else None
+        self.site_name = site_name
+        self.flush_every = max(1, flush_every)
+        self.fsync = fsync
+
+        self.records_file_path.parent.mkdir(parents=True, exist_ok=True)
+        self.seen_ids_file_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._recovered: Set[Path] = set()
+        self._seen_id_set: Optional[SeenIdSet] = None
+
+    def load_all_articles(self) -> List[Dict[str, Any]]:
+        """
+        Load all articles from the JSON Lines file, skipping unreadable lines.
+        Updated articles are appended again, so the last line for an ID wins
+        while keeping the position of the first.
+        """
+
+        if not self.records_file_path.exists():
+            return []
+
+        articles: Dict[Any, Dict[str, Any]] = {}
+
+        with self.records_file_path.open("r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+
+                try:
+                    article = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("Skipping corrupted line %d in %s", line_number, self.records_file_path)
+                    continue
+
+                articles[article.get("id", line_number)] = article
+
+        return list(articles.values())
+
+    @timed_write
+    def save_articles(self, articles: List[Record]) -> None:
+        """Append new articles to the JSON Lines file and update seen IDs."""
+
+        if not articles:
+            logger.info("No articles to save")
+            return
+
+        lines = (json.dumps(record.to_dict(), ensure_ascii=False) + "\n" for record in articles)
+        self._append_lines(self.records_file_path, lines)
+
+        logger.info("Added %d new articles", len(articles))
+
+        new_ids = {article.id for article in articles}
+        self.save_seen_ids(new_ids)
+
+    @timed_write
+    def update_articles(self, articles: List[Record]) -> None:
+        """Append new versions of articles; they supersede earlier lines with the same ID."""
+
+        if not articles:
+            return
+
+        lines = (json.dumps(record.to_dict(), ensure_ascii=False) + "\n" for record in articles)
+        self._append_lines(self.records_file_path, lines)
+
+        logger.info("Updated %d articles", len(articles))
+
+        self.save_seen_ids({article.id for article in articles})
+
+    def save_seen_ids(self, ids: Set[str]) -> None:
+        """Append new IDs to the seen IDs file."""
+
+        seen_id_set = self._open_seen_id_index()
+        if seen_id_set is not None:
+            added = seen_id_set.add(ids)
+            logger.info("Added %d new seen IDs (total: %d)", added, len(seen_id_set))
+            return
+
+        self._append_lines(self.seen_ids_file_path, (f"{seen_id}\n" for seen_id in sorted(ids)))
+
+        logger.info("Added %d new seen IDs", len(ids))
+
+    def load_seen_ids(self) -> AbstractSet[str]:
+        """Load the set of seen article IDs from the seen IDs index or file."""
+
+        seen_id_set = self._open_seen_id_index()
+        if seen_id_set is not None:
+            logger.info("Loaded %d previously seen IDs", len(seen_id_set))
+            return seen_id_set
+
+        return self._load_seen_ids_file()
+
+    def _open_seen_id_index(self) -> Optional[SeenIdSet]:
+        """Open the seen ID index if one is configured, migrating the seen IDs file on first use."""
+
+        if self.seen_ids_index_path is None:
+            return None
+
+        if self._seen_id_set is None:
+            self._seen_id_set = open_seen_id_set(
+                str(self.seen_ids_index_path),
+                self.site_name,
+                self._load_seen_ids_file,
+                legacy_path=str(self.seen_ids_file_path),
+            )
+
+        return self._seen_id_set
+
+    def _load_seen_ids_file(self) -> Set[str]:
+        """Load the set of seen article IDs from the seen IDs file."""
+
+        if not self.seen_ids_file_path.exists():
+            return set()
+
+        with self.seen_ids_file_path.open("r", encoding="utf-8") as f:
+            ids = {line.strip() for line in f if line.strip()}
+
+        logger.info("Loaded %d previously seen IDs", len(ids))
+        return ids
+
+    def clear(self) -> None:
+        """Clear all stored article and seen IDs by deleting both files."""
+
+        if self.records_file_path.exists():
+            self.records_file_path.unlink()
+            logger.info("Cleared records file: %s", self.records_file_path)
+
+        if self.seen_ids_file_path.exists():
+            self.seen_ids_file_path.unlink()
+            logger.info("Cleared seen IDs file: %s", self.seen_ids_file_path)
+
+        if self._seen_id_set is not None:
+            self._seen_id_set.index.close()
+            self._seen_id_set = None
+
+        if self.seen_ids_index_path is not None and self.seen_ids_index_path.exists():
+            SeenIdIndex.delete(str(self.seen_ids_index_path))
+            logger.info("Cleared seen IDs index: %s", self.seen_ids_index_path)
+
+        self._recovered.clear()
+
+    def _append_lines(self, path: Path, lines: Iterable[str]) -> None:
+        """Append lines to a file, flushing (and optionally syncing) every ``flush_every`` lines."""
+
+        if path not in self._recovered:
+            self._recover_tail(path)
+            self._recovered.add(path)
+
+        with path.open("a", encoding="utf-8") as f:
+            pending = 0
+
+            for line in lines:
+                f.write(line)
+                pending += 1
+
+                if pending >= self.flush_every:
+                    self._flush(f)
+                    pending = 0
+
+            if pending:
+                self._flush(f)
+
+    def _flush(self, f) -> None:
+        """Flush buffered writes to the OS, and to disk when ``fsync`` is enabled."""
+
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def _recover_tail(path: Path) -> None:
+        """Truncate a partially written last line left behind by a crash."""
+
+        if not path.exists():
+            return
+
+        with path.open("rb+") as f:
+            size = f.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return
+
+            # Scan backwards for the end of the last complete line
+            end = size
+            keep = 0
+            while end > 0:
+                start = max(0, end - _TAIL_SCAN_BLOCK)
+                f.seek(start)
+                newline = f.read(end - start).rfind(b"\n")
+
+                if newline != -1:
+                    keep = start + newline + 1
+                    break
+
+                end = start
+
+            f.truncate(keep)
+
+        logger.warning("Recovered %s: dropped %d bytes of a partially written line", path, size - keep)
@@ -0,0 +1,265 @@
+import logging
+import os
+import struct
+import threading
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .checkpoint import CheckpointStore
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"NEARDUP1"
+
+# 64-bit fingerprint, post ID and site number
+_ENTRY = struct.Struct("<QQH")
+
+_POST_ID_MASK = (1 << 64) - 1
+
+
+class NearDuplicateIndex:
+    """
+    64-bit SimHash fingerprints of stored records from every site, looked
+    up by Hamming distance with LSH banding.
+
+    The fingerprint is split into ``max_distance + 1`` bands. Two
+    fingerprints at most ``max_distance`` bits apart agree exactly on at
+    least one band, so a lookup only compares the fingerprints sharing a
+    band value with the query: a few dozen per million records.
+
+    Each record has one entry, which a new fingerprint for the same record
+    ID replaces. Fingerprints are visible to lookups as soon as they are
+    added, but only written to disk once ``commit`` is called for their
+    records after the records were saved; ``discard`` takes back those of
+    records that were not. Entries are appended to a log file after a short
+    header, later ones replacing earlier ones for the same record, and the
+    site names they refer to by number are kept in a JSON file beside it. A
+    partly written last entry, left by a crash, is ignored on load.
+    """
+
+    def __init__(self, path: str, max_distance: int = 3):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_distance = max_distance
+
+        self._bands = _band_masks(max_distance + 1)
+        self._sites_store = CheckpointStore(str(self.path.with_name(self.path.name + ".sites.json")))
+
+        # Entries by position, in columns to keep each one at 18 bytes
+        self._fingerprints = array("Q")
+        self._post_ids = array("Q")
+        self._site_numbers = array("H")
+
+        # Record key (site number and post ID) -> position of its entry
+        self._positions: Dict[int, int] = {}
+
+        # Per band: band value -> positions of the entries holding it
+        self._buckets: List[Dict[int, array]] = [{} for _ in self._bands]
+
+        # Records added but not committed -> the fingerprint they replaced, if any
+        self._uncommitted: Dict[int, Optional[int]] = {}
+
+        self._sites: List[str] = []
+        self._site_numbers_by_name: Dict[str, int] = {}
+
+        # Records are checked on the event loop while worker threads may be saving
+        self._lock = threading.Lock()
+
+        self._load()
+        self._file = self.path.open("ab")
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def find(self, fingerprint: int, exclude: Optional[str] = None) -> Optional[str]:
+        """Return the ID of an indexed record within ``max_distance`` bits of ``fingerprint``, other than ``exclude``."""
+
+        with self._lock:
+            return self._find_unlocked(fingerprint, exclude)
+
+    def find_and_add(self, entries: Sequence[Tuple[str, int]], add_matches: bool = True) -> List[Optional[str]]:
+        """
+        Look up each record's fingerprint in turn, returning the ID of the
+        record it repeats or ``None``, and add it unless it matched and
+        ``add_matches`` is false. Later entries are compared with earlier
+        ones. Added entries stay uncommitted until ``commit`` or ``discard``.
+
+        A batch costs one call, which matters when the index is served to
+        worker processes through a manager.
+        """
+
+        originals = []
+
+        with self._lock:
+            for record_id, fingerprint in entries:
+                original = self._find_unlocked(fingerprint, record_id)
+                originals.append(original)
+
+                if original is None or add_matches:
+                    self._add_unlocked(record_id, fingerprint)
+
+        return originals
+
+    def commit(self, record_ids: Iterable[str]) -> None:
+        """Write the uncommitted entries of these records, which have been saved, to disk."""
+
+        with self._lock:
+            written = False
+
+            for key in self._keys(record_ids):
+                if key not in self._uncommitted:
+                    continue
+
+                del self._uncommitted[key]
+                position = self._positions[key]
+                self._file.write(_ENTRY.pack(self._fingerprints[position], self._post_ids[position], self._site_numbers[position]))
+                written = True
+
+            if written:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+
+    def discard(self, record_ids: Iterable[str]) -> None:
+        """Take back the uncommitted entries of these records, which were not saved."""
+
+        with self._lock:
+            for key in self._keys(record_ids):
+                if key not in self._uncommitted:
+                    continue
+
+                previous = self._uncommitted.pop(key)
+
+                if previous is None:
+                    self._unbucket(self._positions.pop(key))
+                else:
+                    self._set(key, previous)
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    def _find_unlocked(self, fingerprint: int, exclude: Optional[str]) -> Optional[str]:
+        for band, buckets in zip(self._bands, self._buckets):
+            for position in buckets.get(fingerprint & band, ()):
+                if (self._fingerprints[position] ^ fingerprint).bit_count() > self.max_distance:
+                    continue
+
+                record_id = f"{self._sites[self._site_numbers[position]]}_{self._post_ids[position]}"
+                if record_id != exclude:
+                    return record_id
+
+        return None
+
+    def _add_unlocked(self, record_id: str, fingerprint: int) -> None:
+        site_name, _, post_id = record_id.rpartition("_")
+        if not site_name or not post_id.isdigit():
+            logger.debug("Not indexing %r: not a numeric post ID", record_id)
+            return
+
+        key = _key(self._site_number(site_name), int(post_id))
+
+        if key not in self._uncommitted:
+            position = self._positions.get(key)
+            self._uncommitted[key] = self._fingerprints[position] if position is not None else None
+
+        self._set(key, fingerprint)
+
+    def _keys(self, record_ids: Iterable[str]) -> Iterator[int]:
+        """Yield the keys of the records of known sites with numeric post IDs."""
+
+        for record_id in record_ids:
+            site_name, _, post_id = record_id.rpartition("_")
+            site_number = self._site_numbers_by_name.get(site_name)
+
+            if site_number is not None and post_id.isdigit():
+                yield _key(site_number, int(post_id))
+
+    def _set(self, key: int, fingerprint: int) -> None:
+        """Give the record ``key`` the fingerprint, replacing the one it had."""
+
+        position = self._positions.get(key)
+
+        if position is None:
+            position = len(self._fingerprints)
+            self._positions[key] = position
+
+            self._fingerprints.append(fingerprint)
+            self._post_ids.append(key & _POST_ID_MASK)
+            self._site_numbers.append(key >> 64)
+        else:
+            self._unbucket(position)
+            self._fingerprints[position] = fingerprint
+
+        for band, buckets in zip(self._bands, self._buckets):
+            bucket = buckets.get(fingerprint & band)
+            if bucket is None:
+                buckets[fingerprint & band] = array("I", [position])
+            else:
+                bucket.append(position)
+
+    def _unbucket(self, position: int) -> None:
+        """Remove the entry at ``position`` from the buckets of its fingerprint."""
+
+        fingerprint = self._fingerprints[position]
+
+        for band, buckets in zip(self._bands, self._buckets):
+            bucket = buckets[fingerprint & band]
+            bucket.remove(position)
+
+            if not bucket:
+                del buckets[fingerprint & band]
+
+    def _site_number(self, site_name: str) -> int:
+        site_number = self._site_numbers_by_name.get(site_name)
+
+        if site_number is None:
+            site_number = len(self._sites)
+            self._sites.append(site_name)
+            self._site_numbers_by_name[site_name] = site_number
+
+            # Saved before any entry refers to the new number
+            self._sites_store.save({"sites": self._sites})
+
+        return site_number
+
+    def _load(self) -> None:
+        self._sites = self._sites_store.load().get("sites", [])
+        self._site_numbers_by_name = {name: number for number, name in enumerate(self._sites)}
+
+        if not self.path.exists():
+            self.path.write_bytes(_MAGIC)
+            return
+
+        data = self.path.read_bytes()
+        if data[:len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"Near-duplicate index {self.path} has an unknown format")
+
+        complete = len(_MAGIC) + (len(data) - len(_MAGIC)) // _ENTRY.size * _ENTRY.size
+        if complete < len(data):
+            logger.warning("Dropping a partly written entry at the end of %s", self.path)
+            with self.path.open("r+b") as f:
+                f.truncate(complete)
+
+        for fingerprint, post_id, site_number in _ENTRY.iter_unpack(data[len(_MAGIC):complete]):
+            self._set(_key(site_number, post_id), fingerprint)
+
+        logger.info("Loaded %d fingerprints from %s", len(self), self.path)
+
+
+def _key(site_number: int, post_id: int) -> int:
+    return site_number << 64 | post_id
+
+
+def _band_masks(count: int) -> List[int]:
+    """Split 64 bits into ``count`` contiguous bands as even as possible, and return their masks."""
+
+    masks = []
+    start = 0
+
+    for band in range(count):
+        width = (64 - start) // (count - band)
+        masks.append(((1 << width) - 1) << start)
+        start += width
+
+    return masks
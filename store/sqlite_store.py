@@ -0,0 +1,174 @@
+import json
+import logging
+import sqlite3
+import threading
+from collections.abc import Set as AbstractSet
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Dict, Any, Set
+
+from .base_store import BaseStore, timed_write
+from vezilka_schemas import Record
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    scraped_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_records_source ON records (source);
+CREATE INDEX IF NOT EXISTS idx_records_scraped_at ON records (scraped_at);
+
+CREATE TABLE IF NOT EXISTS seen_ids (
+    id TEXT PRIMARY KEY,
+    source TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_seen_ids_source ON seen_ids (source);
+"""
+
+_UPSERT_RECORD = """
+INSERT INTO records (id, source, scraped_at, data) VALUES (?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    source = excluded.source,
+    scraped_at = excluded.scraped_at,
+    data = excluded.data
+"""
+
+_INSERT_SEEN_ID = "INSERT OR IGNORE INTO seen_ids (id, source) VALUES (?, ?)"
+
+
+class SQLiteSeenIds(AbstractSet):
+    """
+    Read-only set view over a site's seen IDs. Membership tests and counts are
+    answered by indexed queries, so the IDs are never loaded into memory.
+    """
+
+    def __init__(self, store: "SQLiteStore"):
+        self._store = store
+
+    def __contains__(self, record_id: object) -> bool:
+        row = self._store._query_one("SELECT 1 FROM seen_ids WHERE id = ?", (record_id,))
+        return row is not None
+
+    def __len__(self) -> int:
+        row = self._store._query_one("SELECT COUNT(*) FROM seen_ids WHERE source = ?", (self._store.site_name,))
+        return row[0]
+
+    def __iter__(self) -> Iterator[str]:
+        rows = self._store._query_all("SELECT id FROM seen_ids WHERE source = ?", (self._store.site_name,))
+        return (row[0] for row in rows)
+
+
+class SQLiteStore(BaseStore):
+    """
+    SQLite storage shared by all sites. Records and seen IDs are keyed by
+    record ID and indexed by source, and the database runs in WAL mode so
+    several processes can write to it concurrently.
+    """
+
+    appends = True
+
+    def __init__(self, database_path: str, site_name: str, busy_timeout: float = 30.0, synchronous: str = "NORMAL"):
+        self.database_path = Path(database_path)
+        self.site_name = site_name
+
+        self.database_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Batches may be written from worker threads, so access is serialized by a lock
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            str(self.database_path),
+            timeout=busy_timeout,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(f"PRAGMA synchronous={synchronous}")
+        self._connection.executescript(_SCHEMA)
+
+    def load_all_articles(self) -> List[Dict[str, Any]]:
+        """Load all of this site's articles, in insertion order."""
+
+        rows = self._query_all("SELECT data FROM records WHERE source = ? ORDER BY rowid", (self.site_name,))
+        return [json.loads(row[0]) for row in rows]
+
+    @timed_write
+    def save_articles(self, articles: List[Record]) -> None:
+        """Upsert articles and their seen IDs in a single transaction."""
+
+        if not articles:
+            logger.info("No articles to save")
+            return
+
+        rows = []
+        for record in articles:
+            record_dict = record.to_dict()
+            rows.append((
+                record.id,
+                self.site_name,
+                record_dict["meta"]["scraped_at"],
+                json.dumps(record_dict, ensure_ascii=False),
+            ))
+
+        with self._transaction() as connection:
+            connection.executemany(_UPSERT_RECORD, rows)
+            connection.executemany(_INSERT_SEEN_ID, ((record.id, self.site_name) for record in articles))
+
+        logger.info("Upserted %d articles", len(articles))
+
+    def update_articles(self, articles: List[Record]) -> None:
+        """Replace stored articles; saving already upserts by record ID."""
+
+        self.save_articles(articles)
+
+    def save_seen_ids(self, ids: Set[str]) -> None:
+        """Insert IDs that are not yet marked as seen."""
+
+        with self._transaction() as connection:
+            connection.executemany(_INSERT_SEEN_ID, ((seen_id, self.site_name) for seen_id in ids))
+
+        logger.info("Added %d new seen IDs", len(ids))
+
+    def load_seen_ids(self) -> SQLiteSeenIds:
+        """Return a set view of seen IDs backed by indexed lookups."""
+
+        return SQLiteSeenIds(self)
+
+    def clear(self) -> None:
+        """Delete this site's articles and seen IDs."""
+
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM records WHERE source = ?", (self.site_name,))
+            connection.execute("DELETE FROM seen_ids WHERE source = ?", (self.site_name,))
+
+        logger.info("Cleared records and seen IDs for %s", self.site_name)
+
+    def close(self) -> None:
+        """Close the database connection."""
+
+        with self._lock:
+            self._connection.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run statements in an immediate transaction, taking the write lock up front."""
+
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._connection
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+
+    def _query_one(self, sql: str, params: tuple):
+        with self._lock:
+            return self._connection.execute(sql, params).fetchone()
+
+    def _query_all(self, sql: str, params: tuple) -> list:
+        with self._lock:
+            return self._connection.execute(sql, params).fetchall()
@@ -1,12 +1,26 @@
 """
 Utility modules for web scraping.
-Contains retry logic, rate limiting, URL helpers, and date utilities.
+Contains retry logic, rate limiting, concurrency limits, metrics, and stage profiling.
 """
 
 from .retry import retry_on_exception
-from .rate_limiter import RateLimiter
+from .rate_limiter import RateLimiter, RateLimits
+from .request_budget import RequestBudget
+from .adaptive_concurrency import AdaptiveConcurrency, HostConcurrency
+from .metrics import REGISTRY, Counter, Histogram, MetricsRegistry, start_metrics_server
+from .profiler import StageProfiler
 
 __all__ = [
     'retry_on_exception',
     'RateLimiter',
+    'RateLimits',
+    'RequestBudget',
+    'AdaptiveConcurrency',
+    'HostConcurrency',
+    'REGISTRY',
+    'Counter',
+    'Histogram',
+    'MetricsRegistry',
+    'start_metrics_server',
+    'StageProfiler',
 ]
@@ -0,0 +1,187 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Mapping, Optional
+
+# Weight of the newest response in the smoothed latency
+_LATENCY_SMOOTHING = 0.2
+
+# Relative amount the baseline latency may rise per response, so it follows lasting changes
+_BASELINE_DRIFT = 0.01
+
+
+class HostConcurrency:
+    """
+    Concurrent request limit for one host, adjusted by additive increase /
+    multiplicative decrease (AIMD).
+
+    While the limit is fully used and the smoothed latency stays within
+    ``latency_tolerance`` times the lowest latency seen, each successful
+    response raises the limit by ``increase / limit``, which adds about
+    ``increase`` per round of requests. An overload signal (429, 5xx or a
+    timeout) multiplies it by ``decrease``, at most once per round trip.
+    """
+
+    def __init__(
+            self,
+            limit: float,
+            min_limit: int = 1,
+            max_limit: int = 32,
+            increase: float = 1.0,
+            decrease: float = 0.5,
+            latency_tolerance: float = 2.0,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+
+        self.limit = min(max(float(limit), min_limit), max_limit)
+        self.initial_limit = self.limit
+
+        self.successes = 0
+        self.overloads = 0
+
+        self._inflight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._latency: Optional[float] = None
+        self._baseline: Optional[float] = None
+        self._last_decrease = float("-inf")
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one of the host's request slots."""
+
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self) -> None:
+        """Wait until the number of in-flight requests is below the current limit."""
+
+        while self._inflight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                else:
+                    # This waiter was already woken, so hand the free slot on
+                    self._wake()
+                raise
+
+        self._inflight += 1
+
+    def release(self) -> None:
+        """Return a slot and wake waiters that now fit under the limit."""
+
+        self._inflight -= 1
+        self._wake()
+
+    def on_success(self, latency: float) -> None:
+        """Record a successful response, raising the limit while the host stays healthy."""
+
+        self.successes += 1
+
+        if self._latency is None:
+            self._latency = latency
+        else:
+            self._latency += _LATENCY_SMOOTHING * (latency - self._latency)
+
+        if self._baseline is None:
+            self._baseline = self._latency
+        else:
+            self._baseline = min(self._latency, self._baseline * (1 + _BASELINE_DRIFT))
+
+        # Only grow a limit that is actually in use; the request reporting success still holds its slot
+        saturated = self._inflight >= int(self.limit)
+        healthy = self._latency <= self._baseline * self.latency_tolerance
+
+        if saturated and healthy:
+            self._set_limit(self.limit + self.increase / self.limit)
+
+    def on_overload(self) -> None:
+        """Record a 429, 5xx or timeout, cutting the limit multiplicatively."""
+
+        self.overloads += 1
+
+        # Requests already in flight report the same overload, so back off once per round trip
+        now = time.monotonic()
+        if now - self._last_decrease < (self._latency or 0.0):
+            return
+
+        self._last_decrease = now
+        self._set_limit(self.limit * self.decrease)
+
+    def _set_limit(self, limit: float) -> None:
+        self.limit = min(max(limit, self.min_limit), self.max_limit)
+        self._wake()
+
+    def _wake(self) -> None:
+        free = int(self.limit) - self._inflight
+
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+
+class AdaptiveConcurrency:
+    """
+    Per-host AIMD concurrency limits. Hosts start from the limit learned in a
+    previous run when one is given, or from ``initial_limit``.
+    """
+
+    def __init__(
+            self,
+            initial_limit: int,
+            min_limit: int = 1,
+            max_limit: int = 32,
+            increase: float = 1.0,
+            decrease: float = 0.5,
+            latency_tolerance: float = 2.0,
+            learned_limits: Optional[Mapping[str, float]] = None,
+    ):
+        self.initial_limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+
+        self._learned_limits = dict(learned_limits or {})
+        self._hosts: Dict[str, HostConcurrency] = {}
+
+    def host(self, host: str) -> HostConcurrency:
+        """Return the limit for the given host, creating it on first use."""
+
+        host_concurrency = self._hosts.get(host)
+        if host_concurrency is None:
+            host_concurrency = HostConcurrency(
+                self._learned_limits.get(host, self.initial_limit),
+                min_limit=self.min_limit,
+                max_limit=self.max_limit,
+                increase=self.increase,
+                decrease=self.decrease,
+                latency_tolerance=self.latency_tolerance,
+            )
+            self._hosts[host] = host_concurrency
+
+        return host_concurrency
+
+    @property
+    def hosts(self) -> Dict[str, HostConcurrency]:
+        return dict(self._hosts)
+
+    def snapshot(self) -> Dict[str, float]:
+        """Return the current limit of every host contacted so far."""
+
+        return {host: round(host_concurrency.limit, 2) for host, host_concurrency in self._hosts.items()}
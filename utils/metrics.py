@@ -0,0 +1,265 @@
+import math
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+# Upper bounds, in seconds, suiting both request latencies and per-post parse times
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+class _Metric:
+    """A named metric with a fixed set of label names, safe to update from worker threads."""
+
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(label, "")) for label in self.labels)
+
+    def _format_labels(self, key: LabelValues, extra: Optional[Dict[str, str]] = None) -> str:
+        pairs = [*zip(self.labels, key), *(extra or {}).items()]
+        if not pairs:
+            return ""
+
+        return "{" + ",".join(f'{label}="{_escape(value)}"' for label, value in pairs) + "}"
+
+
+class Counter(_Metric):
+    """A value that only goes up, such as requests sent or bytes received."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{self._format_labels(key)} {_number(value)}" for key, value in sorted(self._values.items())]
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [{"labels": dict(zip(self.labels, key)), "value": value} for key, value in sorted(self._values.items())]
+
+    def export(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def merge(self, values: Dict[LabelValues, float]) -> None:
+        with self._lock:
+            for key, value in values.items():
+                self._values[key] = self._values.get(key, 0.0) + value
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, such as request latencies."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            counts[bisect_left(self.buckets, value)] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def count(self, **labels: Any) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def quantile(self, q: float, **labels: Any) -> Optional[float]:
+        """Estimate a quantile by interpolating within its bucket, as Prometheus does."""
+
+        with self._lock:
+            counts = list(self._counts.get(self._key(labels), ()))
+
+        return _quantile(self.buckets, counts, q)
+
+    def render(self) -> List[str]:
+        lines = []
+
+        with self._lock:
+            for key, counts in sorted(self._counts.items()):
+                cumulative = 0
+                for bound, count in zip((*self.buckets, math.inf), counts):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{self._format_labels(key, {'le': _number(bound)})} {cumulative}")
+
+                lines.append(f"{self.name}_sum{self._format_labels(key)} {_number(self._sums[key])}")
+                lines.append(f"{self.name}_count{self._format_labels(key)} {cumulative}")
+
+        return lines
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = [(key, list(counts), self._sums[key]) for key, counts in sorted(self._counts.items())]
+
+        return [
+            {
+                "labels": dict(zip(self.labels, key)),
+                "count": sum(counts),
+                "sum": total,
+                "p50": _quantile(self.buckets, counts, 0.5),
+                "p99": _quantile(self.buckets, counts, 0.99),
+            }
+            for key, counts, total in items
+        ]
+
+    def export(self) -> Dict[LabelValues, Tuple[List[int], float]]:
+        with self._lock:
+            return {key: (list(counts), self._sums[key]) for key, counts in self._counts.items()}
+
+    def merge(self, values: Dict[LabelValues, Tuple[List[int], float]]) -> None:
+        with self._lock:
+            for key, (counts, total) in values.items():
+                merged = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+                for index, count in enumerate(counts):
+                    merged[index] += count
+                self._sums[key] = self._sums.get(key, 0.0) + total
+
+
+class MetricsRegistry:
+    """
+    The metrics of a process, rendered as Prometheus text or as a JSON-ready
+    snapshot. Asking for a metric that exists returns it, so modules can
+    declare the metrics they update at import time.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+
+        lines = []
+
+        for metric in self._sorted():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return every metric's current values, keyed by metric name."""
+
+        return {
+            metric.name: {"type": metric.kind, "help": metric.help, "values": metric.snapshot()}
+            for metric in self._sorted()
+        }
+
+    def export(self) -> Dict[str, Tuple[str, str, LabelValues, Tuple[float, ...], Any]]:
+        """Return the raw values of every metric, to be merged into the registry of another process."""
+
+        return {
+            metric.name: (metric.kind, metric.help, metric.labels, getattr(metric, "buckets", ()), metric.export())
+            for metric in self._sorted()
+        }
+
+    def merge(self, exported: Dict[str, Tuple[str, str, LabelValues, Tuple[float, ...], Any]]) -> None:
+        """Add the values exported by the registry of another process to these metrics."""
+
+        for name, (kind, help, labels, buckets, values) in exported.items():
+            if kind == "histogram":
+                self.histogram(name, help, labels, buckets).merge(values)
+            else:
+                self.counter(name, help, labels).merge(values)
+
+    def _register(self, metric: _Metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labels != metric.labels:
+                    raise ValueError(f"Metric {metric.name} is already registered with a different type or labels")
+                return existing
+
+            self._metrics[metric.name] = metric
+            return metric
+
+    def _sorted(self) -> Iterable[_Metric]:
+        with self._lock:
+            return [self._metrics[name] for name in sorted(self._metrics)]
+
+
+# Metrics of this process
+REGISTRY = MetricsRegistry()
+
+
+async def start_metrics_server(host: str, port: int, registry: MetricsRegistry = REGISTRY) -> web.AppRunner:
+    """Serve the registry as Prometheus text on ``/metrics``. Stop it with ``cleanup()``."""
+
+    async def handle_metrics(request: web.Request) -> web.Response:
+        return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+
+    return runner
+
+
+def _quantile(buckets: Sequence[float], counts: List[int], q: float) -> Optional[float]:
+    total = sum(counts)
+    if not total:
+        return None
+
+    rank = q * total
+    cumulative = 0
+
+    for index, count in enumerate(counts):
+        if cumulative + count >= rank and count:
+            lower = buckets[index - 1] if index > 0 else 0.0
+
+            # Observations above the largest bound are reported as that bound
+            if index == len(buckets):
+                return buckets[-1]
+
+            return lower + (buckets[index] - lower) * (rank - cumulative) / count
+
+        cumulative += count
+
+    return buckets[-1]
+
+
+def _number(value: float) -> str:
+    return "+Inf" if value == math.inf else repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
@@ -0,0 +1,167 @@
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Frames of the profiler itself, left out of allocation reports
+_TRACE_FILTERS = (
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+# The stage whose cProfile capture is running; the interpreter allows one at a time
+_capturing: Optional[Tuple[str, str]] = None
+
+
+@dataclass
+class StageStats:
+    """Totals of every entry into one stage."""
+
+    calls: int = 0
+    wall: float = 0.0
+    cpu: float = 0.0
+    allocated: int = 0
+    profile: Optional[cProfile.Profile] = None
+
+    # Net bytes and blocks allocated, by source line
+    allocations: Dict[str, List[int]] = field(default_factory=dict)
+
+
+class StageProfiler:
+    """
+    Wall and CPU time of the stages of one site's run, with optional
+    ``cProfile`` and ``tracemalloc`` captures per stage.
+
+    Entering a stage several times adds to its totals, so stages that run
+    once per page are reported as a whole. CPU time is that of the process,
+    and captures cover everything the event loop runs while a stage is
+    open: when sites are scraped at once, their stages overlap, and only
+    one cProfile capture runs at a time. Scrape one site at a time for
+    clean attribution.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            output_dir: str,
+            cprofile: bool = False,
+            trace_allocations: bool = False,
+            top_n: int = 20,
+    ):
+        self.name = name
+        self.output_dir = Path(output_dir)
+        self.cprofile = cprofile
+        self.trace_allocations = trace_allocations
+        self.top_n = top_n
+
+        self.stages: Dict[str, StageStats] = {}
+
+        if trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the enclosed block, and capture it when enabled, as part of stage ``name``."""
+
+        global _capturing
+
+        stats = self.stages.setdefault(name, StageStats())
+
+        profile = None
+        if self.cprofile and _capturing is None:
+            profile = stats.profile = stats.profile or cProfile.Profile()
+            _capturing = (self.name, name)
+
+        before = tracemalloc.take_snapshot().filter_traces(_TRACE_FILTERS) if self.trace_allocations else None
+
+        wall_started = time.perf_counter()
+        cpu_started = time.process_time()
+
+        if profile is not None:
+            profile.enable()
+
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+                _capturing = None
+
+            stats.calls += 1
+            stats.wall += time.perf_counter() - wall_started
+            stats.cpu += time.process_time() - cpu_started
+
+            if before is not None:
+                self._add_allocations(stats, before)
+
+    def summary(self) -> str:
+        """Return one line with the wall and CPU seconds of every stage."""
+
+        return ", ".join(f"{name} {stats.wall:.3f}s wall / {stats.cpu:.3f}s CPU" for name, stats in self.stages.items())
+
+    def report(self) -> str:
+        """Return a table of the stages, followed by the top functions and allocations of each capture."""
+
+        lines = [
+            f"Stage profile for {self.name}",
+            "",
+            f"{'stage':<16} {'calls':>6} {'wall s':>10} {'cpu s':>10} {'alloc KiB':>11}",
+        ]
+
+        for name, stats in self.stages.items():
+            lines.append(f"{name:<16} {stats.calls:>6} {stats.wall:>10.3f} {stats.cpu:>10.3f} {stats.allocated / 1024:>11.1f}")
+
+        for name, stats in self.stages.items():
+            if stats.profile is not None:
+                stream = io.StringIO()
+                pstats.Stats(stats.profile, stream=stream).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top_n)
+
+                lines += ["", f"== {name}: top {self.top_n} functions by cumulative time ==", stream.getvalue().strip()]
+
+            if stats.allocations:
+                top = sorted(stats.allocations.items(), key=lambda item: item[1][0], reverse=True)[:self.top_n]
+
+                lines += ["", f"== {name}: top {self.top_n} allocations by net size =="]
+                lines += [f"{size / 1024:>10.1f} KiB {count:>8} blocks  {line}" for line, (size, count) in top]
+
+        return "\n".join(lines) + "\n"
+
+    def write(self) -> Path:
+        """
+        Write the report to ``{output_dir}/{name}.txt`` and each stage's
+        cProfile capture to ``{output_dir}/{name}.{stage}.prof``, which
+        ``pstats`` and viewers such as snakeviz read. Returns the report path.
+        """
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        for name, stats in self.stages.items():
+            if stats.profile is not None:
+                stats.profile.dump_stats(str(self.output_dir / f"{self.name}.{name}.prof"))
+
+        report_path = self.output_dir / f"{self.name}.txt"
+        report_path.write_text(self.report(), encoding="utf-8")
+
+        return report_path
+
+    @staticmethod
+    def _add_allocations(stats: StageStats, before: tracemalloc.Snapshot) -> None:
+        after = tracemalloc.take_snapshot().filter_traces(_TRACE_FILTERS)
+
+        for diff in after.compare_to(before, "lineno"):
+            if not diff.size_diff and not diff.count_diff:
+                continue
+
+            frame = diff.traceback[0]
+            totals = stats.allocations.setdefault(f"{frame.filename}:{frame.lineno}", [0, 0])
+            totals[0] += diff.size_diff
+            totals[1] += diff.count_diff
+
+            stats.allocated += diff.size_diff
@@ -1,26 +1,113 @@
 import asyncio
+from typing import Dict, Optional
 
 
 class RateLimiter:
-    """Simple rate limiter to control request frequency."""
+    """
+    Token bucket rate limiter: bursts of up to ``burst`` requests, and
+    ``requests_per_second`` on average.
 
-    def __init__(self, requests_per_second: float = 1.0):
-        self.min_interval = 1.0 / requests_per_second if requests_per_second > 0 else 0
-        self.last_request_time = 0.0
-        self._lock = asyncio.Lock()
+    Each caller reserves a token and sleeps until it is due without holding a
+    lock, so waiters sleep side by side instead of queueing behind each
+    other's sleeps. ``pause`` stops the bucket for a while; reservations made
+    before a pause are dropped and taken again once it is over.
+    """
+
+    def __init__(self, requests_per_second: float = 1.0, burst: int = 1):
+        self.rate = requests_per_second
+        self.burst = max(1, burst)
+
+        self._tokens = float(self.burst)
+        self._updated: Optional[float] = None
+        self._paused_until = 0.0
+        self._epoch = 0
 
     async def wait(self) -> None:
         """Wait if necessary to respect rate limit."""
 
-        if self.min_interval <= 0:
-            return
+        loop = asyncio.get_running_loop()
+
+        while True:
+            now = loop.time()
+
+            if self._paused_until > now:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+
+            if self.rate <= 0:
+                return
+
+            delay = self._reserve(now)
+            if delay <= 0:
+                return
+
+            epoch = self._epoch
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                if epoch == self._epoch:
+                    self._tokens += 1
+                raise
+
+            if epoch == self._epoch:
+                return
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every request for ``seconds``, then resume at the regular rate."""
+
+        now = asyncio.get_running_loop().time()
+        self._paused_until = max(self._paused_until, now + seconds)
+
+        # Void outstanding reservations and the saved-up burst
+        self._epoch += 1
+        self._tokens = 0.0
+        self._updated = self._paused_until
+
+    def _reserve(self, now: float) -> float:
+        """Take a token and return how long to wait until it is due."""
+
+        if self._updated is None:
+            self._updated = now
+        elif now > self._updated:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+        self._tokens -= 1
+        return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+
+class RateLimits:
+    """
+    Rate limiters shared by every client in a run: a token bucket per host,
+    and an optional global one (disabled when ``global_rate`` is 0).
+    """
+
+    def __init__(self, per_host_rate: float, burst: int = 1, global_rate: float = 0.0, global_burst: Optional[int] = None):
+        self.per_host_rate = per_host_rate
+        self.burst = burst
+
+        self._hosts: Dict[str, RateLimiter] = {}
+        self._global = RateLimiter(global_rate, global_burst or burst) if global_rate > 0 else None
+
+    def host(self, host: str) -> RateLimiter:
+        """Return the bucket for the given host, creating it on first use."""
+
+        limiter = self._hosts.get(host)
+        if limiter is None:
+            limiter = RateLimiter(self.per_host_rate, self.burst)
+            self._hosts[host] = limiter
+
+        return limiter
+
+    async def wait(self, host: str) -> None:
+        """Wait for a token from the host's bucket, then from the global one."""
+
+        await self.host(host).wait()
 
-        async with self._lock:
-            current_time = asyncio.get_event_loop().time()
-            time_since_last = current_time - self.last_request_time
+        if self._global is not None:
+            await self._global.wait()
 
-            if time_since_last < self.min_interval:
-                wait_time = self.min_interval - time_since_last
-                await asyncio.sleep(wait_time)
+    def pause(self, host: str, seconds: float) -> None:
+        """Pause requests to a single host, e.g. after it answered 429."""
 
-            self.last_request_time = asyncio.get_event_loop().time()
+        self.host(host).pause(seconds)
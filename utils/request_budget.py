@@ -0,0 +1,36 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+
+
+class RequestBudget:
+    """
+    Limits the number of in-flight HTTP requests across all sites,
+    with an additional cap per host.
+    """
+
+    def __init__(self, max_inflight: int, max_per_host: int):
+        self.max_inflight = max_inflight
+        self.max_per_host = max_per_host
+
+        self._global = asyncio.Semaphore(max_inflight)
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+
+    def _host_semaphore(self, host: str) -> asyncio.Semaphore:
+        """Return the semaphore guarding the given host, creating it on first use."""
+
+        semaphore = self._hosts.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_per_host)
+            self._hosts[host] = semaphore
+
+        return semaphore
+
+    @asynccontextmanager
+    async def acquire(self, host: str) -> AsyncIterator[None]:
+        """Hold one host slot and one global slot for the duration of a request."""
+
+        # The host slot is taken first so a busy host never sits on global slots
+        async with self._host_semaphore(host):
+            async with self._global:
+                yield
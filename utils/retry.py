@@ -1,7 +1,7 @@
 import asyncio
 import logging
 from functools import wraps
-from typing import Callable
+from typing import Callable, Optional
 from time import sleep
 
 logger = logging.getLogger(__name__)
@@ -12,7 +12,8 @@ def retry_on_exception(
     delay: float = 1.0,
     backoff: float = 2.0,
     exceptions: tuple = (Exception,),
-    log_errors: bool = True
+    log_errors: bool = True,
+    on_retry: Optional[Callable] = None,
 ):
     """
     Decorator to retry a function on exceptions with exponential backoff.
@@ -22,6 +23,7 @@ def retry_on_exception(
     :param backoff: Multiplier for delay after each retry
     :param exceptions: Tuple of exceptions to catch and retry on
     :param log_errors: Whether to log retry attempts
+    :param on_retry: Called with the function's arguments before each retry
     """
     def decorator(func: Callable) -> Callable:
         @wraps(func)
@@ -40,6 +42,8 @@ def retry_on_exception(
                                 f"{func.__name__} failed (attempt {attempt + 1}/{max_retries + 1}): {e}. "
                                 f"Retrying in {current_delay:.2f}s..."
                             )
+                        if on_retry is not None:
+                            on_retry(*args, **kwargs)
                         await asyncio.sleep(current_delay)
                         current_delay *= backoff
                     else:
@@ -64,6 +68,8 @@ def retry_on_exception(
                                 f"{func.__name__} failed (attempt {attempt + 1}/{max_retries + 1}): {e}. "
                                 f"Retrying in {current_delay:.2f}s..."
                             )
+                        if on_retry is not None:
+                            on_retry(*args, **kwargs)
                         sleep(current_delay)
                         current_delay *= backoff
                     else: